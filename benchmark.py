@@ -0,0 +1,414 @@
+"""Benchmarks for the S3 listing, transfer and delete paths
+
+Runs the same engine classes the GUI and the batch CLI use (ParallelLister,
+S3TransferEngine, S3BatchDeleter) against a local S3 stand-in, so changes to
+refresh_s3_files, upload_files or delete_folder_recursive can be measured.
+By default a moto server is started in-process (pip install "moto[server]");
+--endpoint-url points at any other S3-compatible service instead.
+
+Latency and SlowDown throttling are injected on the client side, per request
+attempt, so they work the same against every endpoint. Each run prints
+throughput and p50/p99 request latency per scenario and saves the results as
+JSON for comparing runs:
+
+    python benchmark.py --latency-ms 20 --throttle-rate 0.02
+    python benchmark.py --scenarios list delete --compare benchmark_results/bench-20240101-120000.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from botocore.awsrequest import AWSResponse
+
+from main import (MB, MultipartJournal, ParallelLister, S3BatchDeleter, S3ClientFactory,
+                  S3TransferEngine)
+
+SCENARIOS = ('list', 'small-upload', 'large-upload', 'large-download', 'delete')
+
+SLOWDOWN_BODY = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                 b'<Error><Code>SlowDown</Code><Message>Please reduce your request rate.</Message></Error>')
+
+
+class _RawBody:
+    """Minimal urllib3-style body for a synthetic AWSResponse"""
+
+    def __init__(self, data):
+        self._data = data
+
+    def stream(self, *args, **kwargs):
+        yield self._data
+
+
+class FaultInjector:
+    """Adds latency to every request attempt and answers a fraction of them with 503 SlowDown"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, throttle_rate=0.0, seed=None):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.throttle_rate = throttle_rate
+        self.enabled = True
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        client.meta.events.register('before-send.s3', self.before_send)
+
+    def before_send(self, request, **kwargs):
+        if not self.enabled:
+            return None
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            throttle = self._random.random() < self.throttle_rate
+            if throttle:
+                self.throttled += 1
+        if delay:
+            time.sleep(delay)
+        if throttle:
+            # Returning a response from before-send skips the real request
+            return AWSResponse(request.url, 503, {'Content-Type': 'application/xml'}, _RawBody(SLOWDOWN_BODY))
+        return None
+
+
+class LatencyRecorder:
+    """Per-operation S3 call latency, including botocore's retries, from client event hooks"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        client.meta.events.register('before-call.s3', self.before_call)
+        client.meta.events.register('after-call.s3', self.after_call)
+        client.meta.events.register('after-call-error.s3', self.after_call)
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+
+    def before_call(self, model, context, **kwargs):
+        context['benchmark'] = (model.name, time.perf_counter())
+
+    def after_call(self, context, **kwargs):
+        started = context.get('benchmark')
+        if started:
+            name, start = started
+            with self._lock:
+                self.samples[name].append(time.perf_counter() - start)
+
+    def summary(self):
+        """{operation: {count, p50_ms, p99_ms}}"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+        return {name: {'count': len(values),
+                       'p50_ms': round(percentile(values, 50) * 1000, 2),
+                       'p99_ms': round(percentile(values, 99) * 1000, 2)}
+                for name, values in samples.items()}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_moto():
+    """Start an in-process moto S3 server and return (server, endpoint url)"""
+    try:
+        from moto.server import ThreadedMotoServer
+    except ImportError:
+        raise SystemExit("moto is not installed: pip install \"moto[server]\", or pass --endpoint-url")
+    # werkzeug logs every request the server handles, which floods the report output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    port = free_port()
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=port)
+    server.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+class Benchmark:
+    """Runs the scenarios against one bucket and collects their results"""
+
+    def __init__(self, args, s3_client, injector, recorder, work_dir):
+        self.args = args
+        self.s3_client = s3_client
+        self.injector = injector
+        self.recorder = recorder
+        self.work_dir = work_dir
+        self.bucket = args.bucket
+        self.results = {}
+
+    def engine(self, journal=None):
+        return S3TransferEngine(self.s3_client,
+                                max_concurrency=self.args.concurrency,
+                                part_concurrency=self.args.part_concurrency,
+                                multipart_threshold=self.args.part_size * MB,
+                                part_size=self.args.part_size * MB,
+                                journal=journal)
+
+    def measure(self, name, func, unit):
+        """Time func() -> (items, bytes) with fault injection on and record the result"""
+        self.recorder.reset()
+        throttled_before = self.injector.throttled
+        self.injector.enabled = True
+        started = time.perf_counter()
+        try:
+            items, size = func()
+        finally:
+            elapsed = time.perf_counter() - started
+            self.injector.enabled = False
+
+        result = {
+            'seconds': round(elapsed, 3),
+            'items': items,
+            'unit': unit,
+            'items_per_sec': round(items / elapsed, 2) if elapsed else 0.0,
+            'mb_per_sec': round(size / MB / elapsed, 2) if elapsed and size else 0.0,
+            'throttled': self.injector.throttled - throttled_before,
+            'operations': self.recorder.summary(),
+        }
+        self.results[name] = result
+        print_result(name, result)
+        return result
+
+    def seed_keys(self, prefix, count):
+        """Create count tiny objects spread over 100 sub-prefixes (not timed, no injected faults)"""
+        keys = [f"{prefix}{i % 100:03d}/{i:08d}.dat" for i in range(count)]
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(lambda key: self.s3_client.put_object(Bucket=self.bucket, Key=key, Body=b'x'), keys))
+        return keys
+
+    def make_file(self, path, size):
+        with open(path, 'wb') as f:
+            remaining = size
+            while remaining > 0:
+                chunk = os.urandom(min(MB, remaining))
+                f.write(chunk)
+                remaining -= len(chunk)
+
+    def run_list(self):
+        prefix = 'list/'
+        self.seed_keys(prefix, self.args.keys)
+
+        def sequential():
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+            return sum(len(page.get('Contents', [])) for page in pages), 0
+
+        def parallel():
+            lister = ParallelLister(self.s3_client, max_workers=self.args.concurrency)
+            return sum(len(page.get('Contents', [])) for page in lister.iter_pages(self.bucket, prefix)), 0
+
+        def one_level():
+            # What refresh_s3_files fetches for a folder view
+            lister = ParallelLister(self.s3_client, max_workers=self.args.concurrency)
+            return sum(len(page.get('Contents', [])) + len(page.get('CommonPrefixes', []))
+                       for page in lister.iter_pages(self.bucket, prefix, delimiter='/')), 0
+
+        self.measure('list-sequential', sequential, 'keys')
+        self.measure('list-parallel', parallel, 'keys')
+        self.measure('list-folder-view', one_level, 'entries')
+
+    def run_small_upload(self):
+        local_dir = os.path.join(self.work_dir, 'small')
+        os.makedirs(local_dir, exist_ok=True)
+        size = self.args.small_size_kb * 1024
+        jobs = []
+        for i in range(self.args.small_files):
+            path = os.path.join(local_dir, f"{i:06d}.bin")
+            self.make_file(path, size)
+            jobs.append((self.bucket, path, f"small/{i:06d}.bin"))
+
+        def upload():
+            results = self.engine().upload_files(jobs)
+            failed = [r for r in results if not r.ok]
+            if failed:
+                print(f"  {len(failed)} uploads failed, e.g. {failed[0].error}")
+            return len(results) - len(failed), sum(r.size for r in results if r.ok)
+
+        self.measure('small-upload', upload, 'files')
+
+    def large_path(self):
+        path = os.path.join(self.work_dir, 'large.bin')
+        if not os.path.exists(path):
+            self.make_file(path, self.args.large_size_mb * MB)
+        return path
+
+    def run_large_upload(self):
+        path = self.large_path()
+        journal = MultipartJournal(directory=os.path.join(self.work_dir, 'journal'))
+
+        def upload():
+            results = self.engine(journal).upload_files([(self.bucket, path, 'large/large.bin')])
+            if not results[0].ok:
+                raise RuntimeError(results[0].error)
+            return 1, results[0].size
+
+        self.measure('large-upload', upload, 'files')
+
+    def run_large_download(self):
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key='large/large.bin')
+        except Exception:
+            self.s3_client.upload_file(self.large_path(), self.bucket, 'large/large.bin')
+        target = os.path.join(self.work_dir, 'download', 'large.bin')
+
+        def download():
+            results = self.engine().download_files([(self.bucket, 'large/large.bin', target)])
+            if not results[0].ok:
+                raise RuntimeError(results[0].error)
+            return 1, results[0].size
+
+        self.measure('large-download', download, 'files')
+
+    def run_delete(self):
+        prefix = 'delete/'
+        self.seed_keys(prefix, self.args.keys)
+
+        def delete():
+            lister = ParallelLister(self.s3_client, max_workers=self.args.concurrency)
+            deleter = S3BatchDeleter(self.s3_client, max_concurrency=self.args.concurrency)
+            summary = deleter.delete_prefix(self.bucket, prefix, pages=lister.iter_pages(self.bucket, prefix))
+            if summary.error_count:
+                print(f"  {summary.error_count} deletes failed: {summary.error_summary()}")
+            return summary.deleted, 0
+
+        self.measure('delete', delete, 'objects')
+
+    def run(self, scenarios):
+        for scenario in scenarios:
+            print(f"\n== {scenario}")
+            getattr(self, 'run_' + scenario.replace('-', '_'))()
+        return self.results
+
+
+def print_result(name, result):
+    line = f"  {name:<18} {result['seconds']:>8.2f}s  {result['items_per_sec']:>10.1f} {result['unit']}/s"
+    if result['mb_per_sec']:
+        line += f"  {result['mb_per_sec']:>8.1f} MB/s"
+    if result['throttled']:
+        line += f"  ({result['throttled']} throttled)"
+    print(line)
+    for operation, stats in sorted(result['operations'].items()):
+        print(f"      {operation:<24} n={stats['count']:<7} p50 {stats['p50_ms']:>8.1f} ms   "
+              f"p99 {stats['p99_ms']:>8.1f} ms")
+
+
+def compare(results, baseline_path):
+    """Print throughput and p99 changes against an earlier results file"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)['scenarios']
+
+    print(f"\n== compared with {baseline_path}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (result['items_per_sec'] / before['items_per_sec'] - 1) * 100 if before['items_per_sec'] else 0.0
+        print(f"  {name:<18} {before['items_per_sec']:>10.1f} -> {result['items_per_sec']:>10.1f} "
+              f"{result['unit']}/s ({change:+.1f}%)")
+        for operation, stats in sorted(result['operations'].items()):
+            old = before['operations'].get(operation)
+            if old:
+                print(f"      {operation:<24} p99 {old['p99_ms']:>8.1f} -> {stats['p99_ms']:>8.1f} ms")
+
+
+def empty_bucket(s3_client, bucket):
+    deleter = S3BatchDeleter(s3_client, max_concurrency=8)
+    deleter.delete_prefix(bucket, '')
+    s3_client.delete_bucket(Bucket=bucket)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark S3 listing, transfers and deletes against a local S3")
+    parser.add_argument('--endpoint-url', help="S3-compatible endpoint to use instead of an in-process moto server")
+    parser.add_argument('--bucket', default=f"bench-{int(time.time())}", help="bucket to create and remove")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="latency added to every request attempt")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="uniform +/- jitter on the added latency")
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help="fraction of request attempts answered with 503 SlowDown")
+    parser.add_argument('--seed', type=int, default=1, help="random seed for jitter and throttling")
+    parser.add_argument('--concurrency', type=int, default=8, help="files / list ranges / delete batches in flight")
+    parser.add_argument('--part-concurrency', type=int, default=4, help="parts in flight per file")
+    parser.add_argument('--part-size', type=int, default=8, help="multipart / ranged GET part size in MB")
+    parser.add_argument('--keys', type=int, default=20000, help="objects seeded for the list and delete scenarios")
+    parser.add_argument('--small-files', type=int, default=1000, help="files in the small-upload scenario")
+    parser.add_argument('--small-size-kb', type=int, default=16, help="size of each small file")
+    parser.add_argument('--large-size-mb', type=int, default=256, help="size of the large file")
+    parser.add_argument('--output-dir', default='benchmark_results', help="where results JSON is saved")
+    parser.add_argument('--compare', help="earlier results JSON to compare this run with")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    if args.endpoint_url:
+        endpoint = args.endpoint_url
+    else:
+        server, endpoint = start_moto()
+
+    injector = FaultInjector(args.latency_ms, args.jitter_ms, args.throttle_rate, args.seed)
+    injector.enabled = False  # Only while a scenario is being timed
+    recorder = LatencyRecorder()
+
+    def instrument(client):
+        injector.attach(client)
+        recorder.attach(client)
+
+    factory = S3ClientFactory(os.getenv("AWS_REGION", "us-east-1"),
+                              os.getenv("AWS_ACCESS_KEY_ID", "testing"),
+                              os.getenv("AWS_SECRET_ACCESS_KEY", "testing"),
+                              endpoint_url=endpoint, on_create=instrument)
+    s3_client = factory.client(args.concurrency * args.part_concurrency + args.concurrency)
+
+    work_dir = tempfile.mkdtemp(prefix='s3bench-')
+    started = datetime.now()
+    try:
+        s3_client.create_bucket(Bucket=args.bucket)
+        print(f"Benchmarking {endpoint} bucket {args.bucket}: latency {args.latency_ms}±{args.jitter_ms} ms, "
+              f"throttle rate {args.throttle_rate}, concurrency {args.concurrency}x{args.part_concurrency}")
+        results = Benchmark(args, s3_client, injector, recorder, work_dir).run(args.scenarios)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        try:
+            empty_bucket(s3_client, args.bucket)
+        except Exception as e:
+            print(f"Could not remove bucket {args.bucket}: {e}")
+        if server:
+            server.stop()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"bench-{started.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'started': started.isoformat(), 'endpoint': endpoint,
+                   'config': {k: v for k, v in vars(args).items() if k not in ('compare', 'output_dir')},
+                   'scenarios': results}, f, indent=2)
+    print(f"\nResults saved to {path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
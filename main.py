@@ -1,17 +1,3263 @@
 
+import bisect
 import boto3
+import cProfile
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import itertools
+import random
 import threading
 import time
-from datetime import datetime
-from tkinter import *
-from tkinter import filedialog, messagebox, ttk
+from array import array
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+try:
+    from tkinter import *
+    from tkinter import filedialog, messagebox, ttk
+except ImportError:
+    pass  # Python built without Tk: only the headless CLI is available
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from s3transfer.utils import signal_not_transferring, signal_transferring
 import json
 import mimetypes
 import os
+import queue
+import re
+import select
+import sqlite3
+import struct
+import sys
+import traceback
 from dotenv import load_dotenv
 import os
 
+MB = 1024 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+PARTIAL_SUFFIX = ".part"  # In-progress downloads; completed ranges live in <file>.part.json
+APP_DATA_DIR = os.path.join(os.path.expanduser("~"), ".s3_manager")
+
+
+class TransferResult:
+    """Outcome of a single file transfer"""
+
+    def __init__(self, local_path, key, size=0, error=None, etag=None):
+        self.local_path = local_path
+        self.key = key
+        self.size = size
+        self.error = error
+        self.etag = etag
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def file_md5(path):
+    """Hex MD5 of a file's contents, read in chunks"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(MB), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MultipartJournal:
+    """On-disk record of in-progress multipart uploads so they can resume
+
+    One small JSON file per (bucket, key, local file) holds the upload ID,
+    part size and the ETag of every completed part. It is rewritten
+    atomically after each part and removed once the upload completes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(APP_DATA_DIR, "journal")
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, bucket, key, local_path):
+        name = hashlib.sha1(f"{bucket}\0{key}\0{os.path.abspath(local_path)}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    def load(self, bucket, key, local_path):
+        try:
+            with open(self._path(bucket, key, local_path), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, entry):
+        path = self._path(entry['bucket'], entry['key'], entry['local_path'])
+        with self._lock:
+            with open(path + ".tmp", "w") as f:
+                json.dump(entry, f)
+            os.replace(path + ".tmp", path)
+
+    def remove(self, bucket, key, local_path):
+        try:
+            os.remove(self._path(bucket, key, local_path))
+        except OSError:
+            pass
+
+    def entries(self, bucket=None):
+        """All journaled uploads, optionally for one bucket"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if bucket is None or entry.get('bucket') == bucket:
+                entries.append(entry)
+        return entries
+
+    def remove_upload(self, bucket, key, upload_id):
+        """Drop the journal entry for an upload aborted elsewhere"""
+        for entry in self.entries(bucket):
+            if entry['key'] == key and entry['upload_id'] == upload_id:
+                self.remove(bucket, key, entry['local_path'])
+
+
+THROTTLE_CODES = {'SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+                  'RequestThrottled', 'TooManyRequestsException'}
+
+
+def is_throttle_error(error):
+    """True if a ClientError or recorded error message is S3 asking us to slow down"""
+    if isinstance(error, ClientError):
+        response = error.response
+        return (response.get('Error', {}).get('Code') in THROTTLE_CODES
+                or response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 503)
+    text = str(error or '')
+    return any(f"({code})" in text for code in THROTTLE_CODES)
+
+
+def watch_throttling(s3_client, on_throttle):
+    """Call on_throttle() for every throttled response, including the ones botocore retries itself"""
+    def check_response(response=None, **kwargs):
+        if response is None:
+            return None
+        http_response, parsed = response
+        if (parsed.get('Error', {}).get('Code') in THROTTLE_CODES
+                or getattr(http_response, 'status_code', None) == 503):
+            on_throttle()
+        return None  # Leave the retry decision to botocore
+
+    s3_client.meta.events.register('needs-retry.s3', check_response)
+
+
+def register_upload_hooks(s3_client):
+    """Let pause/cancel raised from an upload body stop the request instead of being retried
+
+    botocore wraps any error raised while sending a body in HTTPClientError,
+    which its retry handler treats as a dropped connection and retries with
+    backoff. Also marks the body reads made while signing, as s3transfer
+    does, so UploadReader doesn't count them as sent.
+    """
+    def stop_interrupted(caught_exception=None, **kwargs):
+        error = getattr(caught_exception, 'kwargs', {}).get('error')
+        if isinstance(error, TransferInterrupted):
+            raise error
+        return None
+
+    events = s3_client.meta.events
+    events.register_first('needs-retry.s3', stop_interrupted, unique_id='s3manager-stop-interrupted')
+    events.register_first('request-created.s3', signal_not_transferring, unique_id='s3upload-not-transferring')
+    events.register_last('request-created.s3', signal_transferring, unique_id='s3upload-transferring')
+
+
+class S3ClientFactory:
+    """Builds the S3 client shared by the listing, transfer and delete workers
+
+    botocore clients are thread-safe but default to a 10-connection pool,
+    so past ten workers every extra request opens and then discards its own
+    connection. The factory sizes the pool for the concurrency in use, keeps
+    connections alive and sets retries and timeouts. Clients come from one
+    session under a lock, as creating clients from a session is not thread-safe.
+    """
+
+    MIN_POOL = 10
+    MAX_POOL = 1024
+
+    def __init__(self, region, access_key, secret_key, retry_mode='standard', max_attempts=5,
+                 connect_timeout=10, read_timeout=60, on_create=None, endpoint_url=None):
+        self.session = boto3.session.Session(aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+                                             region_name=region)
+        self.endpoint_url = endpoint_url  # S3-compatible service (MinIO, moto) instead of AWS
+        self.retry_mode = retry_mode
+        self.max_attempts = max_attempts
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.on_create = on_create  # Called with every new client, e.g. to register event hooks
+        self.pool_size = 0
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self, connections=MIN_POOL):
+        """Shared client with room for at least this many connections, rebuilt larger when needed"""
+        connections = min(self.MAX_POOL, max(self.MIN_POOL, int(connections)))
+        with self._lock:
+            if self._client is None or connections > self.pool_size:
+                # Workers holding the old client keep using it until they finish
+                self._client = self._create(connections)
+                self.pool_size = connections
+            return self._client
+
+    def _create(self, connections):
+        options = {
+            'max_pool_connections': connections,
+            'retries': {'mode': self.retry_mode, 'max_attempts': self.max_attempts},
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+        }
+        try:
+            config = Config(tcp_keepalive=True, **options)
+        except TypeError:
+            config = Config(**options)  # botocore before 1.27.84 has no tcp_keepalive
+        client = self.session.client('s3', config=config, endpoint_url=self.endpoint_url)
+        if self.on_create:
+            self.on_create(client)
+        return client
+
+
+class OperationStats:
+    """Running totals for one S3 API operation"""
+
+    RECENT = 1000  # Latest durations kept for percentiles
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(S3Metrics.LATENCY_BUCKETS) + 1)  # Last one is +Inf
+        self.error_codes = {}
+        self.recent = deque(maxlen=self.RECENT)
+
+    def percentile(self, q):
+        values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[max(0, min(len(values) - 1, -(-q * len(values) // 100) - 1))]
+
+    def as_dict(self):
+        return {
+            'calls': self.calls, 'errors': self.errors, 'retries': self.retries,
+            'bytes_sent': self.bytes_sent, 'bytes_received': self.bytes_received,
+            'seconds': round(self.seconds, 6),
+            'avg_ms': round(self.seconds / self.calls * 1000, 2) if self.calls else 0.0,
+            'p50_ms': round(self.percentile(50) * 1000, 2), 'p99_ms': round(self.percentile(99) * 1000, 2),
+            'error_codes': dict(self.error_codes),
+        }
+
+
+class S3Metrics:
+    """Times and counts every S3 API call made through instrumented clients
+
+    Hooks botocore's before-call / after-call / after-call-error events, so
+    listing, transfers (including boto3's managed uploads), deletes and the
+    GUI's one-off calls are all covered. Per operation it keeps calls,
+    errors by code, retries, bytes sent and received and a latency
+    histogram, exportable as JSON or Prometheus text.
+    """
+
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    PREFIX = 's3_manager'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+            self.started = time.time()
+            self._in_flight = {}  # thread id -> operation currently being called on it
+
+    def current_call(self, thread_id):
+        """Name of the S3 operation a thread is waiting on, or None"""
+        return self._in_flight.get(thread_id)
+
+    def attach(self, s3_client):
+        events = s3_client.meta.events
+        events.register('before-call.s3', self._before_call)
+        events.register('after-call.s3', self._after_call)
+        events.register('after-call-error.s3', self._after_call_error)
+
+    def _before_call(self, model, params, context, **kwargs):
+        context['metrics'] = (model.name, time.perf_counter(), self._body_size(params.get('Body')))
+        self._in_flight[threading.get_ident()] = model.name
+
+    @staticmethod
+    def _body_size(body):
+        """Bytes a request body will send: its len(), or what is left of a seekable stream"""
+        if body is None:
+            return 0
+        try:
+            return len(body)
+        except TypeError:
+            pass
+        try:
+            position = body.tell()
+            end = body.seek(0, os.SEEK_END)
+            body.seek(position)
+            return end - position
+        except (AttributeError, OSError, ValueError):
+            return 0  # Streams of unknown length
+
+    def _after_call(self, http_response, parsed, context, **kwargs):
+        started = context.get('metrics')
+        if started:
+            received = parsed.get('ContentLength', 0) if 'Body' in parsed else 0
+            retries = parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            self.record(started, retries=retries, received=received)
+
+    def _after_call_error(self, exception, context, **kwargs):
+        started = context.get('metrics')
+        if started:
+            response = getattr(exception, 'response', None) or {}
+            code = response.get('Error', {}).get('Code') or type(exception).__name__
+            retries = response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            self.record(started, retries=retries, error=code)
+
+    def record(self, started, retries=0, received=0, error=None):
+        name, start, sent = started
+        duration = time.perf_counter() - start
+        self._in_flight.pop(threading.get_ident(), None)
+        with self._lock:
+            stats = self.operations.get(name)
+            if stats is None:
+                stats = self.operations[name] = OperationStats()
+            stats.calls += 1
+            stats.retries += retries or 0
+            stats.seconds += duration
+            stats.recent.append(duration)
+            stats.buckets[bisect.bisect_left(self.LATENCY_BUCKETS, duration)] += 1
+            if error:
+                stats.errors += 1
+                stats.error_codes[error] = stats.error_codes.get(error, 0) + 1
+            else:
+                stats.bytes_sent += sent
+                stats.bytes_received += received or 0
+
+    def snapshot(self):
+        """{operation: stats dict}, sorted by operation"""
+        with self._lock:
+            return {name: self.operations[name].as_dict() for name in sorted(self.operations)}
+
+    def to_json(self):
+        with self._lock:
+            started = self.started
+        return json.dumps({
+            'started': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'seconds': round(time.time() - started, 3),
+            'operations': self.snapshot(),
+        }, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus text exposition format"""
+        prefix = self.PREFIX
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+                lines.append(f"{prefix}_{name}{{{label_text}}} {value}")
+
+        with self._lock:
+            operations = sorted(self.operations.items())
+            metric('requests_total', 'counter', "S3 API calls by operation",
+                   [((('operation', op),), s.calls) for op, s in operations])
+            metric('errors_total', 'counter', "Failed S3 API calls by operation and error code",
+                   [((('operation', op), ('code', code)), count)
+                    for op, s in operations for code, count in sorted(s.error_codes.items())])
+            metric('retries_total', 'counter', "Retry attempts made by botocore",
+                   [((('operation', op),), s.retries) for op, s in operations])
+            metric('bytes_sent_total', 'counter', "Request body bytes sent",
+                   [((('operation', op),), s.bytes_sent) for op, s in operations])
+            metric('bytes_received_total', 'counter', "Response body bytes received",
+                   [((('operation', op),), s.bytes_received) for op, s in operations])
+
+            lines.append(f"# HELP {prefix}_request_duration_seconds S3 API call latency including retries")
+            lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+            for op, s in operations:
+                cumulative = 0
+                for bound, count in zip(self.LATENCY_BUCKETS + ('+Inf',), s.buckets):
+                    cumulative += count
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{operation="{op}",le="{bound}"}} '
+                                 f'{cumulative}')
+                lines.append(f'{prefix}_request_duration_seconds_sum{{operation="{op}"}} {s.seconds:.6f}')
+                lines.append(f'{prefix}_request_duration_seconds_count{{operation="{op}"}} {s.calls}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write JSON, or Prometheus text for .prom / .txt files"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+class UIUpdateQueue:
+    """Carries status text and dialogs from worker threads to the Tk loop
+
+    Tk is not thread-safe, so workers post here instead of touching widgets.
+    Status text is coalesced: however many workers post, only the latest
+    message is drawn, once per frame. Other calls (message boxes, refreshes)
+    run on the Tk thread in the order they were posted, one at a time: a
+    message box's nested event loop keeps drawing status but does not start
+    the next call, so dialogs don't stack. Transfer progress does not come
+    through here; the UI samples TransferProgress instead.
+    """
+
+    FRAME_MS = 50  # 20 frames per second
+
+    def __init__(self, root, on_status):
+        self.root = root
+        self.on_status = on_status
+        self.tk_thread = threading.get_ident()
+        self._lock = threading.Lock()
+        self._status = None
+        self._calls = deque()
+        self._running_call = False  # Set while a call runs, including its nested event loop
+
+    def on_tk_thread(self):
+        return threading.get_ident() == self.tk_thread
+
+    def start(self):
+        self.root.after(self.FRAME_MS, self._drain)
+
+    def status(self, message):
+        with self._lock:
+            self._status = message
+
+    def call(self, fn, *args, **kwargs):
+        self._calls.append((fn, args, kwargs))
+
+    def _drain(self):
+        # Reschedule first: a message box below runs a nested event loop
+        self.root.after(self.FRAME_MS, self._drain)
+        with self._lock:
+            status, self._status = self._status, None
+        if status is not None:
+            self.on_status(status)
+        if self._running_call:
+            return
+        self._running_call = True
+        try:
+            while self._calls:
+                fn, args, kwargs = self._calls.popleft()
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    self.on_status(f"UI update failed in {getattr(fn, '__name__', fn)}: {e}")
+        finally:
+            self._running_call = False
+
+
+class StallWatchdog:
+    """Detects Tk event-loop stalls and records what the main thread was doing
+
+    The event loop stamps a heartbeat every INTERVAL. A background thread
+    notices when the heartbeat is overdue by more than the threshold and
+    samples the main thread's stack until it comes back. Each stall is kept
+    with its duration, the app handler on the stack, the S3 call in progress
+    and the most frequent stacks, and is appended to stalls.jsonl so users
+    can send it in. Optional profiling runs cProfile on the main thread and
+    collects the sampled stacks in folded (flame graph) format.
+    """
+
+    INTERVAL = 0.1  # Heartbeat period
+    SAMPLE_INTERVAL = 0.02
+    MAX_STALLS = 100
+    TOP_STACKS = 3
+
+    def __init__(self, root, threshold=0.5, current_call=None, on_stall=None, log_path=None):
+        self.root = root
+        self.threshold = threshold
+        self.current_call = current_call  # thread id -> S3 operation in progress, e.g. S3Metrics.current_call
+        self.on_stall = on_stall  # Called on the Tk thread with each new stall record
+        self.log_path = log_path or os.path.join(APP_DATA_DIR, "stalls.jsonl")
+        self.stalls = deque(maxlen=self.MAX_STALLS)
+        self.main_thread_id = threading.get_ident()
+        self.profiler = None
+        self.folded = None  # Counter of sampled stacks while profiling
+        self._beat = time.monotonic()
+        self._new = deque()
+        self._stop = threading.Event()
+
+    def start(self):
+        self.root.after(int(self.INTERVAL * 1000), self._heartbeat)
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat(self):
+        self._beat = time.monotonic()
+        while self._new:
+            record = self._new.popleft()
+            if self.on_stall:
+                self.on_stall(record)
+        if not self._stop.is_set():
+            self.root.after(int(self.INTERVAL * 1000), self._heartbeat)
+
+    def _watch(self):
+        samples = calls = None
+        stalled_since = 0.0
+        while not self._stop.wait(self.SAMPLE_INTERVAL):
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame is None:
+                continue
+            beat = self._beat
+            overdue = time.monotonic() - beat - self.INTERVAL
+            profiling = self.folded is not None
+
+            if overdue > self.threshold or profiling:
+                stack = self._stack(frame)
+                if profiling:
+                    self.folded[";".join(f"{name} ({os.path.basename(path)})" for path, name, _ in stack)] += 1
+            if overdue > self.threshold:
+                if samples is None:
+                    samples, calls, stalled_since = Counter(), Counter(), beat
+                samples[stack] += 1
+                call = self.current_call(self.main_thread_id) if self.current_call else None
+                if call:
+                    calls[call] += 1
+            elif samples is not None and beat != stalled_since:
+                self._record(beat - stalled_since - self.INTERVAL, samples, calls)
+                samples = calls = None
+
+    @staticmethod
+    def _stack(frame):
+        """(filename, function, line) tuples from the outermost frame in, without reading source lines"""
+        stack = traceback.StackSummary.extract(traceback.walk_stack(frame), lookup_lines=False)
+        return tuple((f.filename, f.name, f.lineno) for f in reversed(stack))
+
+    @staticmethod
+    def _handler(stack):
+        """App functions below the innermost Tk callback, e.g. 'on_bucket_change → refresh_s3_files'"""
+        this_file = os.path.abspath(__file__)
+        start = 0
+        for index, (path, _, _) in enumerate(stack):
+            if os.path.basename(os.path.dirname(path)) == 'tkinter':
+                start = index + 1
+        names = [name for path, name, _ in stack[start:] if os.path.abspath(path) == this_file]
+        names = names or [name for _, name, _ in stack[start:][-3:]]  # e.g. a stall inside a library callback
+        return " → ".join(names)
+
+    def _record(self, duration, samples, calls):
+        top = samples.most_common(self.TOP_STACKS)
+        record = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration': round(duration, 3),
+            'handler': self._handler(top[0][0]),
+            's3_call': calls.most_common(1)[0][0] if calls else None,
+            'samples': sum(samples.values()),
+            'stacks': [{'count': count,
+                        'frames': [f"{name} ({os.path.basename(path)}:{line})" for path, name, line in stack]}
+                       for stack, count in top],
+        }
+        self.stalls.append(record)
+        self._new.append(record)
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
+    def start_profiling(self):
+        """Profile the Tk thread with cProfile and sample its stacks; call from the Tk thread"""
+        if self.profiler is None:
+            self.folded = Counter()
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profiling(self, directory=None):
+        """Stop profiling and save <name>.prof (pstats / snakeviz) and <name>.folded (flamegraph.pl / speedscope)"""
+        if self.profiler is None:
+            return None
+        profiler, folded = self.profiler, self.folded
+        profiler.disable()
+        self.profiler = self.folded = None
+
+        directory = directory or os.path.join(APP_DATA_DIR, "profiles")
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"session-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        profiler.dump_stats(base + ".prof")
+        with open(base + ".folded", 'w') as f:
+            for stack, count in folded.most_common():
+                f.write(f"{stack} {count}\n")
+        return base
+
+
+class AdaptiveConcurrency:
+    """Concurrency limit that follows measured throughput and backs off when S3 throttles
+
+    Additive increase / multiplicative decrease. After each measuring
+    window the limit goes up by one if the previous raise paid off in
+    throughput (bytes or requests per second) and is handed back if it did
+    not, or if latency climbs with no gain. A throttling response halves
+    the limit, at most once per cooldown, and new work then waits a
+    jittered, growing backoff so retries do not arrive in lockstep.
+    """
+
+    WINDOW_SECONDS = 2.0
+    GAIN = 1.05  # A raise sticks only if throughput improved by this factor
+    HOLD_WINDOWS = 3  # Windows to stay put after a raise did not pay off
+    COOLDOWN = 2.0  # Seconds between multiplicative decreases
+    BACKOFF_BASE = 0.1
+    BACKOFF_CAP = 5.0
+
+    def __init__(self, initial=8, minimum=1, maximum=64):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.enabled = True
+        self.throttles = 0
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self.reset(initial)
+
+    def reset(self, initial):
+        """Start over from a given limit, forgetting measurements and backoff"""
+        with self._cond:
+            self.limit = min(self.maximum, max(self.minimum, int(initial)))
+            self.peak = self.limit
+            self._previous = None  # (limit, units/s, requests/s, latency) of the last window
+            self._hold = 0
+            self._streak = 0
+            self._throttled_at = time.monotonic() - self.COOLDOWN
+            self._start_window(time.monotonic())
+            self._cond.notify_all()
+
+    def _start_window(self, now):
+        self._window_start = now
+        self._units = 0
+        self._count = 0
+        self._latency = 0.0
+
+    def _set_limit(self, limit):
+        self.limit = min(self.maximum, max(self.minimum, limit))
+        self.peak = max(self.peak, self.limit)
+        self._cond.notify_all()
+
+    def record(self, units, latency):
+        """Report one finished request: work done (bytes, keys...) and how long it took"""
+        with self._cond:
+            self._units += units
+            self._count += 1
+            self._latency += latency
+
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.WINDOW_SECONDS or self._count < self.limit:
+                return
+            current = (self.limit, self._units / elapsed, self._count / elapsed, self._latency / self._count)
+            self._start_window(now)
+            if not self.enabled or now - self._throttled_at < self.COOLDOWN:
+                return
+
+            self._streak = 0  # A full window without throttling
+            previous, self._previous = self._previous, current
+            if self._hold:
+                self._hold -= 1
+                return
+
+            gained = previous and (current[1] >= previous[1] * self.GAIN or current[2] >= previous[2] * self.GAIN)
+            if previous is None or previous[0] > current[0]:
+                self._set_limit(self.limit + 1)
+            elif previous[0] == current[0]:
+                if current[3] > previous[3] * 1.5 and not gained:
+                    self._set_limit(self.limit - 1)  # Queueing somewhere: latency up, throughput flat
+                else:
+                    self._set_limit(self.limit + 1)
+            elif gained:
+                self._set_limit(self.limit + 1)
+            else:
+                self._set_limit(previous[0])
+                self._hold = self.HOLD_WINDOWS
+
+    def on_throttle(self):
+        """S3 returned SlowDown / 503: halve the limit and back off new work"""
+        with self._cond:
+            self.throttles += 1
+            if not self.enabled:
+                return
+            self._streak += 1
+            now = time.monotonic()
+            if now - self._throttled_at >= self.COOLDOWN:
+                self._set_limit(self.limit // 2)
+                self._throttled_at = now
+                self._previous = None
+                self._start_window(now)
+
+    def backoff_delay(self):
+        """Seconds to wait before starting new work; full jitter over an exponential ceiling"""
+        with self._cond:
+            if not self.enabled or not self._streak:
+                return 0.0
+            ceiling = min(self.BACKOFF_CAP, self.BACKOFF_BASE * 2 ** min(self._streak, 16))
+        return random.uniform(0, ceiling)
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the limit's slots, waiting while all are taken"""
+        with self._cond:
+            while self._in_use >= self.limit:
+                self._cond.wait()
+            self._in_use += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+
+
+class TransferInterrupted(Exception):
+    """Raised inside a running transfer that was paused or cancelled from the queue"""
+
+
+class TransferPaused(TransferInterrupted):
+    pass
+
+
+class TransferCancelled(TransferInterrupted):
+    pass
+
+
+class TransferControl:
+    """Pause / cancel request that a running transfer checks between chunks and parts"""
+
+    def __init__(self):
+        self.request = None  # None, 'pause' or 'cancel'
+        self.progress = None  # FileProgress of the running attempt, for the transfers panel
+
+    def check(self):
+        if self.request == 'cancel':
+            raise TransferCancelled("Cancelled")
+        if self.request == 'pause':
+            raise TransferPaused("Paused")
+
+
+class TransferBatch:
+    """Jobs submitted together by one action, reported back in job order"""
+
+    def __init__(self, batch_id, kind, worker, jobs, on_result, priority):
+        self.id = batch_id
+        self.kind = kind  # 'upload' or 'download'
+        self.worker = worker
+        self.jobs = jobs
+        self.next_job = 0  # Jobs before this index have been queued as items
+        self.on_result = on_result
+        self.priority = priority
+        self.results = [None] * len(jobs)
+        self.next_report = 0
+        self.active = 0
+        self.waiting = 0  # Queued, paused or active items
+        self.error = None
+        self.done = threading.Event()
+        self.report_lock = threading.Lock()
+
+    def failed_result(self, job, error):
+        # Upload jobs are (bucket, local_path, key), downloads (bucket, key, local_path, ...)
+        if self.kind == 'upload':
+            return TransferResult(job[1], job[2], error=error)
+        return TransferResult(job[2], job[1], error=error)
+
+
+class TransferItem:
+    """One file in the transfer queue"""
+
+    def __init__(self, item_id, batch, index):
+        self.id = item_id
+        self.batch = batch
+        self.index = index
+        self.job = batch.jobs[index]
+        self.priority = batch.priority
+        self.state = TransferQueue.QUEUED
+        self.control = TransferControl()
+        self.error = None
+        self.retries = 0
+
+    @property
+    def key(self):
+        return self.job[2] if self.batch.kind == 'upload' else self.job[1]
+
+
+class TransferQueue:
+    """Priority scheduler sharing one concurrency budget between all transfer batches
+
+    Batches are turned into queue items a few at a time, so a million-file
+    upload does not hold a million entries. The next item to start is the
+    highest priority one, preferring the batch with the fewest transfers
+    running, so at equal priority a small download is not stuck behind a
+    huge upload. Pausing or cancelling a running item takes effect at its
+    next chunk or part; a paused transfer restarts from its multipart
+    journal or .part file.
+    """
+
+    QUEUED, ACTIVE, PAUSED = 'Queued', 'Active', 'Paused'
+    DONE, FAILED, CANCELLED = 'Done', 'Failed', 'Cancelled'
+    WINDOW = 4  # Items queued ahead per batch, per concurrency slot
+    HISTORY = 200  # Finished items kept for the transfers panel
+    THROTTLE_RETRIES = 3  # Times an item that failed with SlowDown goes back in the queue
+
+    def __init__(self, max_active=8, controller=None):
+        self.max_active = max(1, int(max_active))
+        self.controller = controller  # AdaptiveConcurrency that overrides max_active while enabled
+        self.active = 0
+        self.held = False  # Pause All: start nothing until resumed
+        self.history = deque(maxlen=self.HISTORY)
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # id -> unfinished TransferItem, in queue order
+        self._batches = []
+        self._ids = itertools.count(1)
+
+    def run_batch(self, kind, worker, jobs, on_result=None, priority=0):
+        """Queue jobs for worker(*job, control=...) and block until every one has finished
+
+        Returns the TransferResults in job order; on_result(index, result)
+        is called in job order as results become available.
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return []
+
+        batch = TransferBatch(next(self._ids), kind, worker, jobs, on_result, priority)
+        with self._lock:
+            self._batches.append(batch)
+            self._refill(batch)
+        self._dispatch()
+
+        batch.done.wait()
+        if batch.error:
+            raise batch.error
+        return batch.results
+
+    @property
+    def limit(self):
+        """Transfers allowed to run at once right now"""
+        if self.controller is not None and self.controller.enabled:
+            return self.controller.limit
+        return self.max_active
+
+    def set_max_active(self, max_active):
+        with self._lock:
+            self.max_active = max(1, int(max_active))
+        self._dispatch()
+
+    def pause(self, item_ids):
+        with self._lock:
+            for item in self._find(item_ids):
+                if item.state == self.QUEUED:
+                    item.state = self.PAUSED
+                elif item.state == self.ACTIVE:
+                    item.control.request = 'pause'
+
+    def resume(self, item_ids):
+        with self._lock:
+            for item in self._find(item_ids):
+                if item.state == self.PAUSED:
+                    item.state = self.QUEUED
+                    item.control.request = None
+                elif item.state == self.ACTIVE and item.control.request == 'pause':
+                    item.control.request = None
+        self._dispatch()
+
+    def pause_all(self):
+        with self._lock:
+            self.held = True
+            item_ids = list(self._items)
+        self.pause(item_ids)
+
+    def resume_all(self):
+        with self._lock:
+            self.held = False
+            item_ids = list(self._items)
+        self.resume(item_ids)
+
+    def cancel(self, item_ids, whole_batch=False):
+        """Cancel items; with whole_batch, also every job of their batches not yet queued"""
+        finished = set()
+        with self._lock:
+            items = self._find(item_ids)
+            if whole_batch:
+                batches = {item.batch for item in items}
+                for batch in batches:
+                    for index in range(batch.next_job, len(batch.jobs)):
+                        batch.results[index] = batch.failed_result(batch.jobs[index], "Cancelled")
+                    batch.next_job = len(batch.jobs)
+                items = [item for item in self._items.values() if item.batch in batches]
+
+            for item in items:
+                if item.state in (self.QUEUED, self.PAUSED):
+                    self._finish(item, item.batch.failed_result(item.job, "Cancelled"), self.CANCELLED)
+                    finished.add(item.batch)
+                elif item.state == self.ACTIVE:
+                    item.control.request = 'cancel'
+            if whole_batch:
+                finished.update(batches)
+
+        for batch in finished:
+            self._report(batch)
+        self._dispatch()
+
+    def set_priority(self, item_ids, delta):
+        """Raise or lower priority for items and the not yet queued rest of their batches"""
+        with self._lock:
+            items = self._find(item_ids)
+            for item in items:
+                item.priority += delta
+            for batch in {item.batch for item in items}:
+                batch.priority += delta
+        self._dispatch()
+
+    def snapshot(self):
+        """(unfinished items, finished history newest first, jobs not yet queued) for display"""
+        with self._lock:
+            items = sorted(self._items.values(),
+                           key=lambda i: (i.state != self.ACTIVE, -i.priority, i.id))
+            unqueued = sum(len(b.jobs) - b.next_job for b in self._batches)
+            return items, list(reversed(self.history)), unqueued
+
+    def _find(self, item_ids):
+        return [self._items[i] for i in item_ids if i in self._items]
+
+    def _refill(self, batch):
+        """Queue more of a batch's jobs as items; caller holds the lock"""
+        limit = self.WINDOW * self.limit
+        while batch.waiting < limit and batch.next_job < len(batch.jobs):
+            item = TransferItem(next(self._ids), batch, batch.next_job)
+            self._items[item.id] = item
+            batch.next_job += 1
+            batch.waiting += 1
+
+    def _dispatch(self):
+        """Start queued items while the concurrency budget allows"""
+        started = []
+        with self._lock:
+            while self.active < self.limit and not self.held:
+                queued = [i for i in self._items.values() if i.state == self.QUEUED]
+                if not queued:
+                    break
+                item = min(queued, key=lambda i: (-i.priority, i.batch.active, i.id))
+                item.state = self.ACTIVE
+                item.batch.active += 1
+                self.active += 1
+                started.append(item)
+
+        for item in started:
+            threading.Thread(target=self._run_item, args=(item,), daemon=True).start()
+
+    def _run_item(self, item):
+        batch = item.batch
+        controller = self.controller if self.controller is not None and self.controller.enabled else None
+        if controller:
+            time.sleep(controller.backoff_delay())
+
+        state = None
+        started = time.monotonic()
+        try:
+            result = batch.worker(*item.job, control=item.control)
+        except TransferPaused:
+            result = None
+        except TransferCancelled:
+            result, state = batch.failed_result(item.job, "Cancelled"), self.CANCELLED
+        except Exception as e:
+            result = batch.failed_result(item.job, str(e))
+
+        throttled = result is not None and state is None and not result.ok and is_throttle_error(result.error)
+        if controller and result is not None:
+            if result.ok:
+                controller.record(result.size, time.monotonic() - started)
+            elif throttled:
+                controller.on_throttle()
+
+        with self._lock:
+            batch.active -= 1
+            self.active -= 1
+            if throttled and item.retries < self.THROTTLE_RETRIES:
+                # Try again after the backoff rather than failing the file
+                item.retries += 1
+                item.state = self.QUEUED
+                result = None
+            elif result is None:
+                # Resumed again before the pause landed: back in the queue
+                item.state = self.PAUSED if item.control.request == 'pause' else self.QUEUED
+                item.control.request = None
+            else:
+                self._finish(item, result, state)
+
+        if result is not None:
+            self._report(batch)
+        self._dispatch()
+
+    def _finish(self, item, result, state=None):
+        """Record a finished item; caller holds the lock"""
+        item.state = state or (self.DONE if result.ok else self.FAILED)
+        item.error = result.error
+        del self._items[item.id]
+        self.history.append(item)
+
+        batch = item.batch
+        batch.results[item.index] = result
+        batch.waiting -= 1
+        self._refill(batch)
+
+    def _report(self, batch):
+        """Hand finished results to the batch in job order and release it when complete"""
+        with batch.report_lock:
+            while batch.next_report < len(batch.results) and batch.results[batch.next_report] is not None:
+                if batch.on_result and not batch.error:
+                    try:
+                        batch.on_result(batch.next_report, batch.results[batch.next_report])
+                    except Exception as e:
+                        batch.error = e
+                batch.next_report += 1
+
+            if batch.next_report == len(batch.results) and not batch.done.is_set():
+                with self._lock:
+                    self._batches.remove(batch)
+                batch.done.set()
+
+
+class BandwidthLimiter:
+    """Token bucket shared by every transfer thread going in one direction
+
+    A thread that finds the bucket empty takes its bytes on credit and
+    sleeps exactly until they would have been refilled, so concurrent
+    threads line up behind each other instead of all waking at once,
+    overshooting and backing off again. The cap and the optional daily
+    window can be changed while transfers are running.
+    """
+
+    BURST_SECONDS = 0.25  # Idle time that may be made up in a burst
+
+    def __init__(self, rate=0, hours=None):
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self.rate = 0
+        self.hours = None
+        self.configure(rate, hours)
+
+    def configure(self, rate, hours=None):
+        """Set the cap in bytes/second (0 = unlimited) and an optional (start, end) minute-of-day window"""
+        with self._lock:
+            self.rate = max(0, int(rate))
+            self.hours = hours
+
+    def current_rate(self):
+        """Cap in force right now, 0 when unlimited or outside the window"""
+        if not self.rate or not self.hours:
+            return self.rate
+        start, end = self.hours
+        now = datetime.now()
+        minute = now.hour * 60 + now.minute
+        inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+        return self.rate if inside else 0
+
+    def consume(self, amount):
+        """Block until amount bytes fit under the cap"""
+        rate = self.current_rate()
+        if not rate or amount <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate * self.BURST_SECONDS, self._tokens + (now - self._stamp) * rate)
+            self._stamp = now
+            self._tokens -= amount
+            delay = -self._tokens / rate
+        if delay > 0:
+            time.sleep(delay)
+
+
+class UploadReader:
+    """Upload body that checks pause/cancel and draws on the upload cap before data is sent
+
+    botocore reads the body while sending it, so checking and throttling
+    here holds data back instead of reacting after a chunk went out. Bytes
+    are counted once per position: a rewind (retry, checksum pass) takes
+    them off the progress again and they are throttled again when resent.
+    """
+
+    def __init__(self, f, control=None, limiter=None, on_bytes=None):
+        self._f = f
+        self._control = control
+        self._limiter = limiter
+        self._on_bytes = on_bytes
+        self._counted = 0  # File position up to which bytes were counted
+        self._transferring = True
+
+    def signal_transferring(self):
+        self._transferring = True
+
+    def signal_not_transferring(self):
+        self._transferring = False
+
+    def read(self, size=-1):
+        if not self._transferring:
+            return self._f.read(size)
+        if self._control:
+            self._control.check()
+        data = self._f.read(size)
+        new = self._f.tell() - self._counted
+        if new > 0:
+            if self._limiter:
+                self._limiter.consume(new)
+            if self._on_bytes:
+                self._on_bytes(new)
+            self._counted += new
+        return data
+
+    def seek(self, offset, whence=0):
+        position = self._f.seek(offset, whence)
+        if position < self._counted:
+            if self._on_bytes:
+                self._on_bytes(position - self._counted)
+            self._counted = position
+        return position
+
+    def tell(self):
+        return self._f.tell()
+
+    def __len__(self):
+        """Bytes left to send, as botocore and S3Metrics size request bodies with len()"""
+        return os.fstat(self._f.fileno()).st_size - self._f.tell()
+
+
+def parse_hours(text):
+    """Parse '09:00-18:00' or '9-18' into a (start, end) minute-of-day window; blank means all day"""
+    text = text.strip()
+    if not text:
+        return None
+
+    def minutes(part):
+        hour, _, minute = part.strip().partition(':')
+        value = int(hour) * 60 + int(minute or 0)
+        if not 0 <= value <= 24 * 60:
+            raise ValueError(f"Invalid time: {part}")
+        return value
+
+    start, sep, end = text.partition('-')
+    if not sep:
+        raise ValueError("Expected a range like 09:00-18:00")
+    return minutes(start), minutes(end)
+
+
+class FileProgress:
+    """Bytes moved so far by one attempt at transferring a file"""
+
+    def __init__(self, name, size, planned=0):
+        self.name = name
+        self.size = size
+        self.planned = planned  # Bytes of this file its batch already counted in the total
+        self.done = 0
+        self.started = time.monotonic()
+
+    @property
+    def percent(self):
+        return min(100.0, 100.0 * self.done / self.size) if self.size else 100.0
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return max(0, self.done) / elapsed if elapsed > 0 else 0.0
+
+
+class TransferProgress:
+    """Byte-level progress across every transfer in flight
+
+    Batches add the sizes they know about up front, and running files add
+    bytes as each chunk or part moves. The counters sit behind one lock held
+    for a couple of additions; the UI samples them on its own schedule
+    rather than being told about every chunk. An attempt that does not
+    complete (paused, throttled or failed) takes its bytes back out, so a
+    retried file is never counted twice. When the last batch ends the next
+    one starts a fresh run.
+    """
+
+    RATE_WINDOW = 5.0  # Seconds of samples behind the current throughput
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.total = 0
+        self.done = 0
+        self.started = None
+        self.files = {}  # id -> FileProgress for attempts in flight
+        self._samples = deque()
+
+    def add_batch(self, planned_bytes):
+        with self._lock:
+            if self.batches == 0:
+                self.total = self.done = 0
+                self.started = time.monotonic()
+                self._samples.clear()
+            self.batches += 1
+            self.total += planned_bytes
+
+    def end_batch(self, unfinished_bytes):
+        """A batch is over; unfinished_bytes of what it planned will never arrive"""
+        with self._lock:
+            self.batches -= 1
+            self.total -= unfinished_bytes
+
+    def begin(self, name, size, planned=0):
+        progress = FileProgress(name, size, planned)
+        with self._lock:
+            self.total += size - planned
+            self.files[id(progress)] = progress
+        return progress
+
+    def advance(self, progress, nbytes):
+        with self._lock:
+            progress.done += nbytes
+            self.done += nbytes
+
+    def end(self, progress, ok):
+        with self._lock:
+            self.files.pop(id(progress), None)
+            if ok:
+                # Callbacks can under-report (e.g. resumed parts); the file is complete
+                self.done += progress.size - progress.done
+                progress.done = progress.size
+            else:
+                self.done -= progress.done
+                self.total -= progress.size - progress.planned
+
+    def sample(self):
+        """Totals with current (last RATE_WINDOW seconds) and average throughput and an ETA in seconds"""
+        now = time.monotonic()
+        with self._lock:
+            done, total = self.done, self.total
+            self._samples.append((now, done))
+            while len(self._samples) > 2 and self._samples[1][0] < now - self.RATE_WINDOW:
+                self._samples.popleft()
+            then, done_then = self._samples[0]
+            active = self.batches > 0
+            files = len(self.files)
+            started = self.started
+
+        rate = max(0.0, (done - done_then) / (now - then)) if now > then else 0.0
+        average = done / (now - started) if started and now > started else 0.0
+        speed = rate or average
+        return {
+            'active': active,
+            'files': files,
+            'done': done,
+            'total': total,
+            'percent': min(100.0, 100.0 * done / total) if total > 0 else 0.0,
+            'rate': rate,
+            'average': average,
+            'eta': max(0, total - done) / speed if active and speed > 0 else None,
+        }
+
+
+class S3TransferEngine:
+    """Bounded worker-pool engine for bulk S3 transfers"""
+
+    MAX_PARTS = 10000  # S3 limit per multipart upload
+    DOWNLOAD_ATTEMPTS = 3  # Tries per stream / range before a download is left to resume later
+
+    def __init__(self, s3_client, max_concurrency=8, part_concurrency=4,
+                 multipart_threshold=8 * MB, part_size=8 * MB, journal=None, scheduler=None, priority=0,
+                 upload_limiter=None, download_limiter=None, progress=None):
+        self.s3_client = s3_client
+        self.progress = progress  # Shared TransferProgress, or None to skip byte counting
+        self._batch = threading.local()  # .planned: local_path -> size its upload batch counted
+        self.upload_limiter = upload_limiter  # Shared BandwidthLimiters, or None for no cap
+        self.download_limiter = download_limiter
+        self.journal = journal  # MultipartJournal enables resumable multipart uploads
+        self.scheduler = scheduler  # TransferQueue shared with other batches, or None for a private pool
+        self.priority = priority
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.part_concurrency = max(1, int(part_concurrency))
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(5 * MB, int(part_size))
+        if hasattr(s3_client, 'meta'):
+            register_upload_hooks(s3_client)
+
+        # Parts in flight per file are handled by boto3's transfer manager
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=self.part_size,
+            max_concurrency=self.part_concurrency,
+            use_threads=self.part_concurrency > 1
+        )
+
+    def upload_files(self, jobs, on_result=None):
+        """Upload (bucket, local_path, s3_key) jobs and return results in job order
+
+        on_result(index, result) is called in job order as soon as every
+        earlier job has finished, so callers can report completion without
+        reordering. A failing file is recorded and does not stop the batch.
+        """
+        return self._run('upload', jobs, self._upload_one, on_result)
+
+    def _upload_one(self, bucket, local_path, s3_key, control=None):
+        """Upload one file, capturing any error in the result"""
+        progress = result = None
+        try:
+            if control:
+                control.check()
+            size = os.path.getsize(local_path)
+            progress = self._track(s3_key, size, getattr(self._batch, 'planned', {}).get(local_path, 0), control)
+
+            # Get file content type
+            content_type, _ = mimetypes.guess_type(local_path)
+            if not content_type:
+                content_type = 'binary/octet-stream'
+
+            if self.journal is not None and size > self.multipart_threshold:
+                etag = self._upload_resumable(bucket, local_path, s3_key, size, content_type, control, progress)
+                result = TransferResult(local_path, s3_key, size, etag=etag)
+            elif size <= self.multipart_threshold:
+                with open(local_path, 'rb') as f:
+                    body = UploadReader(f, control, self.upload_limiter, lambda n: self._advance(progress, n))
+                    response = self.s3_client.put_object(Bucket=bucket, Key=s3_key, Body=body,
+                                                         ContentType=content_type)
+                result = TransferResult(local_path, s3_key, size, etag=response.get('ETag', '').strip('"'))
+            else:
+                self.s3_client.upload_file(
+                    local_path, bucket, s3_key,
+                    ExtraArgs={'ContentType': content_type},
+                    Config=self.transfer_config,
+                    Callback=self._upload_callback(control, progress)
+                )
+                result = TransferResult(local_path, s3_key, size)
+        except TransferInterrupted:
+            raise
+        except Exception as e:
+            result = TransferResult(local_path, s3_key, error=str(e))
+        finally:
+            self._untrack(progress, result is not None and result.ok)
+        return result
+
+    def _upload_callback(self, control, progress=None):
+        """boto3 progress callback that enforces pause/cancel and the upload cap as bytes are sent"""
+        if control is None and self.upload_limiter is None and progress is None:
+            return None
+
+        def callback(bytes_sent):
+            if control:
+                control.check()
+            if self.upload_limiter:
+                self.upload_limiter.consume(bytes_sent)
+            if progress:
+                self.progress.advance(progress, bytes_sent)
+        return callback
+
+    def _track(self, name, size, planned, control=None):
+        """Start counting bytes for one transfer attempt; None when the engine has no progress"""
+        if self.progress is None:
+            return None
+        progress = self.progress.begin(name, size, planned)
+        if control:
+            control.progress = progress
+        return progress
+
+    def _untrack(self, progress, ok):
+        if progress is not None:
+            self.progress.end(progress, ok)
+
+    def _advance(self, progress, nbytes):
+        if progress is not None:
+            self.progress.advance(progress, nbytes)
+
+    def _upload_resumable(self, bucket, local_path, s3_key, size, content_type, control=None, progress=None):
+        """Multipart upload that journals each part and resumes a previous attempt"""
+        mtime = os.stat(local_path).st_mtime
+        entry = self.journal.load(bucket, s3_key, local_path)
+
+        if entry and (entry['size'], entry['mtime']) != (size, mtime):
+            # The file changed since the interrupted attempt; its parts are useless
+            self._abort_quietly(bucket, s3_key, entry['upload_id'])
+            entry = None
+
+        if entry:
+            try:
+                # S3 is authoritative for which parts actually landed
+                entry['parts'] = self._uploaded_parts(bucket, s3_key, entry['upload_id'])
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+                    raise
+                entry = None
+
+        if not entry:
+            part_size = max(self.part_size, -(-size // self.MAX_PARTS))
+            response = self.s3_client.create_multipart_upload(Bucket=bucket, Key=s3_key,
+                                                              ContentType=content_type)
+            entry = {
+                'bucket': bucket, 'key': s3_key, 'local_path': os.path.abspath(local_path),
+                'size': size, 'mtime': mtime, 'part_size': part_size,
+                'upload_id': response['UploadId'], 'initiated': time.time(), 'parts': {}
+            }
+            self.journal.save(entry)
+
+        part_size = entry['part_size']
+        part_count = max(1, -(-size // part_size))
+        remaining = [n for n in range(1, part_count + 1) if str(n) not in entry['parts']]
+        lock = threading.Lock()
+        self._advance(progress, size - sum(min(part_size, size - (n - 1) * part_size) for n in remaining))
+
+        def upload_part(part_number):
+            if control:
+                control.check()
+            with open(local_path, 'rb') as f:
+                f.seek((part_number - 1) * part_size)
+                data = self._read_part(f, part_size)
+            response = self.s3_client.upload_part(Bucket=bucket, Key=s3_key, UploadId=entry['upload_id'],
+                                                  PartNumber=part_number, Body=data)
+            self._advance(progress, len(data))
+            with lock:
+                entry['parts'][str(part_number)] = response['ETag']
+                self.journal.save(entry)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.part_concurrency) as pool:
+                for future in [pool.submit(upload_part, n) for n in remaining]:
+                    future.result()
+        except TransferCancelled:
+            # A paused upload keeps its parts for later; a cancelled one discards them
+            self._abort_quietly(bucket, s3_key, entry['upload_id'])
+            self.journal.remove(bucket, s3_key, local_path)
+            raise
+
+        parts = [{'PartNumber': int(n), 'ETag': etag}
+                 for n, etag in sorted(entry['parts'].items(), key=lambda p: int(p[0]))]
+        response = self.s3_client.complete_multipart_upload(
+            Bucket=bucket, Key=s3_key, UploadId=entry['upload_id'],
+            MultipartUpload={'Parts': parts}
+        )
+        self.journal.remove(bucket, s3_key, local_path)
+        return response.get('ETag', '').strip('"')
+
+    def _read_part(self, f, part_size):
+        """Read one part, drawing on the upload cap a chunk at a time so parts share it smoothly"""
+        if self.upload_limiter is None:
+            return f.read(part_size)
+        chunks = []
+        remaining = part_size
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.upload_limiter.consume(len(chunk))
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def _uploaded_parts(self, bucket, s3_key, upload_id):
+        paginator = self.s3_client.get_paginator('list_parts')
+        parts = {}
+        for page in paginator.paginate(Bucket=bucket, Key=s3_key, UploadId=upload_id):
+            for part in page.get('Parts', []):
+                parts[str(part['PartNumber'])] = part['ETag']
+        return parts
+
+    def _abort_quietly(self, bucket, s3_key, upload_id):
+        try:
+            self.s3_client.abort_multipart_upload(Bucket=bucket, Key=s3_key, UploadId=upload_id)
+        except Exception:
+            pass
+
+    def sync_upload(self, jobs, manifest, remote=None, on_plan=None, on_result=None):
+        """Upload only the (bucket, local_path, s3_key) jobs the manifest says changed
+
+        remote optionally maps s3_key -> ETag from a listing of the
+        destination, so objects changed or removed on S3 are re-sent too.
+        Returns (plan, results) where plan is the list of SyncItems uploaded;
+        files that could not be read are in the plan with a failed result.
+        """
+        plan = manifest.plan(jobs, remote)
+        if on_plan:
+            on_plan(plan)
+
+        items = {item.job: item for item in plan}
+
+        def sync_one(bucket, local_path, s3_key, control=None):
+            # Hash and record in the upload workers so the first upload starts
+            # right away and a failing file only fails itself
+            item = items[(bucket, local_path, s3_key)]
+            if item.error is not None:
+                return TransferResult(local_path, s3_key, error=item.error)
+            if item.md5 is None:
+                try:
+                    item.md5 = file_md5(local_path)
+                except OSError as e:
+                    return TransferResult(local_path, s3_key, error=str(e))
+            result = self._upload_one(bucket, local_path, s3_key, control)
+            if result.ok:
+                manifest.record(item, self._uploaded_etag(item, result))
+            return result
+
+        results = self._run('upload', [item.job for item in plan], sync_one, on_result)
+        return plan, results
+
+    def _uploaded_etag(self, item, result):
+        """ETag of a just-uploaded object; single-part uploads use the content MD5"""
+        if result.etag:
+            return result.etag
+        if result.size <= self.multipart_threshold:
+            return item.md5
+        try:
+            bucket, _, s3_key = item.job
+            return self.s3_client.head_object(Bucket=bucket, Key=s3_key)['ETag'].strip('"')
+        except Exception:
+            return ''
+
+    def download_files(self, jobs, on_result=None):
+        """Download (bucket, s3_key, local_path[, size, mtime, etag]) jobs in job order
+
+        Objects above the multipart threshold are split into byte-range GETs
+        that are fetched in parallel and written straight into a preallocated
+        local file. When a job already carries size and ETag from a listing,
+        no HEAD request is made; a given mtime is applied to the local file.
+        """
+        return self._run('download', jobs, self._download_one, on_result)
+
+    def mirror_prefix(self, bucket, prefix, local_dir, pages, on_plan=None, on_result=None):
+        """Download everything under prefix into local_dir, skipping up-to-date files
+
+        pages is an iterable of recursive listing pages for prefix. A local
+        file is up to date when its size matches and its mtime equals the
+        object's LastModified (which this method stamps on every download).
+        Returns (jobs, results, skipped) for the objects that were fetched.
+        """
+        root = os.path.abspath(local_dir)
+        jobs = []
+        rejected = []
+        skipped = 0
+
+        for page in pages:
+            for obj in page.get('Contents', []):
+                relative = obj['Key'][len(prefix):]
+                if not relative or relative.endswith('/'):
+                    continue  # Folder markers
+
+                local_path = os.path.abspath(os.path.join(root, *relative.split('/')))
+                try:
+                    inside = os.path.commonpath([root, local_path]) == root
+                except ValueError:
+                    inside = False  # On another drive, e.g. a key holding 'C:' on Windows
+                if not inside:
+                    rejected.append(TransferResult(relative, obj['Key'], error="Key escapes the destination folder"))
+                    continue
+
+                mtime = obj['LastModified'].timestamp()
+                if self._is_current(local_path, obj['Size'], mtime):
+                    skipped += 1
+                    continue
+                jobs.append((bucket, obj['Key'], local_path, obj['Size'], mtime, obj.get('ETag')))
+
+        if on_plan:
+            on_plan(jobs, skipped)
+        return jobs, self.download_files(jobs, on_result) + rejected, skipped
+
+    @staticmethod
+    def _is_current(local_path, size, mtime):
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return False
+        return stat.st_size == size and int(stat.st_mtime) == int(mtime)
+
+    def _download_one(self, bucket, s3_key, local_path, size=None, mtime=None, etag=None, control=None):
+        """Download one object via a resumable .part file, capturing any error in the result"""
+        progress = result = None
+        planned = size or 0
+        try:
+            if control:
+                control.check()
+            head = None
+            if size is None or etag is None:
+                head = self.s3_client.head_object(Bucket=bucket, Key=s3_key)
+                size = head['ContentLength']
+                etag = head.get('ETag')
+
+            parent = os.path.dirname(local_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+
+            partial = local_path + PARTIAL_SUFFIX
+            progress = self._track(s3_key, size, planned, control)
+            if size <= self.multipart_threshold or self.part_concurrency == 1:
+                encryption = self._download_stream(bucket, s3_key, partial, size, etag, control, progress)
+            else:
+                encryption = self._download_ranges(bucket, s3_key, partial, size, etag, control, progress)
+
+            # Listing-started downloads learn the encryption headers from their GETs instead
+            if head is not None:
+                encryption = head
+            elif encryption is None and self._etag_is_md5(etag, {}):
+                encryption = self.s3_client.head_object(Bucket=bucket, Key=s3_key)
+            self._verify_download(partial, size, etag, check_md5=self._etag_is_md5(etag, encryption))
+            os.replace(partial, local_path)
+            self._remove_partial_state(partial)
+
+            if mtime is not None:
+                os.utime(local_path, (mtime, mtime))
+            result = TransferResult(local_path, s3_key, size)
+        except TransferCancelled:
+            # Unlike a pause, a cancel does not leave a .part file to resume from
+            for path in (local_path + PARTIAL_SUFFIX, local_path + PARTIAL_SUFFIX + ".json"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            raise
+        except TransferInterrupted:
+            raise
+        except Exception as e:
+            result = TransferResult(local_path, s3_key, error=str(e))
+        finally:
+            self._untrack(progress, result is not None and result.ok)
+        return result
+
+    def _download_stream(self, bucket, s3_key, partial, size, etag, control=None, progress=None):
+        """Single-stream download that continues from the end of an existing .part file
+
+        Returns the object's encryption headers, or None if no GET was needed.
+        """
+        state = self._load_partial_state(partial)
+        if state and state.get('etag') == etag and state.get('size') == size and os.path.exists(partial):
+            offset = os.path.getsize(partial)
+        else:
+            offset = 0
+            open(partial, 'wb').close()
+            state = {'etag': etag, 'size': size}
+            self._save_partial_state(partial, state)
+        self._advance(progress, offset)
+        on_chunk = (lambda n: self.progress.advance(progress, n)) if progress else None
+
+        for attempt in range(self.DOWNLOAD_ATTEMPTS):
+            if offset >= size:
+                break
+            args = {'Bucket': bucket, 'Key': s3_key, 'Range': f"bytes={offset}-"}
+            if etag:
+                args['IfMatch'] = etag
+            try:
+                response = self.s3_client.get_object(**args)
+                if 'encryption' not in state:
+                    state['encryption'] = self._encryption_headers(response)
+                    self._save_partial_state(partial, state)
+                with open(partial, 'ab') as f:
+                    self._write_stream(response['Body'], f, control, self.download_limiter, on_chunk)
+            except TransferInterrupted:
+                raise
+            except Exception:
+                if attempt == self.DOWNLOAD_ATTEMPTS - 1:
+                    raise
+            offset = os.path.getsize(partial)
+        return state.get('encryption')
+
+    def _download_ranges(self, bucket, s3_key, partial, size, etag, control=None, progress=None):
+        """Fetch an object with parallel ranged GETs into a preallocated .part file
+
+        Completed part numbers are recorded next to the .part file, so an
+        interrupted download only fetches the parts that are still missing.
+        Returns the object's encryption headers, or None if no GET was needed.
+        """
+        state = self._load_partial_state(partial)
+        if not (state and state.get('etag') == etag and state.get('size') == size
+                and state.get('part_size') == self.part_size
+                and os.path.exists(partial) and os.path.getsize(partial) == size):
+            # Preallocate so every part can seek to its own offset
+            with open(partial, 'wb') as f:
+                f.truncate(size)
+            state = {'etag': etag, 'size': size, 'part_size': self.part_size, 'done': []}
+            self._save_partial_state(partial, state)
+
+        done = set(state['done'])
+        lock = threading.Lock()
+        self._advance(progress, sum(min(self.part_size, size - n * self.part_size) for n in done))
+
+        def fetch_range(part_number):
+            if control:
+                control.check()
+            start = part_number * self.part_size
+            end = min(start + self.part_size, size) - 1
+            args = {'Bucket': bucket, 'Key': s3_key, 'Range': f"bytes={start}-{end}"}
+            if etag:
+                # Fail instead of stitching together two versions of the object
+                args['IfMatch'] = etag
+
+            for attempt in range(self.DOWNLOAD_ATTEMPTS):
+                written = [0]
+
+                def on_chunk(nbytes):
+                    written[0] += nbytes
+                    self._advance(progress, nbytes)
+
+                try:
+                    response = self.s3_client.get_object(**args)
+                    with lock:
+                        state.setdefault('encryption', self._encryption_headers(response))
+                    with open(partial, 'r+b') as f:
+                        f.seek(start)
+                        self._write_stream(response['Body'], f, control, self.download_limiter, on_chunk)
+                    break
+                except TransferInterrupted:
+                    raise
+                except Exception:
+                    self._advance(progress, -written[0])  # The retry rewrites this range from its start
+                    if attempt == self.DOWNLOAD_ATTEMPTS - 1:
+                        raise
+
+            with lock:
+                done.add(part_number)
+                state['done'] = sorted(done)
+                self._save_partial_state(partial, state)
+
+        remaining = [n for n in range(-(-size // self.part_size)) if n not in done]
+        with ThreadPoolExecutor(max_workers=self.part_concurrency) as pool:
+            for future in [pool.submit(fetch_range, n) for n in remaining]:
+                future.result()
+        return state.get('encryption')
+
+    @staticmethod
+    def _encryption_headers(response):
+        return {name: response.get(name) for name in ('ServerSideEncryption', 'SSECustomerAlgorithm')}
+
+    @staticmethod
+    def _etag_is_md5(etag, encryption):
+        """Whether an ETag is the content MD5, given the object's HEAD/GET encryption headers
+
+        Multipart ETags ("<md5>-<parts>"), SSE-KMS/DSSE and SSE-C objects have
+        ETags that are not the MD5 of the object's bytes.
+        """
+        etag = (etag or '').strip('"')
+        if len(etag) != 32 or '-' in etag:
+            return False
+        if encryption.get('ServerSideEncryption') in ('aws:kms', 'aws:kms:dsse'):
+            return False
+        return not encryption.get('SSECustomerAlgorithm')
+
+    @staticmethod
+    def _verify_download(partial, size, etag, check_md5):
+        """Check a finished .part file against the object before it replaces the target"""
+        actual = os.path.getsize(partial)
+        if actual != size:
+            raise IOError(f"Downloaded {actual} bytes, expected {size}")
+
+        if check_md5 and file_md5(partial) != (etag or '').strip('"'):
+            os.remove(partial)
+            raise IOError("Downloaded content does not match the object's ETag")
+
+    @staticmethod
+    def _load_partial_state(partial):
+        try:
+            with open(partial + ".json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_partial_state(partial, state):
+        with open(partial + ".json.tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(partial + ".json.tmp", partial + ".json")
+
+    @staticmethod
+    def _remove_partial_state(partial):
+        try:
+            os.remove(partial + ".json")
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write_stream(body, f, control=None, limiter=None, on_chunk=None):
+        """Copy a streaming response body into an open file, calling on_chunk(nbytes) after each write"""
+        try:
+            while True:
+                if control:
+                    control.check()
+                chunk = body.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if limiter:
+                    limiter.consume(len(chunk))
+                f.write(chunk)
+                if on_chunk:
+                    on_chunk(len(chunk))
+        finally:
+            body.close()
+
+    def _run(self, kind, jobs, worker, on_result):
+        """Run jobs with byte progress counted for the whole batch up front"""
+        jobs = list(jobs)
+        if self.progress is None:
+            return self._run_jobs(kind, jobs, worker, on_result)
+
+        planned = [self._planned_size(kind, job) for job in jobs]
+        self.progress.add_batch(sum(planned))
+        if kind == 'upload':
+            # Each batch keeps its own plan, so concurrent batches sharing a path can't
+            # overwrite or drop each other's sizes, and nothing outlives the batch
+            sizes = {job[1]: size for job, size in zip(jobs, planned)}
+            batch_worker = worker
+
+            def worker(*job, **kwargs):
+                self._batch.planned = sizes
+                try:
+                    return batch_worker(*job, **kwargs)
+                finally:
+                    del self._batch.planned
+
+        results = []
+        try:
+            results = self._run_jobs(kind, jobs, worker, on_result)
+            return results
+        finally:
+            finished = [r is not None and r.ok for r in results] + [False] * (len(jobs) - len(results))
+            self.progress.end_batch(sum(size for size, ok in zip(planned, finished) if not ok))
+
+    def _planned_size(self, kind, job):
+        """Bytes a job is expected to move: the local file's size, or the size its listing gave"""
+        if kind == 'download':
+            return (job[3] or 0) if len(job) > 3 else 0
+        try:
+            return os.path.getsize(job[1])
+        except OSError:
+            return 0
+
+    def _run_jobs(self, kind, jobs, worker, on_result):
+        """Run jobs through the scheduler or a bounded pool, reporting results in job order"""
+        if self.scheduler is not None:
+            return self.scheduler.run_batch(kind, worker, jobs, on_result, priority=self.priority)
+
+        results = [None] * len(jobs)
+        next_report = 0
+        pending = {}
+        job_iter = iter(enumerate(jobs))
+        # Keep a small backlog queued so huge batches don't create a future per file up front
+        max_pending = self.max_concurrency * 2
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while True:
+                for index, job in job_iter:
+                    pending[pool.submit(worker, *job)] = index
+                    if len(pending) >= max_pending:
+                        break
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+
+                while next_report < len(results) and results[next_report] is not None:
+                    if on_result:
+                        on_result(next_report, results[next_report])
+                    next_report += 1
+
+        return results
+
+    @staticmethod
+    def failure_summary(results, limit=10):
+        """Build a human readable summary of failed transfers"""
+        failures = [r for r in results if r is not None and not r.ok]
+        if not failures:
+            return ""
+
+        lines = [f"{os.path.basename(r.local_path) or r.key}: {r.error}" for r in failures[:limit]]
+        if len(failures) > limit:
+            lines.append(f"... and {len(failures) - limit} more")
+        return "\n".join(lines)
+
+
+class SyncItem:
+    """A file the sync plan decided to upload, and why"""
+
+    def __init__(self, job, reason, size, mtime, md5, error=None):
+        self.job = job  # (bucket, local_path, s3_key)
+        self.reason = reason  # 'new', 'changed', ... or 'error' when the file could not be checked
+        self.size = size
+        self.mtime = mtime
+        self.md5 = md5  # None until hashed; new and resized files are hashed by the upload worker
+        self.error = error
+
+
+class UploadManifest:
+    """Local record of uploaded files for incremental sync
+
+    Each (local file, bucket, key) remembers the size, mtime and MD5 it had
+    when uploaded plus the resulting ETag. A file whose size and mtime are
+    unchanged is skipped without reading it; one whose mtime moved but whose
+    content hash still matches is skipped after hashing.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            local_path TEXT NOT NULL, bucket TEXT NOT NULL, key TEXT NOT NULL,
+            size INTEGER NOT NULL, mtime REAL NOT NULL, md5 TEXT NOT NULL,
+            etag TEXT NOT NULL, uploaded_at REAL NOT NULL,
+            PRIMARY KEY (local_path, bucket, key)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(APP_DATA_DIR, "upload_manifest.sqlite")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def plan(self, jobs, remote=None):
+        """Return SyncItems for the jobs that need uploading
+
+        Files are only hashed here when the hash decides whether to upload
+        (same size, new mtime, or adopting an object already on S3). A file
+        that vanishes or cannot be read becomes an 'error' item instead of
+        failing the whole plan.
+        """
+        plan = []
+        for job in jobs:
+            try:
+                item = self._plan_one(job, remote)
+            except OSError as e:
+                item = SyncItem(job, 'error', 0, 0, None, error=str(e))
+            if item is not None:
+                plan.append(item)
+        return plan
+
+    def _plan_one(self, job, remote):
+        """SyncItem for one job, or None when it is up to date"""
+        bucket, local_path, s3_key = job
+        stat = os.stat(local_path)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT size, mtime, md5, etag FROM files WHERE local_path = ? AND bucket = ? AND key = ?",
+                (os.path.abspath(local_path), bucket, s3_key)).fetchone()
+
+        remote_etag = remote.get(s3_key) if remote is not None else None
+        md5 = None
+
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            reason = None
+        elif row and row[0] == stat.st_size:
+            # Touched but possibly unchanged: compare content
+            md5 = file_md5(local_path)
+            reason = None if md5 == row[2] else 'changed'
+            if reason is None:
+                # Remember the new mtime so the file isn't hashed again
+                self.record(SyncItem(job, None, stat.st_size, stat.st_mtime, md5), row[3])
+        elif row:
+            reason = 'changed'
+        elif remote_etag is not None:
+            md5 = file_md5(local_path)
+            if md5 == remote_etag:
+                # Already on S3 from before the manifest existed; adopt it
+                self.record(SyncItem(job, None, stat.st_size, stat.st_mtime, md5), remote_etag)
+                return None
+            reason = 'new'
+        else:
+            reason = 'new'
+
+        if reason is None and remote is not None:
+            if remote_etag is None:
+                reason = 'missing on S3'
+            elif remote_etag != row[3]:
+                reason = 'changed on S3'
+
+        if reason is None:
+            return None
+        if md5 is None and reason.endswith('on S3'):
+            md5 = row[2]  # content matches the manifest, only S3 differs
+        return SyncItem(job, reason, stat.st_size, stat.st_mtime, md5)
+
+    def record(self, item, etag):
+        """Remember a successful upload"""
+        bucket, local_path, s3_key = item.job
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (os.path.abspath(local_path), bucket, s3_key, item.size,
+                               item.mtime, item.md5, etag, time.time()))
+            self.conn.commit()
+
+
+class ParallelLister:
+    """Lists a prefix as parallel key ranges merged back into one ordered page stream
+
+    The first SEQUENTIAL_PAGES pages are fetched one after another, so a
+    prefix that ends within them costs exactly what a plain listing does.
+    Only a prefix known to be larger is fanned out: the rest of the keyspace
+    is split at the sub-prefixes found with a delimiter request (or at fixed
+    characters for flat prefixes), grouped so each range holds about
+    RANGE_PAGES pages going by the key density seen so far, and each range
+    is paginated by its own worker using StartAfter. Pages are yielded in
+    key order; later ranges buffer a few pages ahead.
+    """
+
+    SPLIT_CHARS = '05AGNTagnt'  # Fallback range boundaries for flat prefixes
+    QUEUE_PAGES = 4  # Pages a range may buffer ahead of the consumer
+    SEQUENTIAL_PAGES = 3  # Pages listed in order before fanning out
+    RANGE_PAGES = 5  # Target size of a range; its last page is partly outside it
+
+    def __init__(self, s3_client, max_workers=8, controller=None):
+        self.s3_client = s3_client
+        self.max_workers = max(1, int(max_workers))
+        self.controller = controller  # AdaptiveConcurrency limiting requests in flight below max_workers
+
+    def iter_pages(self, bucket, prefix, delimiter=None):
+        """Yield list_objects_v2-style pages for prefix in key order"""
+        args = {'Bucket': bucket, 'Prefix': prefix}
+        if delimiter:
+            args['Delimiter'] = delimiter
+
+        seen = []
+        pages = 0
+        page = self.s3_client.list_objects_v2(**args)
+        while True:
+            yield page
+            if not page.get('IsTruncated'):
+                return
+            seen += self._items(page)
+            pages += 1
+            if self.max_workers > 1 and pages >= self.SEQUENTIAL_PAGES:
+                break
+            page = self.s3_client.list_objects_v2(ContinuationToken=page['NextContinuationToken'], **args)
+
+        # The prefix is large: split what is left of it
+        last = max(seen)
+        page_keys = max(1, len(seen) // pages)
+        boundaries = self._boundaries(bucket, prefix, last, self._keys_per_child(prefix, seen), page_keys)
+        ranges = list(zip([last] + boundaries, boundaries + [None]))
+        yield from self._merge(args, ranges)
+
+    @staticmethod
+    def _items(page):
+        """Keys and common prefixes in a page"""
+        return ([obj['Key'] for obj in page.get('Contents', [])]
+                + [cp['Prefix'] for cp in page.get('CommonPrefixes', [])])
+
+    @staticmethod
+    def _keys_per_child(prefix, items):
+        """Average number of listed items per sub-prefix (or file) directly below prefix"""
+        children = {item[len(prefix):].split('/', 1)[0] for item in items}
+        return len(items) / max(1, len(children))
+
+    def _boundaries(self, bucket, prefix, after, keys_per_child, page_keys):
+        """Pick range boundaries above 'after', preferring real sub-prefixes"""
+        response = self.s3_client.list_objects_v2(Bucket=bucket, Prefix=prefix,
+                                                  Delimiter='/', StartAfter=after)
+        boundaries = [cp['Prefix'] for cp in response.get('CommonPrefixes', []) if cp['Prefix'] > after]
+        if len(boundaries) < 2:
+            return [prefix + c for c in self.SPLIT_CHARS if prefix + c > after]
+
+        # Group sub-prefixes so a range is worth its partly wasted last page
+        step = max(1, round(self.RANGE_PAGES * page_keys / keys_per_child))
+        return boundaries[::step]
+
+    def _merge(self, args, ranges):
+        stop = threading.Event()
+        queues = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            def submit(index):
+                out = queue.Queue(maxsize=self.QUEUE_PAGES)
+                queues[index] = out
+                pool.submit(self._produce_range, args, ranges[index], out, stop)
+
+            try:
+                submitted = 0
+                for index in range(len(ranges)):
+                    # Ranges start in order, so the one being consumed is never starved of a worker
+                    while submitted < len(ranges) and submitted < index + self.max_workers * 2:
+                        submit(submitted)
+                        submitted += 1
+
+                    out = queues.pop(index)
+                    while True:
+                        item = out.get()
+                        if item is None:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+            finally:
+                stop.set()
+                # Unblock producers waiting on full queues
+                for out in queues.values():
+                    while not out.empty():
+                        out.get_nowait()
+
+    def _produce_range(self, args, key_range, out, stop):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        try:
+            for page in self._list_range(args, *key_range):
+                if stop.is_set():
+                    return
+                put(page)
+        except Exception as e:
+            put(e)
+        finally:
+            put(None)
+
+    def _list_range(self, args, start_after, end):
+        """Paginate keys in (start_after, end], trimming the page that crosses end
+
+        With a delimiter, S3 rolls keys after StartAfter back up into the
+        common prefix StartAfter itself names, so that prefix is dropped here.
+        """
+        range_args = dict(args)
+        if start_after:
+            range_args['StartAfter'] = start_after
+
+        lower = start_after or ''
+
+        def in_range(item):
+            return item > lower and (end is None or item <= end)
+
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = iter(paginator.paginate(**range_args))
+        while True:
+            page = self._next_page(pages)
+            if page is None:
+                return
+            contents = page.get('Contents', [])
+            prefixes = page.get('CommonPrefixes', [])
+            kept_contents = [obj for obj in contents if in_range(obj['Key'])]
+            kept_prefixes = [cp for cp in prefixes if in_range(cp['Prefix'])]
+            yield {'Contents': kept_contents, 'CommonPrefixes': kept_prefixes}
+
+            crossed_end = end is not None and any(
+                item > end for item in [obj['Key'] for obj in contents[-1:]] + [cp['Prefix'] for cp in prefixes[-1:]])
+            if crossed_end:
+                return
+
+    def _next_page(self, pages):
+        """Fetch the next page, within the adaptive request limit when there is one"""
+        controller = self.controller
+        if controller is None or not controller.enabled:
+            return next(pages, None)
+
+        with controller.slot():
+            time.sleep(controller.backoff_delay())
+            started = time.monotonic()
+            try:
+                page = next(pages, None)
+            except ClientError as e:
+                if is_throttle_error(e):
+                    controller.on_throttle()
+                raise
+        if page is not None:
+            controller.record(page.get('KeyCount', len(page.get('Contents', []))), time.monotonic() - started)
+        return page
+
+
+class DeleteSummary:
+    """Running totals for a bulk delete"""
+
+    MAX_RECORDED_ERRORS = 1000
+
+    def __init__(self):
+        self.deleted = 0
+        self.error_count = 0
+        self.errors = []  # (key, code, message), capped at MAX_RECORDED_ERRORS
+        self.started = time.monotonic()
+
+    @property
+    def rate(self):
+        """Objects deleted per second so far"""
+        elapsed = time.monotonic() - self.started
+        return self.deleted / elapsed if elapsed > 0 else 0.0
+
+    def error_summary(self, limit=10):
+        lines = [f"{key}: {code} {message}".strip() for key, code, message in self.errors[:limit]]
+        if self.error_count > limit:
+            lines.append(f"... and {self.error_count - limit} more")
+        return "\n".join(lines)
+
+
+class S3BatchDeleter:
+    """Streams keys into concurrent 1000-key delete_objects batches
+
+    Batches are issued while the listing is still running, so memory stays
+    bounded by the number of batches in flight rather than the prefix size.
+    """
+
+    BATCH_SIZE = 1000  # S3 limit per delete_objects request
+
+    def __init__(self, s3_client, max_concurrency=4):
+        self.s3_client = s3_client
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    def delete_prefix(self, bucket, prefix, pages=None, on_progress=None):
+        """Delete every object under prefix, returning a DeleteSummary
+
+        pages may be any iterable of list_objects_v2 pages (without a
+        delimiter); it defaults to a single paginator over the prefix.
+        """
+        if pages is None:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(Bucket=bucket, Prefix=prefix)
+        keys = (obj['Key'] for page in pages for obj in page.get('Contents', []))
+        return self.delete_keys(bucket, keys, on_progress)
+
+    def delete_keys(self, bucket, keys, on_progress=None):
+        """Delete an iterable of keys, returning a DeleteSummary
+
+        on_progress(summary) is called after each batch completes.
+        """
+        summary = DeleteSummary()
+        lock = threading.Lock()
+        pending = set()
+
+        def record(future):
+            batch, response, error = future.result()
+            with lock:
+                if error is not None:
+                    failures = [(key, 'RequestFailed', error) for key in batch]
+                else:
+                    failures = [(e.get('Key'), e.get('Code', ''), e.get('Message', ''))
+                                for e in response.get('Errors', [])]
+                summary.deleted += len(batch) - len(failures)
+                summary.error_count += len(failures)
+                room = DeleteSummary.MAX_RECORDED_ERRORS - len(summary.errors)
+                summary.errors.extend(failures[:max(0, room)])
+            if on_progress:
+                on_progress(summary)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            batch = []
+            for key in keys:
+                batch.append(key)
+                if len(batch) == self.BATCH_SIZE:
+                    self._submit(pool, pending, bucket, batch, record)
+                    batch = []
+            if batch:
+                self._submit(pool, pending, bucket, batch, record)
+            wait(pending)
+
+        return summary
+
+    def _submit(self, pool, pending, bucket, batch, record):
+        # Back-pressure: don't keep listing while too many batches are queued
+        while len(pending) >= self.max_concurrency * 2:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            pending.difference_update(done)
+        future = pool.submit(self._delete_batch, bucket, batch)
+        future.add_done_callback(record)
+        pending.add(future)
+
+    def _delete_batch(self, bucket, batch):
+        try:
+            response = self.s3_client.delete_objects(
+                Bucket=bucket,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            return batch, response, None
+        except Exception as e:
+            return batch, None, str(e)
+
+
+def parent_prefixes(key):
+    """Return the listing prefixes above a key, nearest first ('a/b/c' -> ['a/b/', 'a/', ''])"""
+    parts = key.rstrip('/').split('/')[:-1]
+    return ['/'.join(parts[:i]) + '/' if i else '' for i in range(len(parts), -1, -1)]
+
+
+class ListingCache:
+    """Thread-safe per-prefix listing cache with TTL and LRU eviction"""
+
+    def __init__(self, max_entries=64, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (bucket, prefix) -> (stored_at, store, folder_set)
+        self._lock = threading.Lock()
+
+    def get(self, bucket, prefix):
+        """Return the ListingStore for a prefix, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get((bucket, prefix))
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[(bucket, prefix)]
+                return None
+            self._entries.move_to_end((bucket, prefix))
+            return entry[1]
+
+    def put(self, bucket, prefix, store):
+        """Store a listing, evicting the least recently used prefixes"""
+        with self._lock:
+            self._entries[(bucket, prefix)] = (time.monotonic(), store, frozenset(store.folders))
+            self._entries.move_to_end((bucket, prefix))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_key(self, bucket, key, removed=False):
+        """Drop listings affected by writing or deleting a single key
+
+        The key's own prefix is always dropped. An ancestor is only dropped
+        when the change can alter its folder list: a write that creates a
+        folder it doesn't already show, or any delete (which may empty a folder).
+        """
+        parts = key.rstrip('/').split('/')[:-1]
+        prefixes = parent_prefixes(key)
+        with self._lock:
+            self._entries.pop((bucket, prefixes[0]), None)
+            # prefixes[depth] lists parts[len(parts) - depth] as a folder
+            for depth in range(1, len(prefixes)):
+                cache_key = (bucket, prefixes[depth])
+                entry = self._entries.get(cache_key)
+                if entry is None:
+                    continue
+                if removed or parts[len(parts) - depth] not in entry[2]:
+                    del self._entries[cache_key]
+
+    def invalidate_tree(self, bucket, prefix):
+        """Drop a prefix, everything cached below it and the listings above it"""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == bucket and k[1].startswith(prefix)]:
+                del self._entries[cache_key]
+        if prefix:
+            self.invalidate_key(bucket, prefix, removed=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ListingStore:
+    """Compact column-oriented backing store for one prefix listing
+
+    Files are kept as parallel name / size / mtime / ETag columns instead of
+    a dict per object, which keeps prefixes with hundreds of thousands of
+    keys small.
+    """
+
+    def __init__(self):
+        self.folders = []
+        self.names = []
+        self.sizes = array('q')
+        self.mtimes = array('d')  # LastModified as a UTC timestamp
+        self.etags = []  # None where the source has no ETag (local files)
+
+    def __len__(self):
+        return len(self.folders) + len(self.names)
+
+    def extend(self, folders, files):
+        """Append a page of folder names and (name, size, mtime[, etag]) file tuples"""
+        self.folders.extend(folders)
+        for name, size, mtime, *etag in files:
+            self.names.append(name)
+            self.sizes.append(size)
+            self.mtimes.append(mtime)
+            self.etags.append(etag[0] if etag else None)
+
+
+class VirtualListView:
+    """Renders a ListingStore through a small pool of Treeview rows
+
+    Only the rows that fit on screen exist as Treeview items; scrolling,
+    sorting and selection are tracked against positions in the store.
+    """
+
+    DEFAULT_ROW_HEIGHT = 20
+    HEADER_HEIGHT = 25
+
+    def __init__(self, tree, scrollbar, format_row):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_row = format_row  # (is_folder, name, size, mtime) -> (icon, values)
+
+        self.store = ListingStore()
+        self.offset = 0
+        self.sort_column = 'Name'
+        self.sort_reverse = False
+        self.order = None  # File permutation when not in natural (name ascending) order
+        self.selected = set()
+        self.slots = []
+
+        self.scrollbar.configure(command=self.on_scroll)
+        self.tree.bind('<Configure>', lambda e: self.render())
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(3))
+        self.tree.bind('<Button-1>', self.on_click, add='+')
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+
+    # Data
+    def set_store(self, store):
+        """Show a new listing, resetting scroll position and selection"""
+        self.store = store
+        self.offset = 0
+        self.selected.clear()
+        self.sort_column = 'Name'
+        self.sort_reverse = False
+        self.order = None
+        self.render()
+
+    def refresh(self):
+        """Re-render after rows were appended to the current store"""
+        if self.order is not None:
+            self.apply_sort()
+        self.render()
+
+    def replace_store(self, store):
+        """Swap in a reordered copy of the current listing, keeping the scroll position"""
+        self.store = store
+        self.selected.clear()
+        self.refresh()
+
+    def row(self, position):
+        """Return (is_folder, name, size, mtime) for a display position"""
+        folder_count = len(self.store.folders)
+        if position < folder_count:
+            if self.sort_column == 'Name' and self.sort_reverse:
+                position = folder_count - 1 - position
+            return True, self.store.folders[position], 0, 0.0
+
+        index = position - folder_count
+        if self.order is not None:
+            index = self.order[index]
+        return False, self.store.names[index], self.store.sizes[index], self.store.mtimes[index]
+
+    def selected_entries(self):
+        """Return (name, 'Folder'|'File') for every selected row, visible or not"""
+        entries = []
+        for position in sorted(self.selected):
+            if position < len(self.store):
+                is_folder, name, _, _ = self.row(position)
+                entries.append((name, 'Folder' if is_folder else 'File'))
+        return entries
+
+    def entry_at(self, y):
+        """Return (name, 'Folder'|'File') for the row under a y coordinate, or None"""
+        iid = self.tree.identify_row(y)
+        if iid not in self.slots:
+            return None
+        is_folder, name, _, _ = self.row(self.offset + self.slots.index(iid))
+        return name, 'Folder' if is_folder else 'File'
+
+    # Sorting
+    def sort_by(self, column):
+        """Sort files by a column; clicking the active column reverses it"""
+        if column == self.sort_column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self.selected.clear()
+        self.apply_sort()
+        self.render()
+
+    def apply_sort(self):
+        """Rebuild the file permutation for the active sort column"""
+        store = self.store
+        if self.sort_column in ('Name', 'Type') and not self.sort_reverse:
+            self.order = None  # Listing pages already arrive in name order
+            return
+
+        if self.sort_column == 'Size':
+            key = store.sizes.__getitem__
+        elif self.sort_column == 'Modified':
+            key = store.mtimes.__getitem__
+        else:
+            key = None
+        self.order = array('l', sorted(range(len(store.names)), key=key, reverse=self.sort_reverse))
+
+    # Rendering
+    def visible_row_count(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return int(self.tree.cget('height'))
+        row_height = ttk.Style().lookup('Treeview', 'rowheight') or self.DEFAULT_ROW_HEIGHT
+        return max(1, (height - self.HEADER_HEIGHT) // int(row_height))
+
+    def render(self):
+        """Materialize only the rows currently in view"""
+        total = len(self.store)
+        rows = self.visible_row_count()
+        self.offset = max(0, min(self.offset, total - rows))
+        count = min(rows, total - self.offset)
+
+        # Grow or shrink the row pool to what is on screen
+        while len(self.slots) < count:
+            self.slots.append(self.tree.insert('', 'end'))
+        while len(self.slots) > count:
+            self.tree.delete(self.slots.pop())
+
+        selected_slots = []
+        for slot, iid in enumerate(self.slots):
+            position = self.offset + slot
+            icon, values = self.format_row(*self.row(position))
+            self.tree.item(iid, text=icon, values=values)
+            if position in self.selected:
+                selected_slots.append(iid)
+        self.tree.selection_set(selected_slots)
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # Scrolling
+    def scroll_by(self, rows):
+        self.offset += rows
+        self.render()
+        return 'break'
+
+    def on_scroll(self, action, amount, unit=None):
+        """Scrollbar command: translate moveto/scroll into a store offset"""
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.store))
+            self.render()
+        elif action == 'scroll':
+            step = self.visible_row_count() if unit == 'pages' else 1
+            self.scroll_by(int(amount) * step)
+
+    def on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    # Selection
+    def on_click(self, event):
+        # A plain click replaces the selection, including rows scrolled out of view
+        if not event.state & 0x0005:  # Shift / Control
+            self.selected.clear()
+
+    def on_select(self, event):
+        visible = {iid: self.offset + slot for slot, iid in enumerate(self.slots)}
+        self.selected.difference_update(visible.values())
+        self.selected.update(visible[iid] for iid in self.tree.selection() if iid in visible)
+
+
+def scan_directory(directory, page_size=1000, cancelled=None):
+    """Yield (folders, files) pages of one local directory's entries, in directory order
+
+    Files are (name, size, mtime) tuples ready for a ListingStore. Built on
+    os.scandir: whether an entry is a folder comes from the directory read
+    itself, and on Windows so does its size and mtime, so a folder on a
+    network share is not a stat round trip per entry. Unreadable entries are
+    skipped.
+    """
+    folders, files = [], []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    folders.append(entry.name)
+                else:
+                    stat = entry.stat()
+                    files.append((entry.name, stat.st_size, stat.st_mtime))
+            except OSError:
+                continue
+            if len(folders) + len(files) >= page_size:
+                if cancelled and cancelled():
+                    return
+                yield folders, files
+                folders, files = [], []
+    if folders or files:
+        yield folders, files
+
+
+def walk_files(directory, cancelled=None):
+    """Yield (relative_path, size, mtime) for every file below directory
+
+    Walks iteratively with os.scandir. Symlinked folders are listed but not
+    descended into, so a link loop cannot recurse forever; unreadable
+    folders are skipped.
+    """
+    pending = ['']
+    while pending:
+        if cancelled and cancelled():
+            return
+        relative = pending.pop()
+        try:
+            with os.scandir(os.path.join(directory, relative)) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(os.path.join(relative, entry.name))
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            yield os.path.join(relative, entry.name), stat.st_size, stat.st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class Inotify:
+    """Minimal ctypes binding to Linux inotify for FolderWatcher"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+    EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self, libc, fd):
+        self.libc = libc
+        self.fd = fd
+
+    @classmethod
+    def open(cls):
+        """Return an Inotify, or None where inotify is unavailable (not Linux, no libc symbol, no fds)"""
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            init = libc.inotify_init1
+        except (OSError, AttributeError):
+            return None
+        fd = init(cls.IN_NONBLOCK | cls.IN_CLOEXEC)
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code), path)
+        return wd
+
+    def read(self, timeout):
+        """Wait up to timeout seconds and return [(wd, mask, name)] for the events that arrived"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Watches a local folder and hands settled file changes over in batches
+
+    Created and modified files are picked up with inotify on Linux and by
+    comparing os.scandir snapshots elsewhere (or when the inotify watch
+    limit is reached). A file is passed on once it has gone DEBOUNCE
+    seconds without another change, so a file being written arrives once.
+    A second thread calls on_batch(paths) with at most MAX_BATCH paths, no
+    more often than every MIN_BATCH_INTERVAL seconds and never two at once;
+    changes that pile up meanwhile are merged, so a burst of thousands of
+    writes becomes a few large batches instead of thousands of uploads.
+
+    on_batch returns the paths that failed (or raises, failing them all).
+    Those go back into the pending set and are retried after RETRY_DELAY
+    seconds, backing off, up to MAX_RETRIES times; on_error(message) hears
+    about batch errors and files that were given up on.
+    """
+
+    DEBOUNCE = 2.0
+    POLL_INTERVAL = 5.0
+    MIN_BATCH_INTERVAL = 5.0
+    MAX_BATCH = 1000
+    MAX_RETRIES = 3
+    RETRY_DELAY = 30.0
+    IGNORED_SUFFIXES = (PARTIAL_SUFFIX, PARTIAL_SUFFIX + ".json", PARTIAL_SUFFIX + ".json.tmp")
+
+    def __init__(self, directory, on_batch, recursive=True, use_inotify=True, on_error=None):
+        self.directory = os.path.abspath(directory)
+        self.on_batch = on_batch  # Called with absolute paths on the watcher's upload thread
+        self.on_error = on_error
+        self.recursive = recursive
+        self.use_inotify = use_inotify
+        self.backend = None  # 'inotify' or 'polling' once started
+        self.batches = 0
+        self.files = 0
+        self.given_up = 0
+        self._pending = {}  # path -> monotonic time of its latest change
+        self._attempts = {}  # path -> failed uploads since it last changed
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._inotify = None
+        self._watches = {}  # inotify wd -> directory
+
+    def start(self):
+        if self.use_inotify:
+            self._inotify = Inotify.open()
+        if self._inotify is not None:
+            try:
+                self._watch_tree(self.directory)
+                self.backend = 'inotify'
+            except OSError:
+                # Usually fs.inotify.max_user_watches on a huge tree
+                self._inotify.close()
+                self._inotify = None
+        if self._inotify is None:
+            self.backend = 'polling'
+        target = self._run_inotify if self._inotify is not None else self._run_polling
+        threading.Thread(target=target, daemon=True).start()
+        threading.Thread(target=self._run_batches, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def _changed(self, path):
+        if not path.endswith(self.IGNORED_SUFFIXES):
+            with self._lock:
+                self._pending[path] = time.monotonic()
+                self._attempts.pop(path, None)
+
+    def _retry_later(self, paths):
+        """Put failed paths back, delayed; return the ones out of retries"""
+        now = time.monotonic()
+        given_up = []
+        with self._lock:
+            for path in paths:
+                attempts = self._attempts.get(path, 0) + 1
+                if attempts > self.MAX_RETRIES:
+                    self._attempts.pop(path, None)
+                    given_up.append(path)
+                elif path not in self._pending:  # A newer change already requeued it
+                    self._attempts[path] = attempts
+                    self._pending[path] = now + self.RETRY_DELAY * 2 ** (attempts - 1)
+        return given_up
+
+    def _snapshot(self):
+        """{path: (size, mtime)} for every watched file"""
+        if self.recursive:
+            return {os.path.join(self.directory, relative): (size, mtime)
+                    for relative, size, mtime in walk_files(self.directory, cancelled=self._stop.is_set)}
+        return {os.path.join(self.directory, name): (size, mtime)
+                for _, files in scan_directory(self.directory, cancelled=self._stop.is_set)
+                for name, size, mtime in files}
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.POLL_INTERVAL):
+            try:
+                current = self._snapshot()
+            except OSError:
+                continue  # Folder briefly unavailable, e.g. a network share reconnecting
+            for path, state in current.items():
+                if previous.get(path) != state:
+                    self._changed(path)
+            previous = current
+
+    def _watch_tree(self, directory, collect=False):
+        """Watch a folder, and with recursion every folder below it; with collect, return the files inside"""
+        found = []
+        pending = [directory]
+        while pending:
+            folder = pending.pop()
+            try:
+                self._watches[self._inotify.add_watch(folder)] = folder
+                if not self.recursive:
+                    break
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                        elif collect and entry.is_file():
+                            found.append(entry.path)
+            except OSError as e:
+                if e.errno == errno.ENOSPC or folder == self.directory:
+                    raise  # Out of inotify watches, or the watched folder itself is unusable
+                # An unreadable subfolder, or one removed again, is just not watched
+        return found
+
+    def _run_inotify(self):
+        since = time.time()
+        try:
+            while not self._stop.is_set():
+                for wd, mask, name in self._inotify.read(0.5):
+                    if mask & Inotify.IN_Q_OVERFLOW:
+                        # Events were dropped: anything touched since the last full check counts
+                        checked, since = since, time.time()
+                        for path, (_, mtime) in self._snapshot().items():
+                            if mtime >= checked - 1:
+                                self._changed(path)
+                        continue
+                    if mask & Inotify.IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+                    directory = self._watches.get(wd)
+                    if directory is None or not name:
+                        continue
+                    path = os.path.join(directory, name)
+                    if mask & Inotify.IN_ISDIR:
+                        if self.recursive and mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO):
+                            # Files can land in a new folder before its watch exists
+                            try:
+                                for found in self._watch_tree(path, collect=True):
+                                    self._changed(found)
+                            except OSError:
+                                pass  # Out of watches: changes in this folder are missed
+                    elif not mask & Inotify.IN_CREATE:
+                        # Creation is followed by modify / close-write; moved-in files are complete
+                        self._changed(path)
+        finally:
+            self._inotify.close()
+
+    def _take_settled(self):
+        """Remove and return up to MAX_BATCH paths that have been quiet for DEBOUNCE seconds"""
+        cutoff = time.monotonic() - self.DEBOUNCE
+        with self._lock:
+            settled = [path for path, changed in self._pending.items() if changed <= cutoff][:self.MAX_BATCH]
+            for path in settled:
+                del self._pending[path]
+        return [path for path in settled if os.path.isfile(path)]  # Skip files deleted again
+
+    def _run_batches(self):
+        last = 0.0
+        while not self._stop.wait(0.5):
+            if time.monotonic() - last < self.MIN_BATCH_INTERVAL:
+                continue
+            batch = self._take_settled()
+            if not batch:
+                continue
+            last = time.monotonic()
+            self.batches += 1
+            error = None
+            try:
+                failed = list(self.on_batch(batch) or ())
+            except Exception as e:
+                failed, error = batch, e
+            failed_set = set(failed)
+            with self._lock:
+                for path in batch:
+                    if path not in failed_set:
+                        self._attempts.pop(path, None)
+            self.files += len(batch) - len(failed_set)
+            given_up = self._retry_later(failed)
+            self.given_up += len(given_up)
+            if self.on_error and error is not None:
+                self.on_error(f"Watch upload failed, will retry: {error}")
+            if self.on_error and given_up:
+                self.on_error(f"Watch: gave up on {len(given_up)} files after {self.MAX_RETRIES} retries, "
+                              f"e.g. {given_up[0]}")
+
+
+def regex_literals(pattern):
+    """Return (anchored prefix, longest required literal) of a regex, '' where there is none
+
+    Conservative: patterns with alternation or inline flags yield nothing,
+    and groups, classes and characters followed by a quantifier are not
+    counted as required.
+    """
+    if '|' in pattern or '(?' in pattern:
+        return '', ''
+
+    def class_end(position):
+        """Index just past the character class opening at position"""
+        position += 1
+        if position < len(pattern) and pattern[position] == '^':
+            position += 1
+        if position < len(pattern) and pattern[position] == ']':
+            position += 1  # A leading ']' is a literal, as in []a] or [^]a]
+        while position < len(pattern):
+            if pattern[position] == '\\':
+                position += 2
+            elif pattern[position] == ']':
+                return position + 1
+            else:
+                position += 1
+        return len(pattern)
+
+    runs = []
+    run = ''
+    anchored = pattern.startswith('^')
+    position = 1 if anchored else 0
+    while position < len(pattern):
+        char = pattern[position]
+        literal = None
+        if char == '\\':
+            if position + 1 < len(pattern) and not pattern[position + 1].isalnum():
+                literal = pattern[position + 1]  # Escaped punctuation, e.g. \.
+            position += 2
+        elif char == '[':
+            position = class_end(position)
+        elif char == '{':
+            position = pattern.find('}', position)
+            position = len(pattern) if position < 0 else position + 1
+        elif char == '(':
+            # Skip a group: it may be optional, e.g. (abc)?
+            depth = 0
+            while position < len(pattern):
+                if pattern[position] == '\\':
+                    position += 1
+                elif pattern[position] == '[':
+                    position = class_end(position)  # A class may hold ')' or '('
+                    continue
+                elif pattern[position] == '(':
+                    depth += 1
+                elif pattern[position] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                position += 1
+            position += 1
+        else:
+            if char not in '.^$*+?}])':
+                literal = char
+            position += 1
+
+        if literal is not None and position < len(pattern) and pattern[position] in '*?{':
+            literal = None  # Optional or repeated: not required as written
+        if literal is None:
+            runs.append(run)
+            run = ''
+        else:
+            run += literal
+    runs.append(run)
+    return (runs[0] if anchored else ''), max(runs, key=len)
+
+
+def split_key(key):
+    """Split a key into its listing prefix and name ('a/b/c' -> ('a/b/', 'c'), 'a/' -> ('a/', ''))"""
+    cut = key.rfind('/') + 1
+    return key[:cut], key[cut:]
+
+
+def folder_prefixes(parent):
+    """Return every non-root folder prefix from parent upwards ('a/b/' -> ['a/b/', 'a/'])"""
+    if not parent:
+        return []
+    return [parent] + parent_prefixes(parent)[:-1]
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every key starting with prefix (for range scans)"""
+    return prefix + '\U0010ffff'
+
+
+def parse_size(text):
+    """Parse '1500', '10MB' or '1.5 GB' into bytes; blank means no limit"""
+    text = text.strip().upper().replace(' ', '')
+    if not text:
+        return None
+    units = {'TB': 1024 ** 4, 'GB': 1024 ** 3, 'MB': MB, 'KB': 1024, 'B': 1}
+    for unit, factor in units.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(float(text))
+
+
+def parse_date(text):
+    """Parse 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM' (UTC) into a timestamp; blank means no limit"""
+    text = text.strip()
+    if not text:
+        return None
+    fmt = '%Y-%m-%d %H:%M' if ' ' in text else '%Y-%m-%d'
+    return datetime.strptime(text, fmt).replace(tzinfo=timezone.utc).timestamp()
+
+
+class BucketIndex:
+    """Persistent SQLite index of one bucket's keys
+
+    A full recursive listing populates the index once. After that, prefixes
+    are kept fresh by re-listing just the prefixes that are viewed or changed,
+    and by applying this app's own uploads and deletes directly.
+
+    Every write stamps rows with the time it happened (milliseconds) in
+    `seen`. A recursive sync sweeps only rows stamped before it started, so
+    uploads and folder listings that land while it runs are kept.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            key TEXT PRIMARY KEY, parent TEXT NOT NULL, name TEXT NOT NULL,
+            size INTEGER NOT NULL, mtime REAL NOT NULL, etag TEXT, seen INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS objects_parent ON objects (parent, name);
+        CREATE INDEX IF NOT EXISTS objects_name ON objects (name);
+        CREATE TABLE IF NOT EXISTS dirs (
+            prefix TEXT PRIMARY KEY, parent TEXT NOT NULL, seen INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent, prefix);
+        CREATE TABLE IF NOT EXISTS synced (
+            prefix TEXT PRIMARY KEY, synced_at REAL NOT NULL, recursive INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+    UPSERT_DIR = ("INSERT INTO dirs (prefix, parent, seen) VALUES (?, ?, ?) "
+                  "ON CONFLICT(prefix) DO UPDATE SET seen = MAX(seen, excluded.seen)")
+
+    def __init__(self, bucket, path=None):
+        self.bucket = bucket
+        if path is None:
+            path = os.path.join(APP_DATA_DIR, "index", f"{bucket}.sqlite")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # Freshness
+    def is_fresh(self, prefix, max_age):
+        """True if prefix was listed, directly or by a recursive ancestor sync, within max_age seconds"""
+        candidates = [prefix] + (parent_prefixes(prefix) if prefix else [])
+        placeholders = ",".join("?" * len(candidates))
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT MAX(synced_at) FROM synced WHERE prefix = ? "
+                f"OR (recursive = 1 AND prefix IN ({placeholders}))",
+                [prefix] + candidates
+            ).fetchone()
+        return bool(row[0]) and time.time() - row[0] <= max_age
+
+    def has_full_sync(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM synced WHERE prefix = '' AND recursive = 1").fetchone() is not None
+
+    def _mark_synced(self, prefix, recursive):
+        self.conn.execute("INSERT OR REPLACE INTO synced VALUES (?, ?, ?)",
+                          (prefix, time.time(), int(recursive)))
+
+    # Reads
+    def list_children(self, prefix):
+        """Build a ListingStore of the direct children of a prefix"""
+        store = ListingStore()
+        with self._lock:
+            folders = [row[0][len(prefix):].rstrip('/') for row in self.conn.execute(
+                "SELECT prefix FROM dirs WHERE parent = ? ORDER BY prefix", (prefix,))]
+            files = self.conn.execute(
+                "SELECT name, size, mtime, etag FROM objects WHERE parent = ? AND name != '' ORDER BY name",
+                (prefix,)).fetchall()
+        store.extend(folders, files)
+        return store
+
+    def prefix_stats(self, prefix):
+        """Return (object count, total bytes) for everything under a prefix"""
+        with self._lock:
+            count, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects WHERE key >= ? AND key < ?",
+                (prefix, prefix_upper_bound(prefix))).fetchone()
+        return count, total
+
+    # Full / recursive sync
+    def sync_recursive(self, s3_client, prefix='', pages=None, on_progress=None, cancelled=None):
+        """Re-list everything under a prefix and replace that part of the index
+
+        pages may be any iterable of list_objects_v2 pages (without a
+        delimiter); it defaults to a single paginator over the prefix.
+        """
+        if pages is None:
+            paginator = s3_client.get_paginator('list_objects_v2')
+            pages = paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+
+        generation = self._stamp()
+        indexed = 0
+        for page in pages:
+            if cancelled and cancelled():
+                return indexed
+            indexed += self._upsert_objects(page.get('Contents', []), generation)
+            if on_progress:
+                on_progress(indexed)
+
+        # Sweep anything under the prefix that neither the listing nor a concurrent write touched
+        with self._lock:
+            bounds = (prefix, prefix_upper_bound(prefix), generation)
+            self.conn.execute("DELETE FROM objects WHERE key >= ? AND key < ? AND seen < ?", bounds)
+            self.conn.execute("DELETE FROM dirs WHERE prefix >= ? AND prefix < ? AND seen < ?", bounds)
+            self.conn.execute("DELETE FROM synced WHERE prefix > ? AND prefix < ?", bounds[:2])
+            self._mark_synced(prefix, recursive=True)
+            self.conn.commit()
+        return indexed
+
+    @staticmethod
+    def _stamp():
+        """Value for the seen column: now, in milliseconds"""
+        return int(time.time() * 1000)
+
+    def _upsert_objects(self, objects, generation):
+        """Insert or refresh listed objects and the folder rows above them"""
+        rows = []
+        dirs = set()
+        for obj in objects:
+            key = obj['Key']
+            parent, name = split_key(key)
+            rows.append((key, parent, name, obj['Size'],
+                         obj['LastModified'].timestamp(), obj.get('ETag', '').strip('"'), generation))
+            dirs.update(folder_prefixes(parent))
+
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(self.UPSERT_DIR, [(d, parent_prefixes(d)[0], generation) for d in dirs])
+            self.conn.commit()
+        return len(rows)
+
+    # Search
+    def search(self, pattern='', mode='glob', min_size=None, max_size=None,
+               since=None, until=None, limit=5000, batch_size=500, cancelled=None):
+        """Yield batches of (key, size, mtime) matching the filters
+
+        A glob without '/' matches object names, otherwise whole keys. A
+        leading literal in a glob narrows the search to a range of the key
+        primary key or the name index, so 'logs/2024*' or 'report*' stay fast
+        on millions of keys; a glob starting with a wildcard scans the table.
+
+        A regex is run by Python over every candidate row, which costs a
+        full table scan. A '^literal' start narrows it to a key range, and
+        a literal the pattern must contain is checked with instr() in
+        SQLite first, so Python only sees rows that can match.
+        Runs on its own connection so long searches don't block the index.
+        """
+        clauses = ["name != ''"]
+        params = []
+
+        if pattern and mode == 'regex':
+            prefix, literal = regex_literals(pattern)
+            if prefix:
+                clauses.append("key >= ? AND key < ?")
+                params += [prefix, prefix_upper_bound(prefix)]
+            if literal and literal != prefix:
+                clauses.append("instr(key, ?) > 0")
+                params.append(literal)
+            clauses.append("key REGEXP ?")
+            params.append(pattern)
+        elif pattern:
+            column = 'key' if '/' in pattern else 'name'
+            literal = re.split(r'[*?\[]', pattern, 1)[0]
+            if literal:
+                clauses.append(f"{column} >= ? AND {column} < ?")
+                params += [literal, prefix_upper_bound(literal)]
+            clauses.append(f"{column} GLOB ?")
+            params.append(pattern)
+
+        for clause, value in (("size >= ?", min_size), ("size <= ?", max_size),
+                              ("mtime >= ?", since), ("mtime <= ?", until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+
+        conn = sqlite3.connect(self.path)
+        try:
+            if mode == 'regex':
+                compiled = re.compile(pattern)
+                conn.create_function("REGEXP", 2,
+                                     lambda expr, value: compiled.search(value) is not None,
+                                     deterministic=True)
+            cursor = conn.execute(
+                f"SELECT key, size, mtime FROM objects WHERE {' AND '.join(clauses)} ORDER BY key LIMIT ?",
+                params + [limit])
+            while True:
+                if cancelled and cancelled():
+                    return
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    return
+                yield batch
+        finally:
+            conn.close()
+
+    # Incremental updates
+    def apply_listing(self, prefix, store):
+        """Replace a prefix's direct children with a fresh delimiter listing"""
+        folders = {prefix + name + '/' for name in store.folders}
+        names = set(store.names)
+        with self._lock:
+            existing_files = {row[0] for row in self.conn.execute(
+                "SELECT name FROM objects WHERE parent = ? AND name != ''", (prefix,))}
+            existing_dirs = {row[0] for row in self.conn.execute(
+                "SELECT prefix FROM dirs WHERE parent = ?", (prefix,))}
+
+            self.conn.executemany("DELETE FROM objects WHERE key = ?",
+                                  [(prefix + name,) for name in existing_files - names])
+            for gone in existing_dirs - folders:
+                self._delete_tree(gone)
+
+            seen = self._stamp()
+            # A store without an ETag keeps the indexed one only while size and mtime still match
+            self.conn.executemany(
+                "INSERT INTO objects (key, parent, name, size, mtime, etag, seen) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                "etag = CASE WHEN excluded.etag IS NOT NULL THEN excluded.etag "
+                "WHEN size = excluded.size AND mtime = excluded.mtime THEN etag END, "
+                "seen = MAX(seen, excluded.seen)",
+                [(prefix + name, prefix, name, size, mtime, etag, seen)
+                 for name, size, mtime, etag in zip(store.names, store.sizes, store.mtimes, store.etags)])
+            self.conn.executemany(self.UPSERT_DIR, [(d, prefix, seen) for d in folders])
+            self._mark_synced(prefix, recursive=False)
+            self.conn.commit()
+
+    def put_object(self, key, size, mtime, etag=''):
+        """Record an object written by this app"""
+        parent, name = split_key(key)
+        seen = self._stamp()
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO objects (key, parent, name, size, mtime, etag, seen) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (key, parent, name, size, mtime, etag, seen))
+            self.conn.executemany(self.UPSERT_DIR,
+                                  [(d, parent_prefixes(d)[0], seen) for d in folder_prefixes(parent)])
+            self.conn.commit()
+
+    def remove_key(self, key):
+        """Forget an object deleted by this app"""
+        with self._lock:
+            self.conn.execute("DELETE FROM objects WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def remove_prefix(self, prefix):
+        """Forget everything under a folder deleted by this app"""
+        with self._lock:
+            self._delete_tree(prefix)
+            self.conn.commit()
+
+    def _delete_tree(self, prefix):
+        bounds = (prefix, prefix_upper_bound(prefix))
+        self.conn.execute("DELETE FROM objects WHERE key >= ? AND key < ?", bounds)
+        self.conn.execute("DELETE FROM dirs WHERE prefix >= ? AND prefix < ?", bounds)
+        self.conn.execute("DELETE FROM synced WHERE prefix >= ? AND prefix < ?", bounds)
+
+
 class EnhancedS3FileManager:
     def __init__(self, root):
         self.root = root
@@ -37,20 +3283,92 @@ class EnhancedS3FileManager:
 
         self.s3_client = None
         self.s3_resource = None
+        self.client_factory = None
+        self.metrics = S3Metrics()
         self.is_connected = False
         self.upload_progress = IntVar()
 
+        # Transfer tuning
+        self.max_concurrency = IntVar(value=8)  # Files in flight
+        self.part_concurrency = IntVar(value=4)  # Parts in flight per file
+        self.part_size_mb = IntVar(value=8)  # Multipart / ranged GET part size
+        self.adaptive_concurrency = BooleanVar(value=False)  # Tune files / listing requests in flight
+        self.transfer_concurrency = AdaptiveConcurrency(maximum=64)
+        self.listing_concurrency = AdaptiveConcurrency(maximum=32)
+
+        # Bandwidth caps in MB/s (0 = unlimited), optionally only within daily hours
+        self.upload_limit_mbps = DoubleVar(value=0)
+        self.download_limit_mbps = DoubleVar(value=0)
+        self.limit_hours = StringVar(value="")
+        self.upload_limiter = BandwidthLimiter()
+        self.download_limiter = BandwidthLimiter()
+
+        # Local bucket index
+        self.use_index = BooleanVar(value=False)
+        self.index_max_age = 3600  # Seconds before an indexed prefix is re-listed
+        self.stall_threshold_ms = 500  # Event-loop stalls longer than this are recorded
+        self.bucket_index = None
+
+        # Incremental upload sync
+        self.sync_check_remote = BooleanVar(value=False)
+        self.upload_recursive = BooleanVar(value=False)  # Upload All / Selected / Sync include subfolders
+        self.folder_watcher = None  # FolderWatcher auto-uploading the local folder, while watching
+        self.upload_manifest = None
+
+        # Journal of in-progress multipart uploads, for resuming
+        try:
+            self.multipart_journal = MultipartJournal()
+        except OSError as e:
+            print(f"Error opening upload journal: {e}")
+            self.multipart_journal = None
+
         # File management
         self.current_objects = []
         self.selected_items = []
         self.navigation_history = []
         self.history_index = -1
+        self.listing_cache = ListingCache()
+
+        # Background listing state; bumping the generation cancels a running listing
+        self.listing_generation = 0
+        self.listing_queue = queue.Queue()
+        self.listing_target = None
 
         # Load saved settings
         self.load_settings()
 
+        # Every upload and download goes through one queue sharing the files-in-flight budget
+        self.transfer_queue = TransferQueue(max_active=self.max_concurrency.get(),
+                                            controller=self.transfer_concurrency)
+        self.max_concurrency.trace_add('write', self.on_max_concurrency_change)
+        self.adaptive_concurrency.trace_add('write', self.on_max_concurrency_change)
+        self.on_max_concurrency_change()
+
+        # Caps apply to running transfers as soon as they are edited
+        for var in (self.upload_limit_mbps, self.download_limit_mbps, self.limit_hours):
+            var.trace_add('write', self.apply_bandwidth_limits)
+        self.apply_bandwidth_limits()
+
+        self.transfer_progress = TransferProgress()
+
+        # Worker threads post status and dialogs through here
+        self.ui_updates = UIUpdateQueue(self.root, self.show_status)
+
         self.build_ui()
 
+        # Pump background listing pages and worker updates into the UI
+        self.root.after(50, self.drain_listing_queue)
+        self.root.after(1000, self.update_concurrency_label)
+        self.root.after(250, self.update_transfer_progress)
+        self.ui_updates.start()
+
+        # Record event-loop freezes; S3_MANAGER_PROFILE=1 profiles the whole session
+        self.watchdog = StallWatchdog(self.root, threshold=self.stall_threshold_ms / 1000.0,
+                                      current_call=self.metrics.current_call, on_stall=self.on_stall)
+        self.watchdog.start()
+        if os.getenv("S3_MANAGER_PROFILE"):
+            self.watchdog.start_profiling()
+
     def load_settings(self):
         """Load saved AWS settings"""
         try:
@@ -59,6 +3377,18 @@ class EnhancedS3FileManager:
                     settings = json.load(f)
                     self.aws_key.set(settings.get("access_key", ""))
                     self.aws_region.set(settings.get("region", "us-east-1"))
+                    self.max_concurrency.set(settings.get("max_concurrency", 8))
+                    self.part_concurrency.set(settings.get("part_concurrency", 4))
+                    self.part_size_mb.set(settings.get("part_size_mb", 8))
+                    self.adaptive_concurrency.set(settings.get("adaptive_concurrency", False))
+                    self.use_index.set(settings.get("use_index", False))
+                    self.index_max_age = settings.get("index_max_age", 3600)
+                    self.stall_threshold_ms = settings.get("stall_threshold_ms", 500)
+                    self.sync_check_remote.set(settings.get("sync_check_remote", False))
+                    self.upload_recursive.set(settings.get("upload_recursive", False))
+                    self.upload_limit_mbps.set(settings.get("upload_limit_mbps", 0))
+                    self.download_limit_mbps.set(settings.get("download_limit_mbps", 0))
+                    self.limit_hours.set(settings.get("limit_hours", ""))
         except Exception as e:
             print(f"Error loading settings: {e}")
 
@@ -67,7 +3397,19 @@ class EnhancedS3FileManager:
         try:
             settings = {
                 "access_key": self.aws_key.get(),
-                "region": self.aws_region.get()
+                "region": self.aws_region.get(),
+                "max_concurrency": self.max_concurrency.get(),
+                "part_concurrency": self.part_concurrency.get(),
+                "part_size_mb": self.part_size_mb.get(),
+                "adaptive_concurrency": self.adaptive_concurrency.get(),
+                "use_index": self.use_index.get(),
+                "index_max_age": self.index_max_age,
+                "stall_threshold_ms": self.stall_threshold_ms,
+                "sync_check_remote": self.sync_check_remote.get(),
+                "upload_recursive": self.upload_recursive.get(),
+                "upload_limit_mbps": self.upload_limit_mbps.get(),
+                "download_limit_mbps": self.download_limit_mbps.get(),
+                "limit_hours": self.limit_hours.get()
             }
             with open("s3_settings.json", "w") as f:
                 json.dump(settings, f, indent=2)
@@ -198,6 +3540,71 @@ class EnhancedS3FileManager:
         self.bucket_dropdown.grid(row=0, column=3, padx=5)
         self.bucket_dropdown.bind("<<ComboboxSelected>>", self.on_bucket_change)
 
+        # Transfer concurrency
+        Label(creds_grid, text="Parallel Files:",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=1, column=2, sticky='e', padx=15)
+
+        concurrency_frame = Frame(creds_grid, bg=self.colors['bg_secondary'])
+        concurrency_frame.grid(row=1, column=3, sticky='w', padx=5)
+
+        Spinbox(concurrency_frame, from_=1, to=64, textvariable=self.max_concurrency, width=5,
+                font=self.fonts['default']).pack(side=LEFT)
+
+        Checkbutton(concurrency_frame, text="Auto-tune", variable=self.adaptive_concurrency,
+                    bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                    font=self.fonts['default'],
+                    activebackground=self.colors['bg_secondary']).pack(side=LEFT, padx=(10, 0))
+
+        Label(creds_grid, text="Parts per File:",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=2, column=2, sticky='e', padx=15)
+
+        Spinbox(creds_grid, from_=1, to=32, textvariable=self.part_concurrency, width=5,
+                font=self.fonts['default']).grid(row=2, column=3, sticky='w', padx=5)
+
+        Label(creds_grid, text="Part Size (MB):",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=0, column=4, sticky='e', padx=15)
+
+        Spinbox(creds_grid, from_=5, to=512, textvariable=self.part_size_mb, width=5,
+                font=self.fonts['default']).grid(row=0, column=5, sticky='w', padx=5)
+
+        # Bandwidth caps
+        Label(creds_grid, text="Upload MB/s:",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=1, column=4, sticky='e', padx=15)
+
+        Spinbox(creds_grid, from_=0, to=10000, increment=0.5, textvariable=self.upload_limit_mbps, width=5,
+                font=self.fonts['default']).grid(row=1, column=5, sticky='w', padx=5)
+
+        Label(creds_grid, text="Download MB/s:",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=2, column=4, sticky='e', padx=15)
+
+        Spinbox(creds_grid, from_=0, to=10000, increment=0.5, textvariable=self.download_limit_mbps, width=5,
+                font=self.fonts['default']).grid(row=2, column=5, sticky='w', padx=5)
+
+        Label(creds_grid, text="Limit Hours:",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_primary'],
+              font=self.fonts['bold']).grid(row=0, column=6, sticky='e', padx=15)
+
+        Entry(creds_grid, textvariable=self.limit_hours, width=12,
+              font=self.fonts['mono'],
+              bg='white', fg=self.colors['text_primary'],
+              insertbackground=self.colors['text_primary']).grid(row=0, column=7, sticky='w', padx=5)
+
+        Label(creds_grid, text="(0 = unlimited; e.g. 09:00-18:00, blank = always)",
+              bg=self.colors['bg_secondary'],
+              fg=self.colors['text_muted'],
+              font=self.fonts['small']).grid(row=1, column=6, columnspan=2, sticky='w', padx=15)
+
     def create_navigation_frame(self):
         """Create Windows-like path navigation frame"""
         nav_frame = LabelFrame(self.root, text="📁 Path Navigation",
@@ -242,6 +3649,11 @@ class EnhancedS3FileManager:
         self.path_entry.pack(side=LEFT, padx=10, fill='x', expand=True)
         self.path_entry.bind('<Return>', lambda e: self.navigate_to_path())
 
+        Button(path_frame, text="🔍 Search", command=self.open_search_window,
+               bg=self.colors['info'], fg='white',
+               font=self.fonts['default'],
+               activebackground='#0aa2c0', activeforeground='white').pack(side=RIGHT, padx=2)
+
         Button(path_frame, text="Go", command=self.navigate_to_path,
                bg=self.colors['warning'], fg='white',
                font=self.fonts['bold'],
@@ -290,6 +3702,11 @@ class EnhancedS3FileManager:
                font=self.fonts['default'],
                activebackground='#157347', activeforeground='white').pack(side=LEFT, padx=2)
 
+        Button(toolbar, text="🪞 Mirror", command=self.mirror_current_folder,
+               bg='#20c997', fg='white',
+               font=self.fonts['default'],
+               activebackground='#1aa181', activeforeground='white').pack(side=LEFT, padx=2)
+
         Button(toolbar, text="🗑 Delete", command=self.delete_selected,
                bg=self.colors['danger'], fg='white',
                font=self.fonts['default'],
@@ -300,6 +3717,22 @@ class EnhancedS3FileManager:
                font=self.fonts['default'],
                activebackground='#e85d04', activeforeground='white').pack(side=LEFT, padx=2)
 
+        Button(toolbar, text="🧩 Uploads", command=self.open_multipart_window,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'],
+               font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2)
+
+        Button(toolbar, text="🗄 Rebuild Index", command=self.rebuild_index,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'],
+               font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2)
+
+        Checkbutton(toolbar, text="Use local index", variable=self.use_index,
+                    command=self.open_bucket_index,
+                    bg=self.colors['bg_primary'], fg=self.colors['text_primary'],
+                    font=self.fonts['default'],
+                    activebackground=self.colors['bg_primary']).pack(side=RIGHT, padx=2)
+
         # File list with columns
         columns = ('Name', 'Type', 'Size', 'Modified')
         self.s3_tree = ttk.Treeview(s3_frame, columns=columns, show='tree headings', height=15)
@@ -320,9 +3753,14 @@ class EnhancedS3FileManager:
                 self.s3_tree.column(col, width=80)
 
         # Scrollbars
-        v_scroll = ttk.Scrollbar(s3_frame, orient=VERTICAL, command=self.s3_tree.yview)
+        v_scroll = ttk.Scrollbar(s3_frame, orient=VERTICAL)
         h_scroll = ttk.Scrollbar(s3_frame, orient=HORIZONTAL, command=self.s3_tree.xview)
-        self.s3_tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        self.s3_tree.configure(xscrollcommand=h_scroll.set)
+
+        # Only on-screen rows exist in the tree; the view maps them onto the listing
+        self.s3_view = VirtualListView(self.s3_tree, v_scroll, self.format_s3_row)
+        for col in columns:
+            self.s3_tree.heading(col, command=lambda c=col: self.s3_view.sort_by(c))
 
         # Grid treeview and scrollbars
         self.s3_tree.grid(row=1, column=0, sticky='nsew')
@@ -366,6 +3804,27 @@ class EnhancedS3FileManager:
                font=self.fonts['default'],
                activebackground='#1aa181', activeforeground='white').pack(side=LEFT, padx=2)
 
+        Button(toolbar, text="🔁 Sync", command=self.sync_upload_all,
+               bg=self.colors['warning'], fg='white',
+               font=self.fonts['default'],
+               activebackground='#e85d04', activeforeground='white').pack(side=LEFT, padx=2)
+
+        Checkbutton(toolbar, text="Compare with S3", variable=self.sync_check_remote,
+                    bg=self.colors['bg_primary'], fg=self.colors['text_primary'],
+                    font=self.fonts['default'],
+                    activebackground=self.colors['bg_primary']).pack(side=LEFT, padx=2)
+
+        Checkbutton(toolbar, text="Include subfolders", variable=self.upload_recursive,
+                    bg=self.colors['bg_primary'], fg=self.colors['text_primary'],
+                    font=self.fonts['default'],
+                    activebackground=self.colors['bg_primary']).pack(side=LEFT, padx=2)
+
+        self.watch_button = Button(toolbar, text="👁 Watch", command=self.toggle_watch,
+                                   bg=self.colors['bg_accent'], fg=self.colors['text_primary'],
+                                   font=self.fonts['default'],
+                                   activebackground=self.colors['bg_secondary'])
+        self.watch_button.pack(side=LEFT, padx=2)
+
         # Local path display with consistent styling
         self.local_path_var = StringVar(value=os.getcwd())
         local_path_frame = Frame(local_frame, bg=self.colors['bg_primary'])
@@ -400,9 +3859,15 @@ class EnhancedS3FileManager:
                 self.local_tree.column(col, width=80)
 
         # Scrollbars for local tree
-        local_v_scroll = ttk.Scrollbar(local_frame, orient=VERTICAL, command=self.local_tree.yview)
+        local_v_scroll = ttk.Scrollbar(local_frame, orient=VERTICAL)
         local_h_scroll = ttk.Scrollbar(local_frame, orient=HORIZONTAL, command=self.local_tree.xview)
-        self.local_tree.configure(yscrollcommand=local_v_scroll.set, xscrollcommand=local_h_scroll.set)
+        self.local_tree.configure(xscrollcommand=local_h_scroll.set)
+
+        # Same virtual rendering as the S3 pane, so 100k-file folders stay responsive
+        self.local_view = VirtualListView(self.local_tree, local_v_scroll, self.format_local_row)
+        for col in columns:
+            self.local_tree.heading(col, command=lambda c=col: self.local_view.sort_by(c))
+        self.local_generation = 0  # Bumped on every refresh to drop pages from stale scans
 
         # Grid local treeview and scrollbars
         self.local_tree.grid(row=2, column=0, sticky='nsew')
@@ -427,9 +3892,29 @@ class EnhancedS3FileManager:
                                   anchor='w', font=self.fonts['default'])
         self.status_label.pack(side=LEFT, padx=10)
 
-        # Progress bar
+        # Byte progress of all running transfers, sampled a few times a second
         self.progress_bar = ttk.Progressbar(status_frame, mode='determinate', length=300)
         self.progress_bar.pack(side=RIGHT, padx=10, pady=5)
+        self.throughput_label = Label(status_frame, text="",
+                                      bg=self.colors['bg_secondary'],
+                                      fg=self.colors['text_secondary'],
+                                      font=self.fonts['small'])
+        self.throughput_label.pack(side=RIGHT)
+
+        Button(status_frame, text="📋 Transfers", command=self.open_transfers_window,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2, pady=2)
+
+        Button(status_frame, text="📊 Stats", command=self.open_stats_window,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2, pady=2)
+
+        # Current / peak concurrency, updated once a second
+        self.concurrency_label = Label(status_frame, text="",
+                                       bg=self.colors['bg_secondary'],
+                                       fg=self.colors['text_secondary'],
+                                       font=self.fonts['small'])
+        self.concurrency_label.pack(side=RIGHT, padx=10)
 
         # Connection status with consistent styling
         self.connection_status = Label(status_frame, text="● Disconnected",
@@ -449,12 +3934,14 @@ class EnhancedS3FileManager:
                 messagebox.showerror("Error", "Please provide AWS credentials")
                 return
 
-            self.s3_client = boto3.client(
-                's3',
-                region_name=self.aws_region.get(),
-                aws_access_key_id=self.aws_key.get(),
-                aws_secret_access_key=self.aws_secret.get()
+            self.client_factory = S3ClientFactory(
+                self.aws_region.get(),
+                self.aws_key.get(),
+                self.aws_secret.get(),
+                on_create=self.instrument_client
             )
+            self.s3_client = self.client_factory.client(self.required_connections())
+            self.listing_cache.clear()
 
             # Test connection
             response = self.s3_client.list_buckets()
@@ -465,9 +3952,13 @@ class EnhancedS3FileManager:
                 self.bucket_name.set(buckets[0])
 
             self.is_connected = True
+            self.open_bucket_index()
             self.connection_status.config(text="● Connected", fg=self.colors['success'])
             self.update_status(f"Connected successfully. Found {len(buckets)} buckets.")
 
+            if self.multipart_journal and self.multipart_journal.entries(self.bucket_name.get()):
+                self.update_status("Connected. Interrupted uploads can be resumed from 🧩 Uploads.")
+
             # Load initial S3 content
             if buckets:
                 self.refresh_s3_files()
@@ -492,6 +3983,7 @@ class EnhancedS3FileManager:
             self.current_path.set("/")
             self.navigation_history = ["/"]
             self.history_index = 0
+            self.open_bucket_index()
             self.refresh_s3_files()
 
     # Navigation Methods
@@ -551,128 +4043,183 @@ class EnhancedS3FileManager:
 
     def refresh_current_path(self):
         """Refresh current path"""
-        self.refresh_s3_files()
+        self.refresh_s3_files(force=True)
 
     # File Browser Methods
-    def refresh_s3_files(self):
-        """Refresh S3 file listing"""
+    def refresh_s3_files(self, force=False):
+        """Refresh S3 file listing, reusing a cached listing unless forced
+
+        Uncached prefixes are listed on a background thread and streamed into
+        the tree page by page. Starting a new refresh cancels the previous one.
+        """
         if not self.is_connected or not self.bucket_name.get():
             return
 
         try:
-            self.update_status("Loading S3 files...")
-
-            # Clear existing items
-            for item in self.s3_tree.get_children():
-                self.s3_tree.delete(item)
+            self.listing_generation += 1
+            generation = self.listing_generation
 
             bucket = self.bucket_name.get()
             prefix = self.current_path.get().lstrip("/")
             if prefix and not prefix.endswith("/"):
                 prefix += "/"
 
-            # List objects
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(
-                Bucket=bucket,
-                Prefix=prefix,
-                Delimiter='/'
-            )
+            self.listing_target = (generation, bucket, prefix)
 
-            folders = set()
-            files = []
+            cached = None if force else self.listing_cache.get(bucket, prefix)
+            if cached:
+                self.s3_view.set_store(cached)
+                self.update_status(f"Loaded {len(cached.folders)} folders and {len(cached.names)} files (cached)")
+                return
 
-            for page in page_iterator:
-                # Add folders (common prefixes)
-                for folder_info in page.get('CommonPrefixes', []):
-                    folder_name = folder_info['Prefix'][len(prefix):].rstrip('/')
-                    if folder_name:
-                        folders.add(folder_name)
-
-                # Add files
-                for obj in page.get('Contents', []):
-                    key = obj['Key']
-                    if key != prefix:  # Don't show the current directory itself
-                        file_name = key[len(prefix):]
-                        if '/' not in file_name:  # Only direct children
-                            files.append({
-                                'name': file_name,
-                                'key': key,
-                                'size': obj['Size'],
-                                'modified': obj['LastModified'].strftime('%Y-%m-%d %H:%M:%S'),
-                                'type': 'File'
-                            })
-
-            # Insert folders first
-            for folder in sorted(folders):
-                self.s3_tree.insert('', 'end', text='📁', values=(folder, 'Folder', '', ''))
-
-            # Insert files
-            for file_info in sorted(files, key=lambda x: x['name']):
-                size_str = self.format_file_size(file_info['size'])
-                icon = self.get_file_icon(file_info['name'])
-                self.s3_tree.insert('', 'end', text=icon, values=(
-                    file_info['name'], file_info['type'], size_str, file_info['modified']
-                ))
-
-            self.update_status(f"Loaded {len(folders)} folders and {len(files)} files")
+            index = self.index_for(bucket)
+            if index and not force and index.is_fresh(prefix, self.index_max_age):
+                store = index.list_children(prefix)
+                self.listing_cache.put(bucket, prefix, store)
+                self.s3_view.set_store(store)
+                self.update_status(f"Loaded {len(store.folders)} folders and {len(store.names)} files (index)")
+                return
+
+            self.s3_view.set_store(ListingStore())
+            self.update_status("Loading S3 files...")
+            threading.Thread(target=self.listing_worker,
+                             args=(generation, bucket, prefix, self.create_lister()), daemon=True).start()
 
         except Exception as e:
             self.update_status("Error loading S3 files")
             messagebox.showerror("Error", f"Error loading S3 files:\n{str(e)}")
 
-    def refresh_local_files(self):
-        """Refresh local file listing"""
+    def listing_worker(self, generation, bucket, prefix, lister):
+        """List a prefix off the Tk thread, queueing each page for the tree"""
         try:
-            # Clear existing items
-            for item in self.local_tree.get_children():
-                self.local_tree.delete(item)
-
-            current_dir = self.local_path_var.get()
-
-            # List directory contents
-            items = os.listdir(current_dir)
+            for folders, files in self.iter_s3_prefix_pages(bucket, prefix, lister):
+                if generation != self.listing_generation:
+                    return  # Cancelled by a newer refresh
+                self.listing_queue.put(('page', generation, folders, files))
+            self.listing_queue.put(('done', generation, None, None))
+        except Exception as e:
+            self.listing_queue.put(('error', generation, str(e), None))
 
+    def drain_listing_queue(self):
+        """Apply queued listing pages to the tree (runs on the Tk thread)"""
+        try:
+            # Bound the work per tick so the window stays responsive
+            for _ in range(5):
+                kind, generation, first, second = self.listing_queue.get_nowait()
+                if generation != self.listing_generation:
+                    continue  # Stale page from a cancelled listing
+
+                _, bucket, prefix = self.listing_target
+                store = self.s3_view.store
+                if kind == 'page':
+                    store.extend(first, second)
+                    self.s3_view.refresh()
+                    self.update_status(f"Loading S3 files... {len(store)} objects so far")
+                elif kind == 'done':
+                    self.listing_cache.put(bucket, prefix, store)
+                    index = self.index_for(bucket)
+                    if index:
+                        threading.Thread(target=index.apply_listing, args=(prefix, store), daemon=True).start()
+                    self.update_status(f"Loaded {len(store.folders)} folders "
+                                       f"and {len(store.names)} files")
+                else:
+                    self.update_status("Error loading S3 files")
+                    messagebox.showerror("Error", f"Error loading S3 files:\n{first}")
+        except queue.Empty:
+            pass
+
+        self.root.after(50, self.drain_listing_queue)
+
+    def format_s3_row(self, is_folder, name, size, mtime):
+        """Build the icon and column values for one S3 listing row"""
+        if is_folder:
+            return '📁', (name, 'Folder', '', '')
+        modified = datetime.fromtimestamp(mtime, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return self.get_file_icon(name), (name, 'File', self.format_file_size(size), modified)
+
+    def iter_s3_prefix_pages(self, bucket, prefix, lister):
+        """Yield (folders, files) for each listing page of a prefix's direct children
+
+        Files are (name, size, mtime, etag) tuples ready for a ListingStore. The
+        lister merges its ranges back in key order, so pages arrive already sorted.
+        """
+        page_iterator = lister.iter_pages(bucket, prefix, delimiter='/')
+
+        for page in page_iterator:
             folders = []
             files = []
 
-            for item in items:
-                item_path = os.path.join(current_dir, item)
-                try:
-                    if os.path.isdir(item_path):
-                        folders.append(item)
-                    else:
-                        stat = os.stat(item_path)
-                        files.append({
-                            'name': item,
-                            'size': stat.st_size,
-                            'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                except (OSError, PermissionError):
-                    continue
+            # Add folders (common prefixes)
+            for folder_info in page.get('CommonPrefixes', []):
+                folder_name = folder_info['Prefix'][len(prefix):].rstrip('/')
+                if folder_name:
+                    folders.append(folder_name)
 
-            # Insert folders first
-            for folder in sorted(folders):
-                self.local_tree.insert('', 'end', text='📁', values=(folder, 'Folder', '', ''))
+            # Add files
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if key != prefix:  # Don't show the current directory itself
+                    file_name = key[len(prefix):]
+                    if '/' not in file_name:  # Only direct children
+                        files.append((file_name, obj['Size'], obj['LastModified'].timestamp(),
+                                      obj.get('ETag', '').strip('"')))
 
-            # Insert files
-            for file_info in sorted(files, key=lambda x: x['name']):
-                size_str = self.format_file_size(file_info['size'])
-                icon = self.get_file_icon(file_info['name'])
-                self.local_tree.insert('', 'end', text=icon, values=(
-                    file_info['name'], 'File', size_str, file_info['modified']
-                ))
+            yield folders, files
+
+    def refresh_local_files(self):
+        """Refresh local file listing in the background, filling the pane as pages arrive"""
+        self.local_generation += 1
+        self.local_view.set_store(ListingStore())
+        threading.Thread(target=self.local_listing_worker,
+                         args=(self.local_generation, self.local_path_var.get()), daemon=True).start()
+
+    def local_listing_worker(self, generation, directory):
+        """Scan a local folder, posting pages and finally a name-sorted listing to the Tk thread"""
+        cancelled = lambda: generation != self.local_generation
+        try:
+            folders, files = [], []
+            for page_folders, page_files in scan_directory(directory, cancelled=cancelled):
+                folders += page_folders
+                files += page_files
+                self.run_in_ui(self.add_local_page, generation, page_folders, page_files)
+                self.update_status(f"Loading local files... {len(folders) + len(files)} so far")
+            if cancelled():
+                return
 
+            # Pages arrive in directory order; the finished listing is shown sorted by name
+            store = ListingStore()
+            store.extend(sorted(folders), sorted(files))
+            self.run_in_ui(self.finish_local_listing, generation, store)
         except Exception as e:
-            messagebox.showerror("Error", f"Error loading local files:\n{str(e)}")
+            self.run_in_ui(self.fail_local_listing, generation, str(e))
+
+    def add_local_page(self, generation, folders, files):
+        if generation == self.local_generation:
+            self.local_view.store.extend(folders, files)
+            self.local_view.refresh()
+
+    def finish_local_listing(self, generation, store):
+        if generation == self.local_generation:
+            self.local_view.replace_store(store)
+            self.update_status(f"Loaded {len(store.folders)} local folders and {len(store.names)} files")
+
+    def fail_local_listing(self, generation, error):
+        if generation == self.local_generation:
+            self.update_status("Error loading local files")
+            messagebox.showerror("Error", f"Error loading local files:\n{error}")
+
+    def format_local_row(self, is_folder, name, size, mtime):
+        """Build the icon and column values for one local listing row"""
+        if is_folder:
+            return '📁', (name, 'Folder', '', '')
+        modified = datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
+        return self.get_file_icon(name), (name, 'File', self.format_file_size(size), modified)
 
     def on_s3_double_click(self, event):
         """Handle double-click on S3 tree item"""
-        selection = self.s3_tree.selection()
-        if selection:
-            item = self.s3_tree.item(selection[0])
-            name = item['values'][0]
-            item_type = item['values'][1]
+        entry = self.s3_view.entry_at(event.y)
+        if entry:
+            name, item_type = entry
 
             if item_type == 'Folder':
                 # Navigate to folder
@@ -684,11 +4231,9 @@ class EnhancedS3FileManager:
 
     def on_local_double_click(self, event):
         """Handle double-click on local tree item"""
-        selection = self.local_tree.selection()
-        if selection:
-            item = self.local_tree.item(selection[0])
-            name = item['values'][0]
-            item_type = item['values'][1]
+        entry = self.local_view.entry_at(event.y)
+        if entry:
+            name, item_type = entry
 
             if item_type == 'Folder':
                 # Navigate to folder
@@ -723,6 +4268,7 @@ class EnhancedS3FileManager:
             # Create empty object with trailing slash to represent folder
             s3_key = current + folder_name + "/"
             self.s3_client.put_object(Bucket=bucket, Key=s3_key, Body=b'')
+            self.record_put(bucket, s3_key, 0)
 
             self.update_status(f"Created folder: {folder_name}")
             self.refresh_s3_files()
@@ -732,155 +4278,762 @@ class EnhancedS3FileManager:
             messagebox.showerror("Error", f"Failed to create folder:\n{str(e)}")
 
     def upload_selected(self):
-        """Upload selected local files"""
-        selection = self.local_tree.selection()
+        """Upload selected local files, and selected folders when including subfolders"""
+        selection = self.local_view.selected_entries()
         if not selection:
             messagebox.showwarning("No Selection", "Please select files to upload")
             return
 
-        files_to_upload = []
-        for item_id in selection:
-            item = self.local_tree.item(item_id)
-            if item['values'][1] == 'File':  # Only files, not folders
-                files_to_upload.append(item['values'][0])
+        files_to_upload = [name for name, item_type in selection if item_type == 'File']
+        folders = [name for name, item_type in selection if item_type == 'Folder'] \
+            if self.upload_recursive.get() else []
 
-        if files_to_upload:
-            self.upload_files(files_to_upload)
+        if files_to_upload or folders:
+            self.upload_files(files_to_upload, folders)
 
     def upload_all(self):
-        """Upload all files in current local directory"""
-        files_to_upload = []
-        for item_id in self.local_tree.get_children():
-            item = self.local_tree.item(item_id)
-            if item['values'][1] == 'File':
-                files_to_upload.append(item['values'][0])
-
-        if files_to_upload:
-            result = messagebox.askyesno("Confirm Upload", f"Upload {len(files_to_upload)} files to S3?")
+        """Upload all files in current local directory, and its subfolders when including them"""
+        store = self.local_view.store
+        files_to_upload = list(store.names)
+        folders = list(store.folders) if self.upload_recursive.get() else []
+
+        if files_to_upload or folders:
+            message = f"Upload {len(files_to_upload)} files"
+            if folders:
+                message += f" and everything in {len(folders)} subfolders"
+            result = messagebox.askyesno("Confirm Upload", message + " to S3?")
             if result:
-                self.upload_files(files_to_upload)
+                self.upload_files(files_to_upload, folders)
 
-    def upload_files(self, file_names):
-        """Upload files to S3"""
+    def upload_files(self, file_names, folders=()):
+        """Upload files, and whole folder trees, to S3"""
         if not self.is_connected:
             messagebox.showerror("Error", "Not connected to AWS")
             return
 
+        bucket, jobs = self.build_upload_jobs(file_names)
+        scan = self.folder_upload_scan(bucket, folders) if folders else None
+        self.run_upload_jobs(bucket, jobs, scan)
+
+    def folder_upload_scan(self, bucket, folders):
+        """Return a function that walks local folders into upload jobs, for a worker thread to call"""
+        s3_prefix = self.upload_prefix()
+        local_dir = self.local_path_var.get()
+
+        def scan():
+            jobs = []
+            for folder in folders:
+                root = os.path.join(local_dir, folder)
+                for relative, _, _ in walk_files(root):
+                    jobs.append((bucket, os.path.join(root, relative),
+                                 s3_prefix + folder + '/' + relative.replace(os.sep, '/')))
+                    if len(jobs) % 1000 == 0:
+                        self.update_status(f"Scanning local folders... {len(jobs)} files")
+            return jobs
+        return scan
+
+    def run_upload_jobs(self, bucket, jobs, scan=None):
+        """Upload (bucket, local_path, s3_key) jobs in the background
+
+        scan, when given, is called on the worker thread and returns more
+        jobs, so walking large folder trees never blocks the window.
+        """
+        engine = self.create_transfer_engine()
+
         def upload_worker():
             try:
-                bucket = self.bucket_name.get()
-                s3_prefix = self.current_path.get().lstrip("/")
-                if s3_prefix and not s3_prefix.endswith("/"):
-                    s3_prefix += "/"
-
-                total_files = len(file_names)
-                uploaded = 0
-
-                for file_name in file_names:
-                    local_path = os.path.join(self.local_path_var.get(), file_name)
-                    s3_key = s3_prefix + file_name if s3_prefix else file_name
-
-                    self.update_status(f"Uploading {file_name}...")
-
-                    # Get file content type
-                    content_type, _ = mimetypes.guess_type(local_path)
-                    if not content_type:
-                        content_type = 'binary/octet-stream'
-
-                    # Upload with content type
-                    self.s3_client.upload_file(
-                        local_path, bucket, s3_key,
-                        ExtraArgs={'ContentType': content_type}
-                    )
-                    uploaded += 1
-
-                    # Update progress
-                    progress = int((uploaded / total_files) * 100)
-                    self.progress_bar['value'] = progress
-                    self.root.update_idletasks()
-
-                self.update_status(f"Successfully uploaded {uploaded} files")
-                self.progress_bar['value'] = 0
-                self.refresh_s3_files()
-                messagebox.showinfo("Success", f"Uploaded {uploaded} files successfully")
+                if scan:
+                    self.update_status("Scanning local folders...")
+                jobs_to_run = jobs + scan() if scan else jobs
+                total_files = len(jobs_to_run)
+                self.update_status(f"Uploading {total_files} files...")
+
+                def on_result(index, result):
+                    self.update_status(f"Uploaded {index + 1}/{total_files}: {os.path.basename(result.local_path)}")
+
+                results = engine.upload_files(jobs_to_run, on_result=on_result)
+                for result in results:
+                    if result.ok:
+                        self.record_put(bucket, result.key, result.size)
+                uploaded = sum(1 for r in results if r.ok)
+                failures = S3TransferEngine.failure_summary(results)
+
+                self.run_in_ui(self.refresh_s3_files)
+
+                if failures:
+                    self.update_status(f"Uploaded {uploaded} files, {total_files - uploaded} failed")
+                    self.run_in_ui(messagebox.showwarning, "Upload Incomplete",
+                                   f"Uploaded {uploaded} of {total_files} files.\n\nFailed:\n{failures}")
+                else:
+                    self.update_status(f"Successfully uploaded {uploaded} files")
+                    self.run_in_ui(messagebox.showinfo, "Success", f"Uploaded {uploaded} files successfully")
 
             except Exception as e:
                 self.update_status("Upload failed")
-                self.progress_bar['value'] = 0
-                messagebox.showerror("Upload Error", f"Upload failed:\n{str(e)}")
+                self.run_in_ui(messagebox.showerror, "Upload Error", f"Upload failed:\n{str(e)}")
 
         threading.Thread(target=upload_worker, daemon=True).start()
 
+    def upload_prefix(self):
+        """Current S3 folder as a key prefix ('' at the bucket root)"""
+        s3_prefix = self.current_path.get().lstrip("/")
+        if s3_prefix and not s3_prefix.endswith("/"):
+            s3_prefix += "/"
+        return s3_prefix
+
+    def build_upload_jobs(self, file_names):
+        """Map local file names to (bucket, local_path, s3_key) jobs for the current folders"""
+        bucket = self.bucket_name.get()
+        s3_prefix = self.upload_prefix()
+        local_dir = self.local_path_var.get()
+        jobs = [(bucket, os.path.join(local_dir, file_name), s3_prefix + file_name)
+                for file_name in file_names]
+        return bucket, jobs
+
+    def sync_upload_all(self):
+        """Upload only new or changed files in the current local directory"""
+        if not self.is_connected:
+            messagebox.showerror("Error", "Not connected to AWS")
+            return
+
+        store = self.local_view.store
+        file_names = list(store.names)
+        folders = list(store.folders) if self.upload_recursive.get() else []
+        if not file_names and not folders:
+            return
+
+        if self.upload_manifest is None:
+            self.upload_manifest = UploadManifest()
+
+        bucket, jobs = self.build_upload_jobs(file_names)
+        scan = self.folder_upload_scan(bucket, folders) if folders else None
+        s3_prefix = self.upload_prefix()
+        engine = self.create_transfer_engine()
+        lister = self.create_lister() if self.sync_check_remote.get() else None
+        manifest = self.upload_manifest
+
+        def sync_worker():
+            nonlocal jobs
+            try:
+                if scan:
+                    self.update_status("Sync: scanning local folders...")
+                    jobs = jobs + scan()
+
+                remote = None
+                if lister:
+                    self.update_status("Sync: listing S3 destination...")
+                    remote = {obj['Key']: obj.get('ETag', '').strip('"')
+                              for page in lister.iter_pages(bucket, s3_prefix, delimiter=None if scan else '/')
+                              for obj in page.get('Contents', [])}
+
+                self.update_status(f"Sync: checking {len(jobs)} files for changes...")
+                state = {'total': 0}
+
+                def on_plan(plan):
+                    state['total'] = len(plan)
+                    size = self.format_file_size(sum(item.size for item in plan))
+                    self.update_status(f"Sync: uploading {len(plan)} changed files ({size})...")
+
+                def on_result(index, result):
+                    self.update_status(f"Synced {index + 1}/{state['total']}: {os.path.basename(result.local_path)}")
+
+                plan, results = engine.sync_upload(jobs, manifest, remote, on_plan=on_plan, on_result=on_result)
+                for result in results:
+                    if result.ok:
+                        self.record_put(bucket, result.key, result.size)
+
+                uploaded = [r for r in results if r.ok]
+                skipped = len(jobs) - len(plan)
+                failures = S3TransferEngine.failure_summary(results)
+                summary = (f"Uploaded {len(uploaded)} changed files "
+                           f"({self.format_file_size(sum(r.size for r in uploaded))}), "
+                           f"skipped {skipped} unchanged")
+                remote_changes = sum(1 for item in plan if item.reason.endswith('on S3'))
+                if remote_changes:
+                    summary += f"\n{remote_changes} files had changed or gone missing on S3"
+
+                if plan:
+                    self.run_in_ui(self.refresh_s3_files)
+
+                if failures:
+                    self.update_status("Sync finished with errors")
+                    self.run_in_ui(messagebox.showwarning, "Sync Incomplete", f"{summary}\n\nFailed:\n{failures}")
+                else:
+                    self.update_status(summary.splitlines()[0])
+                    self.run_in_ui(messagebox.showinfo, "Sync Complete", summary)
+
+            except Exception as e:
+                self.update_status("Sync failed")
+                self.run_in_ui(messagebox.showerror, "Sync Error", f"Sync failed:\n{str(e)}")
+
+        threading.Thread(target=sync_worker, daemon=True).start()
+
+    def toggle_watch(self):
+        """Start or stop auto-uploading changes in the local folder to the current S3 folder"""
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+            watcher, self.folder_watcher = self.folder_watcher, None
+            self.watch_button.config(text="👁 Watch")
+            self.update_status(f"Stopped watching {watcher.directory} "
+                               f"({watcher.files} changed files uploaded in {watcher.batches} batches)")
+            return
+
+        if not self.is_connected:
+            messagebox.showerror("Error", "Not connected to AWS")
+            return
+
+        if self.upload_manifest is None:
+            self.upload_manifest = UploadManifest()
+
+        bucket = self.bucket_name.get()
+        s3_prefix = self.upload_prefix()
+        local_dir = self.local_path_var.get()
+        engine = self.create_transfer_engine()
+        manifest = self.upload_manifest
+        target = f"s3://{bucket}/{s3_prefix}"
+
+        def upload_batch(paths):
+            # Files touched without a content change are skipped by the sync manifest
+            jobs = [(bucket, path, s3_prefix + os.path.relpath(path, local_dir).replace(os.sep, '/'))
+                    for path in paths]
+            self.update_status(f"Watch: uploading {len(jobs)} changed files to {target}...")
+            plan, results = engine.sync_upload(jobs, manifest)
+            for result in results:
+                if result.ok:
+                    self.record_put(bucket, result.key, result.size)
+            failed = [item.job[1] for item, result in zip(plan, results) if not result.ok]
+            message = f"Watch: uploaded {len(results) - len(failed)} changed files to {target}"
+            if failed:
+                message += (f", {len(failed)} failed and will be retried: "
+                            f"{S3TransferEngine.failure_summary(results, limit=1)}")
+            self.update_status(message)
+            return failed
+
+        self.folder_watcher = FolderWatcher(local_dir, upload_batch, recursive=self.upload_recursive.get(),
+                                            on_error=self.update_status)
+        self.folder_watcher.start()
+        self.watch_button.config(text="⏹ Stop Watching")
+        self.update_status(f"Watching {local_dir} for changes → {target} ({self.folder_watcher.backend})")
+
+    def open_multipart_window(self):
+        """List in-progress multipart uploads for the bucket, to resume or abort them"""
+        if not self.is_connected:
+            messagebox.showerror("Error", "Not connected to AWS")
+            return
+
+        bucket = self.bucket_name.get()
+        win = Toplevel(self.root)
+        win.title(f"Multipart Uploads - {bucket}")
+        win.geometry("900x400")
+        win.configure(bg=self.colors['bg_primary'])
+
+        columns = ('Key', 'Initiated', 'Parts Done', 'Local File')
+        tree = ttk.Treeview(win, columns=columns, show='headings', selectmode='extended')
+        for col, width in zip(columns, (330, 150, 90, 300)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+        tree.pack(fill='both', expand=True, padx=10, pady=(10, 5))
+
+        uploads = {}  # tree item -> (key, upload_id, journal entry or None)
+
+        def load():
+            tree.delete(*tree.get_children())
+            uploads.clear()
+            journaled = {(e['key'], e['upload_id']): e for e in self.multipart_journal.entries(bucket)} \
+                if self.multipart_journal else {}
+            try:
+                paginator = self.s3_client.get_paginator('list_multipart_uploads')
+                for page in paginator.paginate(Bucket=bucket):
+                    for upload in page.get('Uploads', []):
+                        entry = journaled.get((upload['Key'], upload['UploadId']))
+                        parts = f"{len(entry['parts'])}/{-(-entry['size'] // entry['part_size'])}" if entry else "?"
+                        item = tree.insert('', 'end', values=(
+                            upload['Key'], upload['Initiated'].strftime('%Y-%m-%d %H:%M:%S'),
+                            parts, entry['local_path'] if entry else "(not started here)"))
+                        uploads[item] = (upload['Key'], upload['UploadId'], entry)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to list multipart uploads:\n{str(e)}", parent=win)
+
+        def resume():
+            jobs = [(bucket, entry['local_path'], key)
+                    for key, _, entry in (uploads[i] for i in tree.selection())
+                    if entry and os.path.exists(entry['local_path'])]
+            if not jobs:
+                messagebox.showwarning("Resume", "Select uploads started here whose local file still exists",
+                                       parent=win)
+                return
+            win.destroy()
+            self.run_upload_jobs(bucket, jobs)
+
+        def abort(selected):
+            if not selected or not messagebox.askyesno(
+                    "Abort Uploads", f"Abort {len(selected)} multipart uploads? Uploaded parts will be discarded.",
+                    parent=win):
+                return
+            failed = []
+            for key, upload_id, _ in selected:
+                try:
+                    self.s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+                    if self.multipart_journal:
+                        self.multipart_journal.remove_upload(bucket, key, upload_id)
+                except Exception as e:
+                    failed.append(f"{key}: {e}")
+            if failed:
+                messagebox.showwarning("Abort", "Some uploads could not be aborted:\n" + "\n".join(failed[:10]),
+                                       parent=win)
+            load()
+
+        def abort_stale():
+            cutoff = time.time() - 7 * 24 * 3600
+            abort([uploads[i] for i in tree.get_children()
+                   if datetime.strptime(tree.item(i)['values'][1], '%Y-%m-%d %H:%M:%S')
+                   .replace(tzinfo=timezone.utc).timestamp() < cutoff])
+
+        buttons = Frame(win, bg=self.colors['bg_primary'])
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        Button(buttons, text="▶ Resume Selected", command=resume,
+               bg=self.colors['success'], fg='white', font=self.fonts['default'],
+               activebackground='#157347', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="✖ Abort Selected", command=lambda: abort([uploads[i] for i in tree.selection()]),
+               bg=self.colors['danger'], fg='white', font=self.fonts['default'],
+               activebackground='#b02a37', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="🧹 Abort Older Than 7 Days", command=abort_stale,
+               bg=self.colors['warning'], fg='white', font=self.fonts['default'],
+               activebackground='#e85d04', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="🔄 Refresh", command=load,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2)
+
+        load()
+
+    def open_transfers_window(self):
+        """Show queued, running and recently finished transfers with pause / cancel / priority controls"""
+        win = Toplevel(self.root)
+        win.title("Transfers")
+        win.geometry("900x450")
+        win.configure(bg=self.colors['bg_primary'])
+
+        summary = Label(win, text="", bg=self.colors['bg_primary'], fg=self.colors['text_secondary'],
+                        anchor='w', font=self.fonts['default'])
+        summary.pack(fill='x', padx=10, pady=(10, 0))
+
+        columns = ('Type', 'Object', 'Priority', 'State', 'Progress')
+        tree = ttk.Treeview(win, columns=columns, show='headings', selectmode='extended')
+        for col, width in zip(columns, (80, 440, 70, 160, 200)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+        tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        transfers = self.transfer_queue
+
+        def selected_ids():
+            return [int(i) for i in tree.selection()]
+
+        def file_progress(item):
+            progress = item.control.progress
+            if item.state != TransferQueue.ACTIVE or progress is None:
+                return ""
+            return (f"{progress.percent:.0f}% of {self.format_file_size(progress.size)}   "
+                    f"{self.format_file_size(int(progress.rate))}/s")
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            items, history, unqueued = transfers.snapshot()
+            rows = [(str(item.id), (item.batch.kind.capitalize(), item.key, item.priority, item.state,
+                                    file_progress(item)))
+                    for item in items]
+            rows += [(str(item.id), (item.batch.kind.capitalize(), item.key, item.priority,
+                                     f"{item.state}: {item.error}" if item.error else item.state, ""))
+                     for item in history]
+
+            # Update rows in place so the selection and scroll position survive a refresh
+            wanted = {iid for iid, _ in rows}
+            tree.delete(*[iid for iid in tree.get_children() if iid not in wanted])
+            for position, (iid, values) in enumerate(rows):
+                if tree.exists(iid):
+                    tree.item(iid, values=values)
+                    tree.move(iid, '', position)
+                else:
+                    tree.insert('', position, iid=iid, values=values)
+
+            queued = sum(1 for item in items if item.state == TransferQueue.QUEUED) + unqueued
+            paused = sum(1 for item in items if item.state == TransferQueue.PAUSED)
+            text = (f"Active {transfers.active}/{transfers.limit}   Queued {queued}   "
+                    f"Paused {paused}" + ("   (all paused)" if transfers.held else ""))
+            sample = self.transfer_progress.sample()
+            if sample['active']:
+                text += (f"   {sample['percent']:.1f}% of {self.format_file_size(sample['total'])}   "
+                         f"{self.format_file_size(int(sample['rate']))}/s")
+                if sample['eta'] is not None:
+                    text += f"   ETA {self.format_duration(sample['eta'])}"
+            summary.config(text=text)
+            win.after(500, refresh)
+
+        buttons = Frame(win, bg=self.colors['bg_primary'])
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        for text, command in (("⏸ Pause", lambda: transfers.pause(selected_ids())),
+                              ("▶ Resume", lambda: transfers.resume(selected_ids())),
+                              ("⬆ Priority", lambda: transfers.set_priority(selected_ids(), 1)),
+                              ("⬇ Priority", lambda: transfers.set_priority(selected_ids(), -1))):
+            Button(buttons, text=text, command=command,
+                   bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+                   activebackground=self.colors['bg_secondary']).pack(side=LEFT, padx=2)
+        Button(buttons, text="✖ Cancel", command=lambda: transfers.cancel(selected_ids()),
+               bg=self.colors['danger'], fg='white', font=self.fonts['default'],
+               activebackground='#b02a37', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="✖ Cancel Batch", command=lambda: transfers.cancel(selected_ids(), whole_batch=True),
+               bg=self.colors['danger'], fg='white', font=self.fonts['default'],
+               activebackground='#b02a37', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="▶ Resume All", command=transfers.resume_all,
+               bg=self.colors['success'], fg='white', font=self.fonts['default'],
+               activebackground='#157347', activeforeground='white').pack(side=RIGHT, padx=2)
+        Button(buttons, text="⏸ Pause All", command=transfers.pause_all,
+               bg=self.colors['warning'], fg='white', font=self.fonts['default'],
+               activebackground='#e85d04', activeforeground='white').pack(side=RIGHT, padx=2)
+
+        refresh()
+
+    def on_max_concurrency_change(self, *args):
+        """Apply the files-in-flight setting; with auto-tune it is where tuning starts from"""
+        try:
+            max_concurrency = self.max_concurrency.get()
+        except (TclError, ValueError):
+            return  # Spinbox is mid-edit
+
+        adaptive = self.adaptive_concurrency.get()
+        for controller in (self.transfer_concurrency, self.listing_concurrency):
+            controller.enabled = adaptive
+            controller.reset(max_concurrency)
+        self.transfer_queue.set_max_active(max_concurrency)
+
+    def instrument_client(self, client):
+        """Hook a newly created S3 client up to throttling detection and metrics"""
+        watch_throttling(client, self.on_s3_throttle)
+        self.metrics.attach(client)
+
+    def open_stats_window(self):
+        """Live per-operation S3 call statistics with JSON / Prometheus export"""
+        win = Toplevel(self.root)
+        win.title("S3 Call Statistics")
+        win.geometry("1000x420")
+        win.configure(bg=self.colors['bg_primary'])
+
+        summary = Label(win, text="", bg=self.colors['bg_primary'], fg=self.colors['text_secondary'],
+                        anchor='w', font=self.fonts['default'])
+        summary.pack(fill='x', padx=10, pady=(10, 0))
+
+        columns = ('Operation', 'Calls', 'Errors', 'Retries', 'Sent', 'Received', 'Avg ms', 'p50 ms', 'p99 ms',
+                   'Error Codes')
+        tree = ttk.Treeview(win, columns=columns, show='headings')
+        for col, width in zip(columns, (170, 70, 60, 60, 90, 90, 70, 70, 70, 220)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor='w' if col in ('Operation', 'Error Codes') else 'e')
+        tree.pack(fill='both', expand=True, padx=10, pady=5)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            stats = self.metrics.snapshot()
+            tree.delete(*tree.get_children())
+            for name, s in stats.items():
+                codes = ", ".join(f"{code} ×{count}" for code, count in sorted(s['error_codes'].items()))
+                tree.insert('', 'end', values=(
+                    name, s['calls'], s['errors'], s['retries'], self.format_file_size(s['bytes_sent']),
+                    self.format_file_size(s['bytes_received']), s['avg_ms'], s['p50_ms'], s['p99_ms'], codes))
+            calls = sum(s['calls'] for s in stats.values())
+            errors = sum(s['errors'] for s in stats.values())
+            retries = sum(s['retries'] for s in stats.values())
+            summary.config(text=f"{calls} calls, {errors} errors, {retries} retries since "
+                                f"{datetime.fromtimestamp(self.metrics.started).strftime('%Y-%m-%d %H:%M:%S')}")
+            win.after(1000, refresh)
+
+        def export(kind):
+            extension = '.prom' if kind == 'prometheus' else '.json'
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=extension,
+                                                initialfile=f"s3_metrics{extension}",
+                                                filetypes=[("Prometheus text", "*.prom")] if kind == 'prometheus'
+                                                else [("JSON", "*.json")])
+            if not path:
+                return
+            try:
+                with open(path, 'w') as f:
+                    f.write(self.metrics.to_prometheus() if kind == 'prometheus' else self.metrics.to_json())
+            except OSError as e:
+                messagebox.showerror("Export Error", f"Could not write {path}:\n{e}", parent=win)
+
+        buttons = Frame(win, bg=self.colors['bg_primary'])
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        Button(buttons, text="💾 Export JSON", command=lambda: export('json'),
+               bg=self.colors['info'], fg='white', font=self.fonts['default'],
+               activebackground='#0aa2c0', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="💾 Export Prometheus", command=lambda: export('prometheus'),
+               bg=self.colors['info'], fg='white', font=self.fonts['default'],
+               activebackground='#0aa2c0', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="🐢 UI Stalls", command=self.open_stalls_window,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=LEFT, padx=2)
+        Button(buttons, text="🔄 Reset", command=self.metrics.reset,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2)
+
+        refresh()
+
+    def on_stall(self, record):
+        """Tell the user the window froze, and where"""
+        where = record['handler'] + (f" ({record['s3_call']})" if record['s3_call'] else "")
+        self.update_status(f"⚠ Window was unresponsive for {record['duration']:.1f}s in {where}")
+
+    def open_stalls_window(self):
+        """Recorded event-loop stalls with their stacks, plus session profiling controls"""
+        watchdog = self.watchdog
+        win = Toplevel(self.root)
+        win.title("UI Stalls")
+        win.geometry("1000x560")
+        win.configure(bg=self.colors['bg_primary'])
+
+        Label(win, text=f"Stalls over {self.stall_threshold_ms} ms are logged to {watchdog.log_path}",
+              bg=self.colors['bg_primary'], fg=self.colors['text_secondary'], anchor='w',
+              font=self.fonts['default']).pack(fill='x', padx=10, pady=(10, 0))
+
+        columns = ('Time', 'Duration', 'Handler', 'S3 Call', 'Samples')
+        tree = ttk.Treeview(win, columns=columns, show='headings', height=8)
+        for col, width in zip(columns, (150, 80, 480, 150, 70)):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+        tree.pack(fill='x', padx=10, pady=5)
+
+        stacks = Text(win, height=14, font=self.fonts['mono'], wrap='none')
+        stacks.pack(fill='both', expand=True, padx=10, pady=5)
+
+        records = {}
+
+        def load():
+            tree.delete(*tree.get_children())
+            records.clear()
+            for record in reversed(list(watchdog.stalls)):
+                item = tree.insert('', 'end', values=(record['time'], f"{record['duration']:.2f}s",
+                                                      record['handler'], record['s3_call'] or "",
+                                                      record['samples']))
+                records[item] = record
+
+        def show(event=None):
+            stacks.delete('1.0', END)
+            for item in tree.selection():
+                for sample in records[item]['stacks']:
+                    stacks.insert(END, f"{sample['count']} samples:\n")
+                    stacks.insert(END, "".join(f"    {frame}\n" for frame in sample['frames']) + "\n")
+
+        def export():
+            path = filedialog.asksaveasfilename(parent=win, defaultextension='.json', initialfile="s3_stalls.json",
+                                                filetypes=[("JSON", "*.json")])
+            if path:
+                try:
+                    with open(path, 'w') as f:
+                        json.dump({'stalls': list(watchdog.stalls), 'metrics': json.loads(self.metrics.to_json())},
+                                  f, indent=2)
+                except OSError as e:
+                    messagebox.showerror("Export Error", f"Could not write {path}:\n{e}", parent=win)
+
+        def toggle_profiling():
+            if watchdog.profiler is None:
+                watchdog.start_profiling()
+                profile_button.config(text="⏹ Stop && Save Profile")
+                return
+            try:
+                base = watchdog.stop_profiling()
+                messagebox.showinfo("Profile Saved", f"Saved {base}.prof (cProfile) and\n"
+                                                     f"{base}.folded (flame graph stacks)", parent=win)
+            except OSError as e:
+                messagebox.showerror("Profile Error", f"Could not save the profile:\n{e}", parent=win)
+            profile_button.config(text="⏺ Start Profiling")
+
+        tree.bind('<<TreeviewSelect>>', show)
+
+        buttons = Frame(win, bg=self.colors['bg_primary'])
+        buttons.pack(fill='x', padx=10, pady=(0, 10))
+        profile_button = Button(buttons, text="⏹ Stop && Save Profile" if watchdog.profiler else "⏺ Start Profiling",
+                                command=toggle_profiling,
+                                bg=self.colors['warning'], fg='white', font=self.fonts['default'],
+                                activebackground='#e85d04', activeforeground='white')
+        profile_button.pack(side=LEFT, padx=2)
+        Button(buttons, text="💾 Export Report", command=export,
+               bg=self.colors['info'], fg='white', font=self.fonts['default'],
+               activebackground='#0aa2c0', activeforeground='white').pack(side=LEFT, padx=2)
+        Button(buttons, text="🔄 Refresh", command=load,
+               bg=self.colors['bg_accent'], fg=self.colors['text_primary'], font=self.fonts['default'],
+               activebackground=self.colors['bg_secondary']).pack(side=RIGHT, padx=2)
+
+        load()
+
+    def on_s3_throttle(self):
+        """S3 asked us to slow down: both transfers and listings back off"""
+        self.transfer_concurrency.on_throttle()
+        self.listing_concurrency.on_throttle()
+
+    def update_transfer_progress(self):
+        """Sample byte counters into the progress bar: done / total, throughput and ETA"""
+        sample = self.transfer_progress.sample()
+        if sample['active'] and sample['total'] > 0:
+            self.show_progress(sample['percent'])
+            text = (f"{self.format_file_size(sample['done'])} of {self.format_file_size(sample['total'])}   "
+                    f"{self.format_file_size(int(sample['rate']))}/s "
+                    f"(avg {self.format_file_size(int(sample['average']))}/s)")
+            if sample['eta'] is not None:
+                text += f"   ETA {self.format_duration(sample['eta'])}"
+            self.throughput_label.config(text=text)
+        elif self.throughput_label.cget('text'):
+            self.show_progress(0)
+            self.throughput_label.config(text="")
+        self.root.after(250, self.update_transfer_progress)
+
+    def update_concurrency_label(self):
+        """Show files and listing requests in flight, with the auto-tuned peak"""
+        transfers = self.transfer_queue
+        text = f"Transfers {transfers.active}/{transfers.limit}"
+        if self.adaptive_concurrency.get():
+            text += (f" (peak {self.transfer_concurrency.peak})   "
+                     f"Listing {self.listing_concurrency.limit} (peak {self.listing_concurrency.peak})")
+            throttles = self.transfer_concurrency.throttles
+            if throttles:
+                text += f"   SlowDown ×{throttles}"
+        self.concurrency_label.config(text=text)
+        self.root.after(1000, self.update_concurrency_label)
+
+    def apply_bandwidth_limits(self, *args):
+        """Push the bandwidth settings into the shared limiters"""
+        try:
+            hours = parse_hours(self.limit_hours.get())
+            upload = self.upload_limit_mbps.get() * MB
+            download = self.download_limit_mbps.get() * MB
+        except (TclError, ValueError):
+            return  # Field is mid-edit; keep the previous limits
+        self.upload_limiter.configure(upload, hours)
+        self.download_limiter.configure(download, hours)
+
     def download_selected(self):
         """Download selected S3 files"""
-        selection = self.s3_tree.selection()
+        selection = self.s3_view.selected_entries()
         if not selection:
             messagebox.showwarning("No Selection", "Please select files to download")
             return
 
-        files_to_download = []
-        for item_id in selection:
-            item = self.s3_tree.item(item_id)
-            if item['values'][1] == 'File':
-                files_to_download.append(item['values'][0])
-
-        if not files_to_download:
-            messagebox.showwarning("No Files", "No files selected for download")
-            return
+        files_to_download = [name for name, item_type in selection if item_type == 'File']
+        folders_to_download = [name for name, item_type in selection if item_type == 'Folder']
 
         # Ask for download location
         download_dir = filedialog.askdirectory(title="Select Download Location")
         if not download_dir:
             return
 
-        def download_worker():
-            try:
-                bucket = self.bucket_name.get()
-                s3_prefix = self.current_path.get().lstrip("/")
-                if s3_prefix and not s3_prefix.endswith("/"):
-                    s3_prefix += "/"
+        bucket = self.bucket_name.get()
+        s3_prefix = self.current_path.get().lstrip("/")
+        if s3_prefix and not s3_prefix.endswith("/"):
+            s3_prefix += "/"
+
+        # Selected folders are mirrored recursively
+        if folders_to_download:
+            self.mirror_prefixes([(s3_prefix + name + "/", os.path.join(download_dir, name))
+                                  for name in folders_to_download])
+        if not files_to_download:
+            return
 
-                total_files = len(files_to_download)
-                downloaded = 0
+        jobs = [(bucket, s3_prefix + file_name, os.path.join(download_dir, file_name))
+                for file_name in files_to_download]
+        engine = self.create_transfer_engine()
 
-                for file_name in files_to_download:
-                    s3_key = s3_prefix + file_name if s3_prefix else file_name
-                    local_path = os.path.join(download_dir, file_name)
+        def download_worker():
+            try:
+                total_files = len(jobs)
+                self.update_status(f"Downloading {total_files} files...")
 
-                    self.update_status(f"Downloading {file_name}...")
+                def on_result(index, result):
+                    self.update_status(f"Downloaded {index + 1}/{total_files}: {os.path.basename(result.local_path)}")
 
-                    self.s3_client.download_file(bucket, s3_key, local_path)
-                    downloaded += 1
+                results = engine.download_files(jobs, on_result=on_result)
+                downloaded = sum(1 for r in results if r.ok)
+                failures = S3TransferEngine.failure_summary(results)
 
-                    # Update progress
-                    progress = int((downloaded / total_files) * 100)
-                    self.progress_bar['value'] = progress
-                    self.root.update_idletasks()
 
-                self.update_status(f"Successfully downloaded {downloaded} files")
-                self.progress_bar['value'] = 0
-                messagebox.showinfo("Success", f"Downloaded {downloaded} files to {download_dir}")
+                if failures:
+                    self.update_status(f"Downloaded {downloaded} files, {total_files - downloaded} failed")
+                    self.run_in_ui(messagebox.showwarning, "Download Incomplete",
+                                   f"Downloaded {downloaded} of {total_files} files to {download_dir}.\n\nFailed:\n{failures}")
+                else:
+                    self.update_status(f"Successfully downloaded {downloaded} files")
+                    self.run_in_ui(messagebox.showinfo, "Success", f"Downloaded {downloaded} files to {download_dir}")
 
             except Exception as e:
                 self.update_status("Download failed")
-                self.progress_bar['value'] = 0
-                messagebox.showerror("Download Error", f"Download failed:\n{str(e)}")
+                self.run_in_ui(messagebox.showerror, "Download Error", f"Download failed:\n{str(e)}")
 
         threading.Thread(target=download_worker, daemon=True).start()
 
-    def delete_selected(self):
-        """Delete selected S3 files"""
-        selection = self.s3_tree.selection()
-        if not selection:
-            messagebox.showwarning("No Selection", "Please select items to delete")
+    def mirror_current_folder(self):
+        """Mirror the current S3 folder into a local directory"""
+        if not self.is_connected:
+            messagebox.showerror("Error", "Not connected to AWS")
             return
 
-        items_to_delete = []
-        for item_id in selection:
-            item = self.s3_tree.item(item_id)
-            items_to_delete.append((item['values'][0], item['values'][1]))
+        local_dir = filedialog.askdirectory(title="Mirror Current Folder Into")
+        if local_dir:
+            self.mirror_prefixes([(self.upload_prefix(), local_dir)])
+
+    def mirror_prefixes(self, targets):
+        """Incrementally download (s3_prefix, local_dir) targets in the background"""
+        bucket = self.bucket_name.get()
+        engine = self.create_transfer_engine()
+        lister = self.create_lister()
+
+        def mirror_worker():
+            try:
+                downloaded = []
+                skipped = 0
+                failures = []
+
+                for prefix, local_dir in targets:
+                    label = prefix or bucket
+                    self.update_status(f"Mirror: comparing {label} with {local_dir}...")
+                    state = {'total': 0}
+
+                    def on_plan(jobs, already_current):
+                        state['total'] = len(jobs)
+                        self.update_status(f"Mirror: {len(jobs)} objects to fetch, "
+                                           f"{already_current} already up to date")
+
+                    def on_result(index, result):
+                        self.update_status(f"Mirrored {index + 1}/{state['total']}: {result.key}")
+
+                    _, results, already_current = engine.mirror_prefix(
+                        bucket, prefix, local_dir, lister.iter_pages(bucket, prefix),
+                        on_plan=on_plan, on_result=on_result)
+                    downloaded += [r for r in results if r.ok]
+                    skipped += already_current
+                    failures.append(S3TransferEngine.failure_summary(results))
+
+                failures = "\n".join(f for f in failures if f)
+                summary = (f"Downloaded {len(downloaded)} objects "
+                           f"({self.format_file_size(sum(r.size for r in downloaded))}), "
+                           f"skipped {skipped} up to date")
+
+                if failures:
+                    self.update_status("Mirror finished with errors")
+                    self.run_in_ui(messagebox.showwarning, "Mirror Incomplete", f"{summary}\n\nFailed:\n{failures}")
+                else:
+                    self.update_status(summary)
+                    self.run_in_ui(messagebox.showinfo, "Mirror Complete", summary)
+
+            except Exception as e:
+                self.update_status("Mirror failed")
+                self.run_in_ui(messagebox.showerror, "Mirror Error", f"Mirror failed:\n{str(e)}")
 
+        threading.Thread(target=mirror_worker, daemon=True).start()
+
+    def delete_selected(self):
+        """Delete selected S3 files"""
+        items_to_delete = self.s3_view.selected_entries()
         if not items_to_delete:
+            messagebox.showwarning("No Selection", "Please select items to delete")
             return
 
         result = messagebox.askyesno("Confirm Delete",
@@ -888,71 +5041,80 @@ class EnhancedS3FileManager:
         if not result:
             return
 
+        deleter = S3BatchDeleter(self.pooled_client(), max_concurrency=self.max_concurrency.get())
+        lister = self.create_lister()
+        bucket = self.bucket_name.get()
+        s3_prefix = self.upload_prefix()
+
         def delete_worker():
             try:
-                bucket = self.bucket_name.get()
-                s3_prefix = self.current_path.get().lstrip("/")
-                if s3_prefix and not s3_prefix.endswith("/"):
-                    s3_prefix += "/"
+                def on_progress(summary):
+                    self.update_status(f"Deleting... {summary.deleted} objects deleted "
+                                       f"({summary.rate:.0f}/s, {summary.error_count} errors)")
 
+                errors = []
                 deleted = 0
-                for item_name, item_type in items_to_delete:
-                    self.update_status(f"Deleting {item_name}...")
 
+                # Files in the current folder go out as one batched request stream
+                file_keys = [s3_prefix + name for name, item_type in items_to_delete if item_type != 'Folder']
+                if file_keys:
+                    summary = deleter.delete_keys(bucket, file_keys, on_progress)
+                    failed = {key for key, _, _ in summary.errors}
+                    for key in file_keys:
+                        if key not in failed:
+                            self.record_delete(bucket, key)
+                    deleted += summary.deleted
+                    errors.append(summary.error_summary())
+
+                for item_name, item_type in items_to_delete:
                     if item_type == 'Folder':
                         # Delete folder and all its contents
                         folder_prefix = s3_prefix + item_name + "/"
-                        self.delete_folder_recursive(bucket, folder_prefix)
-                    else:
-                        # Delete single file
-                        s3_key = s3_prefix + item_name if s3_prefix else item_name
-                        self.s3_client.delete_object(Bucket=bucket, Key=s3_key)
-
-                    deleted += 1
-
-                self.update_status(f"Successfully deleted {deleted} items")
-                self.refresh_s3_files()
-                messagebox.showinfo("Success", f"Deleted {deleted} items successfully")
+                        try:
+                            summary = self.delete_folder_recursive(bucket, folder_prefix, on_progress,
+                                                                   deleter, lister)
+                        finally:
+                            self.record_delete_tree(bucket, folder_prefix)
+                        deleted += summary.deleted
+                        errors.append(summary.error_summary())
+
+                errors = "\n".join(e for e in errors if e)
+                self.run_in_ui(self.refresh_s3_files)
+
+                if errors:
+                    self.update_status(f"Deleted {deleted} objects with errors")
+                    self.run_in_ui(messagebox.showwarning, "Delete Incomplete",
+                                   f"Deleted {deleted} objects.\n\nFailed:\n{errors}")
+                else:
+                    self.update_status(f"Successfully deleted {len(items_to_delete)} items ({deleted} objects)")
+                    self.run_in_ui(messagebox.showinfo, "Success", f"Deleted {len(items_to_delete)} items successfully")
 
             except Exception as e:
                 self.update_status("Delete failed")
-                messagebox.showerror("Delete Error", f"Delete failed:\n{str(e)}")
+                self.run_in_ui(messagebox.showerror, "Delete Error", f"Delete failed:\n{str(e)}")
 
         threading.Thread(target=delete_worker, daemon=True).start()
 
-    def delete_folder_recursive(self, bucket, prefix):
-        """Recursively delete all objects in a folder"""
+    def delete_folder_recursive(self, bucket, prefix, on_progress=None, deleter=None, lister=None):
+        """Recursively delete all objects in a folder, returning a DeleteSummary"""
         try:
-            # List all objects with the prefix
-            paginator = self.s3_client.get_paginator('list_objects_v2')
-            page_iterator = paginator.paginate(Bucket=bucket, Prefix=prefix)
-
-            objects_to_delete = []
-            for page in page_iterator:
-                for obj in page.get('Contents', []):
-                    objects_to_delete.append({'Key': obj['Key']})
-
-            # Delete objects in batches
-            if objects_to_delete:
-                # S3 allows up to 1000 objects per delete request
-                for i in range(0, len(objects_to_delete), 1000):
-                    batch = objects_to_delete[i:i + 1000]
-                    self.s3_client.delete_objects(
-                        Bucket=bucket,
-                        Delete={'Objects': batch}
-                    )
+            if deleter is None:
+                deleter = S3BatchDeleter(self.pooled_client(), max_concurrency=self.max_concurrency.get())
+            if lister is None:
+                lister = self.create_lister()
+            pages = lister.iter_pages(bucket, prefix)
+            return deleter.delete_prefix(bucket, prefix, pages=pages, on_progress=on_progress)
         except Exception as e:
             raise Exception(f"Failed to delete folder contents: {str(e)}")
 
     def copy_path(self):
         """Copy S3 path to clipboard"""
-        selection = self.s3_tree.selection()
+        selection = self.s3_view.selected_entries()
         if not selection:
             messagebox.showwarning("No Selection", "Please select an item to copy path")
             return
 
-        item = self.s3_tree.item(selection[0])
-        item_name = item['values'][0]
+        item_name = selection[0][0]
 
         bucket = self.bucket_name.get()
         current = self.current_path.get().lstrip("/")
@@ -969,7 +5131,7 @@ class EnhancedS3FileManager:
 
     def show_s3_context_menu(self, event):
         """Show context menu for S3 items"""
-        selection = self.s3_tree.selection()
+        selection = self.s3_view.selected_entries()
         if not selection:
             return
 
@@ -993,16 +5155,21 @@ class EnhancedS3FileManager:
 
     def show_properties(self):
         """Show properties of selected S3 object"""
-        selection = self.s3_tree.selection()
+        selection = self.s3_view.selected_entries()
         if not selection:
             return
 
-        item = self.s3_tree.item(selection[0])
-        item_name = item['values'][0]
-        item_type = item['values'][1]
+        item_name, item_type = selection[0]
 
         if item_type == 'Folder':
-            messagebox.showinfo("Properties", f"Folder: {item_name}\nType: Directory")
+            properties = f"Folder: {item_name}\nType: Directory"
+            index = self.index_for(self.bucket_name.get())
+            if index:
+                folder_prefix = self.current_path.get().lstrip("/").rstrip("/")
+                folder_prefix = f"{folder_prefix}/{item_name}/" if folder_prefix else f"{item_name}/"
+                count, total = index.prefix_stats(folder_prefix)
+                properties += f"\nObjects: {count}\nTotal Size: {self.format_file_size(total)} (local index)"
+            messagebox.showinfo("Properties", properties)
             return
 
         try:
@@ -1033,7 +5200,245 @@ S3 Key: {s3_key}"""
         except Exception as e:
             messagebox.showerror("Error", f"Failed to get properties:\n{str(e)}")
 
+    # Local Index Methods
+    def open_bucket_index(self):
+        """Open (or close) the local index for the selected bucket"""
+        bucket = self.bucket_name.get()
+        if self.bucket_index and (not self.use_index.get() or self.bucket_index.bucket != bucket):
+            self.bucket_index.close()
+            self.bucket_index = None
+
+        if not self.use_index.get() or not self.is_connected or not bucket or self.bucket_index:
+            return
+
+        try:
+            self.bucket_index = BucketIndex(bucket)
+        except Exception as e:
+            self.use_index.set(False)
+            messagebox.showerror("Index Error", f"Could not open local index:\n{str(e)}")
+            return
+
+        if not self.bucket_index.has_full_sync():
+            self.rebuild_index()
+
+    def index_for(self, bucket):
+        """Return the open index if it belongs to bucket"""
+        index = self.bucket_index
+        if index and index.bucket == bucket:
+            return index
+        return None
+
+    def rebuild_index(self):
+        """Populate the local index with a full listing of the bucket"""
+        index = self.bucket_index
+        if not index:
+            messagebox.showwarning("Index Disabled", "Enable 'Use local index' first")
+            return
+
+        lister = self.create_lister()
+
+        def index_worker():
+            try:
+                self.update_status(f"Indexing {index.bucket}...")
+                indexed = index.sync_recursive(
+                    self.s3_client,
+                    pages=lister.iter_pages(index.bucket, ''),
+                    on_progress=lambda n: self.update_status(f"Indexing {index.bucket}... {n} objects"),
+                    cancelled=lambda: self.bucket_index is not index
+                )
+                self.update_status(f"Indexed {indexed} objects in {index.bucket}")
+            except Exception as e:
+                self.update_status("Indexing failed")
+                self.run_in_ui(messagebox.showerror, "Index Error", f"Indexing failed:\n{str(e)}")
+
+        threading.Thread(target=index_worker, daemon=True).start()
+
+    def open_search_window(self):
+        """Open a bucket-wide search over the local index"""
+        bucket = self.bucket_name.get()
+        index = self.index_for(bucket)
+        if not index:
+            messagebox.showwarning("Index Required", "Enable 'Use local index' to search the bucket")
+            return
+
+        win = Toplevel(self.root)
+        win.title(f"Search {bucket}")
+        win.geometry("900x550")
+        win.configure(bg=self.colors['bg_primary'])
+
+        pattern = StringVar()
+        mode = StringVar(value='glob')
+        min_size = StringVar()
+        max_size = StringVar()
+        since = StringVar()
+        until = StringVar()
+
+        form = Frame(win, bg=self.colors['bg_secondary'], padx=10, pady=8)
+        form.pack(fill='x')
+
+        fields = [("Name / Key:", pattern, 30), ("Min Size:", min_size, 8), ("Max Size:", max_size, 8),
+                  ("From (UTC):", since, 16), ("To (UTC):", until, 16)]
+        for column, (label, var, width) in enumerate(fields):
+            Label(form, text=label, bg=self.colors['bg_secondary'], fg=self.colors['text_primary'],
+                  font=self.fonts['bold']).grid(row=0, column=column * 2, sticky='e', padx=3)
+            entry = Entry(form, textvariable=var, width=width, font=self.fonts['mono'],
+                          bg='white', fg=self.colors['text_primary'])
+            entry.grid(row=0, column=column * 2 + 1, padx=3)
+            entry.bind('<Return>', lambda e: run_search())
+
+        options = Frame(form, bg=self.colors['bg_secondary'])
+        options.grid(row=1, column=0, columnspan=10, sticky='w', pady=(6, 0))
+        for text, value in (("Glob", 'glob'), ("Regex", 'regex')):
+            Radiobutton(options, text=text, variable=mode, value=value,
+                        bg=self.colors['bg_secondary'], font=self.fonts['default']).pack(side=LEFT)
+        Button(options, text="🔍 Search", command=lambda: run_search(),
+               bg=self.colors['success'], fg='white', font=self.fonts['bold'],
+               activebackground='#157347', activeforeground='white').pack(side=LEFT, padx=10)
+        result_label = Label(options, text="Sizes accept KB/MB/GB, dates YYYY-MM-DD [HH:MM]",
+                             bg=self.colors['bg_secondary'], fg=self.colors['text_muted'],
+                             font=self.fonts['small'])
+        result_label.pack(side=LEFT, padx=10)
+
+        columns = ('Key', 'Size', 'Modified')
+        results = ttk.Treeview(win, columns=columns, show='headings')
+        for col, width in zip(columns, (560, 100, 150)):
+            results.heading(col, text=col)
+            results.column(col, width=width)
+        scroll = ttk.Scrollbar(win, orient=VERTICAL, command=results.yview)
+        results.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=RIGHT, fill='y')
+        results.pack(fill='both', expand=True, padx=(10, 0), pady=5)
+
+        state = {'generation': 0, 'count': 0}
+        batches = queue.Queue()
+
+        def run_search():
+            try:
+                filters = {
+                    'pattern': pattern.get().strip(), 'mode': mode.get(),
+                    'min_size': parse_size(min_size.get()), 'max_size': parse_size(max_size.get()),
+                    'since': parse_date(since.get()), 'until': parse_date(until.get())
+                }
+                if filters['mode'] == 'regex':
+                    re.compile(filters['pattern'])
+            except (ValueError, re.error) as e:
+                messagebox.showerror("Search", f"Invalid search:\n{str(e)}", parent=win)
+                return
+
+            state['generation'] += 1
+            state['count'] = 0
+            generation = state['generation']
+            results.delete(*results.get_children())
+            result_label.config(text="Searching...")
+
+            def search_worker():
+                try:
+                    for batch in index.search(cancelled=lambda: state['generation'] != generation, **filters):
+                        batches.put((generation, batch))
+                    batches.put((generation, None))
+                except Exception as e:
+                    batches.put((generation, e))
+
+            threading.Thread(target=search_worker, daemon=True).start()
+
+        def drain_results():
+            if not win.winfo_exists():
+                return
+            try:
+                while True:
+                    generation, batch = batches.get_nowait()
+                    if generation != state['generation']:
+                        continue
+                    if batch is None:
+                        result_label.config(text=f"{state['count']} matches")
+                    elif isinstance(batch, Exception):
+                        result_label.config(text="Search failed")
+                        messagebox.showerror("Search", f"Search failed:\n{str(batch)}", parent=win)
+                    else:
+                        for key, size, mtime in batch:
+                            modified = datetime.fromtimestamp(mtime, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                            results.insert('', 'end', values=(key, self.format_file_size(size), modified))
+                        state['count'] += len(batch)
+                        result_label.config(text=f"{state['count']} matches so far...")
+            except queue.Empty:
+                pass
+            win.after(50, drain_results)
+
+        def on_open(event):
+            row = results.identify_row(event.y)
+            if row:
+                self.jump_to_key(results.item(row)['values'][0])
+
+        results.bind('<Double-1>', on_open)
+        win.protocol("WM_DELETE_WINDOW", lambda: (state.update(generation=-1), win.destroy()))
+        drain_results()
+
+    def jump_to_key(self, key):
+        """Navigate the S3 browser to the prefix containing key"""
+        parent, _ = split_key(str(key))
+        path = "/" + parent.rstrip("/")
+        self.current_path.set(path)
+        self.add_to_history(path)
+        self.refresh_s3_files()
+
+    def record_put(self, bucket, key, size):
+        """Reflect an object written by this app in the cache and index"""
+        self.listing_cache.invalidate_key(bucket, key)
+        index = self.index_for(bucket)
+        if index:
+            index.put_object(key, size, time.time())
+
+    def record_delete(self, bucket, key):
+        """Reflect a deleted object in the cache and index"""
+        self.listing_cache.invalidate_key(bucket, key, removed=True)
+        index = self.index_for(bucket)
+        if index:
+            index.remove_key(key)
+
+    def record_delete_tree(self, bucket, prefix):
+        """Reflect a deleted folder in the cache and index"""
+        self.listing_cache.invalidate_tree(bucket, prefix)
+        index = self.index_for(bucket)
+        if index:
+            index.remove_prefix(prefix)
+
     # Utility Methods
+    def create_transfer_engine(self):
+        """Create a transfer engine using the current concurrency settings"""
+        return S3TransferEngine(
+            self.pooled_client(),
+            max_concurrency=self.max_concurrency.get(),
+            part_concurrency=self.part_concurrency.get(),
+            multipart_threshold=self.part_size_mb.get() * MB,
+            part_size=self.part_size_mb.get() * MB,
+            journal=self.multipart_journal,
+            scheduler=self.transfer_queue,
+            upload_limiter=self.upload_limiter,
+            download_limiter=self.download_limiter,
+            progress=self.transfer_progress
+        )
+
+    def create_lister(self):
+        """Create a parallel lister using the current concurrency settings"""
+        if self.adaptive_concurrency.get():
+            return ParallelLister(self.pooled_client(), max_workers=self.listing_concurrency.maximum,
+                                  controller=self.listing_concurrency)
+        return ParallelLister(self.pooled_client(), max_workers=self.max_concurrency.get())
+
+    def required_connections(self):
+        """Connections the busiest mix of transfers, listing and deletes can have open at once"""
+        if self.adaptive_concurrency.get():
+            files, listing = self.transfer_concurrency.maximum, self.listing_concurrency.maximum
+        else:
+            files = listing = self.max_concurrency.get()
+        return files * self.part_concurrency.get() + listing + self.max_concurrency.get()
+
+    def pooled_client(self):
+        """The shared S3 client, with its pool grown first if the settings now need more connections"""
+        if self.client_factory is not None:
+            self.s3_client = self.client_factory.client(self.required_connections())
+        return self.s3_client
+
     def format_file_size(self, size_bytes):
         """Format file size in human readable format"""
         if size_bytes == 0:
@@ -1046,6 +5451,15 @@ S3 Key: {s3_key}"""
         s = round(size_bytes / p, 2)
         return f"{s} {size_names[i]}"
 
+    def format_duration(self, seconds):
+        """Format a duration like 45s, 12m 05s or 3h 20m"""
+        seconds = int(seconds)
+        if seconds < 60:
+            return f"{seconds}s"
+        if seconds < 3600:
+            return f"{seconds // 60}m {seconds % 60:02d}s"
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
     def get_file_icon(self, filename):
         """Get appropriate icon for file type"""
         if '.' not in filename:
@@ -1067,9 +5481,305 @@ S3 Key: {s3_key}"""
         return icons.get(ext, '📄')
 
     def update_status(self, message):
-        """Update status label"""
+        """Update status label; from a worker thread it is drawn on the next UI frame"""
+        if self.ui_updates.on_tk_thread():
+            self.show_status(message)
+            self.root.update_idletasks()
+        else:
+            self.ui_updates.status(message)
+
+    def show_status(self, message):
         self.status_label.config(text=message)
-        self.root.update_idletasks()
+
+    def show_progress(self, percent):
+        self.progress_bar['value'] = percent
+
+    def run_in_ui(self, fn, *args, **kwargs):
+        """Call fn on the Tk thread: now if already there, otherwise on the next UI frame"""
+        if self.ui_updates.on_tk_thread():
+            fn(*args, **kwargs)
+        else:
+            self.ui_updates.call(fn, *args, **kwargs)
+
+
+class BatchRunner:
+    """Runs a JSON-lines manifest of S3 operations without a display
+
+    Each manifest line is an object with an "op" of list, upload, download,
+    sync or delete and a "bucket". Consecutive single-file uploads,
+    downloads and key deletes are handed to the engine as one concurrent
+    batch; folder and prefix operations run on their own, in manifest
+    order. Progress is written to out as one JSON object per line.
+    """
+
+    OPS = ('list', 'upload', 'download', 'sync', 'delete')
+    GROUP_LIMIT = 10000  # Single-file operations batched together at most
+
+    def __init__(self, engine, lister, deleter, out=None):
+        self.engine = engine
+        self.lister = lister
+        self.deleter = deleter
+        self.out = out or sys.stdout
+        self.failures = 0
+        self.upload_manifest = None
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps(dict(event=event, **fields), default=str)
+        with self._lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def fail(self, line, error, **fields):
+        with self._lock:
+            self.failures += 1
+        self.emit('error', line=line, error=error, **fields)
+
+    @classmethod
+    def read_manifest(cls, lines):
+        """Yield (line number, operation) or (line number, error message) per non-blank line"""
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                op = json.loads(line)
+                if not isinstance(op, dict) or op.get('op') not in cls.OPS:
+                    raise ValueError(f"'op' must be one of: {', '.join(cls.OPS)}")
+                if not op.get('bucket'):
+                    raise ValueError("'bucket' is required")
+            except ValueError as e:
+                yield number, str(e)
+                continue
+            yield number, op
+
+    def run(self, lines):
+        """Run every operation in order and return the number of failures"""
+        started = time.monotonic()
+        group_kind, group = None, []
+
+        for number, op in self.read_manifest(lines):
+            if isinstance(op, str):
+                self.fail(number, op)
+                continue
+
+            kind = self._group_kind(op)
+            if group and (kind != group_kind or len(group) >= self.GROUP_LIMIT):
+                self._run_group(group_kind, group)
+                group = []
+            if kind:
+                group_kind = kind
+                group.append((number, op))
+                continue
+
+            self.emit('start', line=number, op=op['op'])
+            try:
+                getattr(self, 'run_' + op['op'])(number, op)
+            except Exception as e:
+                self.fail(number, str(e), op=op['op'])
+
+        if group:
+            self._run_group(group_kind, group)
+        self.emit('summary', failures=self.failures, seconds=round(time.monotonic() - started, 3))
+        return self.failures
+
+    @staticmethod
+    def _group_kind(op):
+        """Operation kinds that can share a batch with their neighbours, or None"""
+        if op['op'] == 'upload' and os.path.isfile(op.get('local', '')):
+            return 'upload'
+        if op['op'] in ('download', 'delete') and op.get('key'):
+            return op['op']
+        return None
+
+    def _run_group(self, kind, group):
+        try:
+            if kind == 'delete':
+                by_bucket = OrderedDict()
+                for number, op in group:
+                    by_bucket.setdefault(op['bucket'], OrderedDict()).setdefault(op['key'], number)
+                for bucket, key_lines in by_bucket.items():
+                    summary = self.deleter.delete_keys(bucket, list(key_lines))
+                    self._report_delete(group[0][0], bucket, summary, key_lines)
+                return
+
+            lines = [number for number, _ in group]
+            if kind == 'upload':
+                jobs = [(op['bucket'], op['local'],
+                         op.get('key') or op.get('prefix', '') + os.path.basename(op['local']))
+                        for _, op in group]
+                self.engine.upload_files(jobs, on_result=lambda i, r: self._report_file('upload', lines[i], r))
+            else:
+                jobs = [(op['bucket'], op['key'], self._download_path(op)) for _, op in group]
+                self.engine.download_files(jobs, on_result=lambda i, r: self._report_file('download', lines[i], r))
+        except Exception as e:
+            self.fail(group[0][0], str(e), op=kind)
+
+    def _report_file(self, op, line, result):
+        self.emit('file', line=line, op=op, key=result.key, local=result.local_path,
+                  ok=result.ok, size=result.size, error=result.error)
+        if not result.ok:
+            with self._lock:
+                self.failures += 1
+
+    def _report_delete(self, line, bucket, summary, key_lines=None):
+        """Report a delete; key_lines maps each key of a grouped delete to its manifest line"""
+        self.emit('done', line=line, op='delete', bucket=bucket, deleted=summary.deleted,
+                  errors=summary.error_count)
+        for key, code, message in summary.errors:
+            self.emit('error', line=(key_lines or {}).get(key, line), op='delete', key=key,
+                      error=f"{code}: {message}")
+        with self._lock:
+            self.failures += summary.error_count
+
+    @staticmethod
+    def _download_path(op):
+        local = op.get('local') or os.path.basename(op['key'])
+        if local.endswith(('/', os.sep)) or os.path.isdir(local):
+            local = os.path.join(local, os.path.basename(op['key']))
+        return local
+
+    @staticmethod
+    def _local_jobs(bucket, local_dir, prefix):
+        """(bucket, local_path, key) for every file below local_dir, keyed under prefix"""
+        return [(bucket, os.path.join(local_dir, relative), prefix + relative.replace(os.sep, '/'))
+                for relative in sorted(relative for relative, _, _ in walk_files(local_dir))]
+
+    def run_list(self, line, op):
+        bucket, prefix = op['bucket'], op.get('prefix', '')
+        count = 0
+        for page in self.lister.iter_pages(bucket, prefix, delimiter=None if op.get('recursive') else '/'):
+            for cp in page.get('CommonPrefixes', []):
+                self.emit('prefix', line=line, prefix=cp['Prefix'])
+            for obj in page.get('Contents', []):
+                self.emit('object', line=line, key=obj['Key'], size=obj['Size'],
+                          modified=obj['LastModified'].isoformat(), etag=obj.get('ETag', '').strip('"'))
+                count += 1
+        self.emit('done', line=line, op='list', objects=count)
+
+    def run_upload(self, line, op):
+        if not os.path.isdir(op.get('local', '')):
+            raise ValueError(f"No such file or directory: {op.get('local')}")
+        jobs = self._local_jobs(op['bucket'], op['local'], op.get('prefix', ''))
+        results = self.engine.upload_files(jobs, on_result=lambda i, r: self._report_file('upload', line, r))
+        self.emit('done', line=line, op='upload', files=len(results), failed=sum(1 for r in results if not r.ok))
+
+    def run_download(self, line, op):
+        bucket, prefix = op['bucket'], op.get('prefix', '')
+        jobs, results, skipped = self.engine.mirror_prefix(
+            bucket, prefix, op.get('local') or '.', self.lister.iter_pages(bucket, prefix),
+            on_result=lambda i, r: self._report_file('download', line, r))
+        for result in results[len(jobs):]:
+            self._report_file('download', line, result)  # Keys rejected before downloading
+        self.emit('done', line=line, op='download', files=len(results), skipped=skipped,
+                  failed=sum(1 for r in results if not r.ok))
+
+    def run_sync(self, line, op):
+        bucket, prefix = op['bucket'], op.get('prefix', '')
+        if not os.path.isdir(op.get('local', '')):
+            raise ValueError(f"No such directory: {op.get('local')}")
+        if self.upload_manifest is None:
+            self.upload_manifest = UploadManifest()
+
+        remote = None
+        if op.get('check_remote'):
+            remote = {obj['Key']: obj.get('ETag', '').strip('"')
+                      for page in self.lister.iter_pages(bucket, prefix)
+                      for obj in page.get('Contents', [])}
+
+        jobs = self._local_jobs(bucket, op['local'], prefix)
+        plan, results = self.engine.sync_upload(jobs, self.upload_manifest, remote,
+                                                on_result=lambda i, r: self._report_file('sync', line, r))
+        self.emit('done', line=line, op='sync', files=len(results), skipped=len(jobs) - len(plan),
+                  failed=sum(1 for r in results if not r.ok))
+
+    def run_delete(self, line, op):
+        bucket, prefix = op['bucket'], op.get('prefix', '')
+        if not prefix and not op.get('all'):
+            raise ValueError("Deleting a whole bucket needs \"all\": true")
+        summary = self.deleter.delete_prefix(bucket, prefix, pages=self.lister.iter_pages(bucket, prefix))
+        self._report_delete(line, bucket, summary)
+
+
+def cli(argv=None):
+    """Headless entry point: python main.py run MANIFEST.jsonl [options]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="main.py",
+                                     description="Run S3 operations from a JSON-lines manifest without the GUI")
+    commands = parser.add_subparsers(dest='command')
+    run = commands.add_parser('run', help="run every operation in a manifest")
+    run.add_argument('manifest', help="JSON-lines file of operations, or - to read stdin")
+    run.add_argument('--concurrency', type=int, default=8, help="files in flight (default 8)")
+    run.add_argument('--part-concurrency', type=int, default=4, help="parts in flight per file (default 4)")
+    run.add_argument('--part-size', type=int, default=8, help="multipart / ranged GET part size in MB (default 8)")
+    run.add_argument('--upload-limit', type=float, default=0, help="upload cap in MB/s (default 0 = unlimited)")
+    run.add_argument('--download-limit', type=float, default=0, help="download cap in MB/s (default 0 = unlimited)")
+    run.add_argument('--limit-hours', default="", help="apply the caps only within e.g. 09:00-18:00")
+    run.add_argument('--adaptive', action='store_true', help="auto-tune concurrency from throughput and throttling")
+    run.add_argument('--region', help="AWS region (default $AWS_REGION or us-east-1)")
+    run.add_argument('--metrics', help="write S3 call metrics here when done (.prom / .txt for Prometheus, else JSON)")
+    args = parser.parse_args(argv)
+    if args.command != 'run':
+        parser.print_help()
+        return 2
+
+    # Credentials come from .env / the environment, else boto3's usual chain
+    load_dotenv()
+    transfers = AdaptiveConcurrency(args.concurrency, maximum=64)
+    listing = AdaptiveConcurrency(args.concurrency, maximum=32)
+    transfers.enabled = listing.enabled = args.adaptive
+
+    metrics = S3Metrics()
+
+    def on_throttle():
+        transfers.on_throttle()
+        listing.on_throttle()
+
+    def instrument(client):
+        watch_throttling(client, on_throttle)
+        metrics.attach(client)
+
+    try:
+        hours = parse_hours(args.limit_hours)
+        factory = S3ClientFactory(args.region or os.getenv("AWS_REGION") or "us-east-1",
+                                  os.getenv("AWS_ACCESS_KEY_ID"), os.getenv("AWS_SECRET_ACCESS_KEY"),
+                                  on_create=instrument)
+        files = transfers.maximum if args.adaptive else args.concurrency
+        workers = listing.maximum if args.adaptive else args.concurrency
+        s3_client = factory.client(files * args.part_concurrency + workers + args.concurrency)
+        try:
+            journal = MultipartJournal()
+        except OSError:
+            journal = None
+
+        engine = S3TransferEngine(
+            s3_client,
+            max_concurrency=args.concurrency,
+            part_concurrency=args.part_concurrency,
+            multipart_threshold=args.part_size * MB,
+            part_size=args.part_size * MB,
+            journal=journal,
+            scheduler=TransferQueue(args.concurrency, controller=transfers) if args.adaptive else None,
+            upload_limiter=BandwidthLimiter(args.upload_limit * MB, hours),
+            download_limiter=BandwidthLimiter(args.download_limit * MB, hours)
+        )
+        runner = BatchRunner(engine,
+                             ParallelLister(s3_client, max_workers=workers,
+                                            controller=listing if args.adaptive else None),
+                             S3BatchDeleter(s3_client, max_concurrency=args.concurrency))
+
+        if args.manifest == '-':
+            failures = runner.run(sys.stdin)
+        else:
+            with open(args.manifest, 'r') as f:
+                failures = runner.run(f)
+        if args.metrics:
+            metrics.export(args.metrics)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'event': 'error', 'error': str(e)}), flush=True)
+        return 2
+    return 1 if failures else 0
 
 
 def main():
@@ -1094,6 +5804,11 @@ def main():
     # Handle window close
     def on_closing():
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
+            if app.watchdog.profiler is not None:
+                try:
+                    print(f"Profile saved to {app.watchdog.stop_profiling()}.prof / .folded")
+                except OSError as e:
+                    print(f"Error saving profile: {e}")
             root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -1103,4 +5818,6 @@ def main():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(cli())
     main()
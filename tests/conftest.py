@@ -0,0 +1,192 @@
+"""Shared fixtures: an in-memory S3 client covering the calls the engine makes"""
+import os
+import sys
+import io
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakePaginator:
+    def __init__(self, client, operation):
+        self.client = client
+        self.operation = operation
+
+    def paginate(self, **kwargs):
+        if self.operation == 'list_parts':
+            yield self.client.list_parts(**kwargs)
+            return
+        token = None
+        while True:
+            page = self.client.list_objects_v2(ContinuationToken=token, **kwargs)
+            yield page
+            if not page.get('IsTruncated'):
+                return
+            token = page['NextContinuationToken']
+
+
+class FakeEvents:
+    """botocore-style event hooks: a handler registered for 'a.b' also hears 'a.b.c'"""
+
+    def __init__(self):
+        self.handlers = []
+
+    def register(self, event_name, handler, unique_id=None):
+        self.handlers.append((event_name, handler))
+
+    register_last = register
+
+    def register_first(self, event_name, handler, unique_id=None):
+        self.handlers.insert(0, (event_name, handler))
+
+    def emit(self, event_name, **kwargs):
+        for name, handler in list(self.handlers):
+            if event_name == name or event_name.startswith(name + '.'):
+                handler(event_name=event_name, **kwargs)
+
+
+class FakeS3:
+    """Keeps objects in a dict and answers like S3, PAGE_SIZE entries per listing page"""
+
+    PAGE_SIZE = 100
+
+    def __init__(self, keys=()):
+        self.objects = {key: b'' for key in keys}
+        self.uploads = {}  # upload id -> {part number: data}
+        self.aborted = []
+        self.calls = []
+        self.part_delay = 0.0
+        self.on_part = None  # Called with each part number after it has been stored
+        self.fail_delete = set()  # Keys delete_objects reports as AccessDenied
+        self.etags = {}  # key -> ETag, for keys that should not list as '"etag"'
+        self.encryption = {}  # key -> ServerSideEncryption / SSECustomerAlgorithm headers
+        self._lock = threading.Lock()
+        self._ids = iter(range(1, 1000000))
+        self.meta = SimpleNamespace(events=FakeEvents())
+
+    def _api_call(self, operation, params, run):
+        """Run an operation between the before-call / after-call events S3Metrics listens to"""
+        context = {}
+        model = SimpleNamespace(name=operation)
+        self.meta.events.emit(f'before-call.s3.{operation}', model=model, params=params, context=context)
+        response = run()
+        self.meta.events.emit(f'after-call.s3.{operation}', http_response=None, parsed=response,
+                              model=model, context=context)
+        return response
+
+    def _call(self, name):
+        with self._lock:
+            self.calls.append(name)
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation)
+
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, StartAfter='', ContinuationToken=None,
+                        MaxKeys=None):
+        self._call('list_objects_v2')
+        start = max(StartAfter or '', ContinuationToken or '')
+        limit = MaxKeys or self.PAGE_SIZE
+        contents, prefixes = [], []
+        last = None
+        with self._lock:
+            keys = sorted(k for k in self.objects if k.startswith(Prefix) and k > start)
+        for key in keys:
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common = Prefix + rest.split(Delimiter)[0] + Delimiter
+                if prefixes and prefixes[-1]['Prefix'] == common:
+                    last = key
+                    continue
+                if len(contents) + len(prefixes) == limit:
+                    break
+                prefixes.append({'Prefix': common})
+            else:
+                if len(contents) + len(prefixes) == limit:
+                    break
+                contents.append({'Key': key, 'Size': len(self.objects[key]), 'ETag': self.etags.get(key, '"etag"'),
+                                 'LastModified': datetime(2024, 1, 1, tzinfo=timezone.utc)})
+            last = key
+        page = {'Contents': contents, 'CommonPrefixes': prefixes, 'KeyCount': len(contents) + len(prefixes),
+                'IsTruncated': last is not None and last != keys[-1]}
+        if page['IsTruncated']:
+            page['NextContinuationToken'] = last
+        return page
+
+    def head_object(self, Bucket, Key):
+        self._call('head_object')
+        return dict(self.encryption.get(Key, {}), ContentLength=len(self.objects[Key]),
+                    ETag=self.etags.get(Key, '"etag"'))
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None):
+        self._call('get_object')
+        data = self.objects[Key]
+        if Range:
+            start, _, end = Range[len('bytes='):].partition('-')
+            data = data[int(start):int(end) + 1 if end else None]
+        return dict(self.encryption.get(Key, {}), Body=io.BytesIO(data), ContentLength=len(data))
+
+    def delete_objects(self, Bucket, Delete):
+        self._call('delete_objects')
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        if 'raise' in keys:
+            raise ConnectionError("connection reset")
+        errors = [{'Key': key, 'Code': 'AccessDenied', 'Message': 'Access Denied'}
+                  for key in keys if key in self.fail_delete]
+        with self._lock:
+            for key in keys:
+                if key not in self.fail_delete:
+                    self.objects.pop(key, None)
+        return {'Errors': errors} if errors else {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self._call('put_object')
+
+        def run():
+            data = Body.read() if hasattr(Body, 'read') else Body
+            with self._lock:
+                self.objects[Key] = data
+            return {'ETag': '"etag"'}
+        return self._api_call('PutObject', {'Bucket': Bucket, 'Key': Key, 'Body': Body}, run)
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        self._call('create_multipart_upload')
+        upload_id = f"upload-{next(self._ids)}"
+        self.uploads[upload_id] = {}
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._call('upload_part')
+
+        def run():
+            time.sleep(self.part_delay)
+            self.uploads[UploadId][PartNumber] = Body
+            if self.on_part:
+                self.on_part(PartNumber)
+            return {'ETag': f'"part-{PartNumber}"'}
+        return self._api_call('UploadPart', {'Bucket': Bucket, 'Key': Key, 'Body': Body}, run)
+
+    def list_parts(self, Bucket, Key, UploadId):
+        self._call('list_parts')
+        return {'Parts': [{'PartNumber': n, 'ETag': f'"part-{n}"'} for n in sorted(self.uploads[UploadId])]}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._call('complete_multipart_upload')
+        parts = self.uploads.pop(UploadId)
+        with self._lock:
+            self.objects[Key] = b''.join(parts[p['PartNumber']] for p in MultipartUpload['Parts'])
+        return {'ETag': '"multipart-etag"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._call('abort_multipart_upload')
+        self.uploads.pop(UploadId, None)
+        self.aborted.append(UploadId)
+
+
+@pytest.fixture
+def fake_s3():
+    return FakeS3()
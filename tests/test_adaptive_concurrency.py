@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+
+
+def test_throttle_halves_the_limit_once_per_cooldown():
+    controller = main.AdaptiveConcurrency(initial=16)
+    controller.on_throttle()
+    controller.on_throttle()
+
+    assert controller.limit == 8
+    assert controller.throttles == 2
+    assert 0 <= controller.backoff_delay() <= controller.BACKOFF_CAP
+
+
+def test_limit_never_leaves_its_bounds():
+    controller = main.AdaptiveConcurrency(initial=2, minimum=2, maximum=4)
+    controller.COOLDOWN = 0
+    for _ in range(5):
+        controller.on_throttle()
+    assert controller.limit == 2
+
+    controller.reset(100)
+    assert controller.limit == 4
+
+
+def test_limit_grows_while_throughput_keeps_improving():
+    controller = main.AdaptiveConcurrency(initial=2, maximum=10)
+    units = 1000
+    for _ in range(6):
+        # Pretend a whole window has passed, with twice the work of the last one
+        controller._window_start = time.monotonic() - controller.WINDOW_SECONDS
+        for _ in range(controller.limit):
+            controller.record(units, 0.01)
+        units *= 2
+
+    assert controller.limit == 8
+    assert controller.peak == controller.limit
+
+
+def test_slot_waits_while_the_limit_is_in_use():
+    controller = main.AdaptiveConcurrency(initial=1)
+    entered = threading.Event()
+
+    def second():
+        with controller.slot():
+            entered.set()
+
+    with controller.slot():
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.05)
+        assert not entered.is_set()
+    thread.join(1)
+    assert entered.is_set()
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+
+def test_prefix_is_deleted_in_batches_of_1000():
+    keys = [f"logs/{i:05d}" for i in range(2500)]
+    s3 = FakeS3(keys + ['keep/me'])
+    progress = []
+
+    summary = main.S3BatchDeleter(s3).delete_prefix('bucket', 'logs/',
+                                                    on_progress=lambda s: progress.append(s.deleted))
+
+    assert summary.deleted == 2500 and summary.error_count == 0
+    assert s3.calls.count('delete_objects') == 3
+    assert len(progress) == 3 and max(progress) == 2500
+    assert list(s3.objects) == ['keep/me']
+
+
+def test_per_key_errors_and_failed_requests_are_reported():
+    s3 = FakeS3()
+    s3.fail_delete = {'b'}
+    deleter = main.S3BatchDeleter(s3)
+    deleter.BATCH_SIZE = 2
+
+    summary = deleter.delete_keys('bucket', ['a', 'b', 'raise', 'c'])
+
+    assert summary.deleted == 1
+    assert summary.error_count == 3
+    assert sorted((key, code) for key, code, _ in summary.errors) == [
+        ('b', 'AccessDenied'), ('c', 'RequestFailed'), ('raise', 'RequestFailed')]
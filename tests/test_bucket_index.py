@@ -0,0 +1,105 @@
+import re
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = main.BucketIndex('bucket', path=str(tmp_path / "bucket.sqlite"))
+    yield index
+    index.close()
+
+
+def indexed_keys(index):
+    return [row[0] for row in index.conn.execute("SELECT key FROM objects ORDER BY key")]
+
+
+def test_sync_sweeps_stale_rows_but_keeps_concurrent_writes(index):
+    s3 = FakeS3([f"photos/{i:03d}.jpg" for i in range(250)])
+    index.put_object('photos/deleted-on-s3.jpg', 1, 0)
+    time.sleep(0.01)  # Stamps are in milliseconds
+
+    def pages():
+        paginator = s3.get_paginator('list_objects_v2')
+        for number, page in enumerate(paginator.paginate(Bucket='bucket', Prefix='photos/')):
+            if number == 1:
+                # An upload and a folder listing land while the sync is running
+                writer = threading.Thread(target=index.put_object, args=('photos/new/uploaded.jpg', 5, 0))
+                writer.start()
+                writer.join()
+                store = main.ListingStore()
+                store.extend(['raw'], [('uploaded.jpg', 5, 0)])
+                index.apply_listing('photos/new/', store)
+            yield page
+
+    assert index.sync_recursive(s3, 'photos/', pages=pages()) == 250
+
+    keys = indexed_keys(index)
+    assert 'photos/deleted-on-s3.jpg' not in keys
+    assert 'photos/new/uploaded.jpg' in keys
+    assert len(keys) == 251
+    assert index.list_children('photos/new/').folders == ['raw']
+    assert index.list_children('photos/').folders == ['new']
+
+
+def test_sync_only_sweeps_its_own_prefix(index):
+    index.put_object('other/keep.txt', 1, 0)
+    index.put_object('docs/stale.txt', 1, 0)
+    time.sleep(0.01)
+    s3 = FakeS3(['docs/a.txt', 'docs/b/c.txt'])
+
+    index.sync_recursive(s3, 'docs/')
+
+    assert indexed_keys(index) == ['docs/a.txt', 'docs/b/c.txt', 'other/keep.txt']
+    assert index.is_fresh('docs/b/', max_age=60)
+    assert not index.is_fresh('other/', max_age=60)
+
+
+def test_children_are_read_from_the_index_after_a_sync(index):
+    index.sync_recursive(FakeS3(['a/1.txt', 'a/b/2.txt', 'c.txt']))
+
+    store = index.list_children('a/')
+    assert store.folders == ['b'] and list(store.names) == ['1.txt']
+    assert index.prefix_stats('') == (3, 0)
+    assert index.has_full_sync()
+
+
+def test_folder_listing_refreshes_the_etag_of_changed_objects(index):
+    index.put_object('docs/a.txt', 1, 100, etag='old')
+    index.put_object('docs/b.txt', 1, 100, etag='kept')
+
+    store = main.ListingStore()
+    store.extend([], [('a.txt', 2, 200, 'new'), ('b.txt', 1, 100)])
+    index.apply_listing('docs/', store)
+
+    assert dict(index.conn.execute("SELECT key, etag FROM objects")) == {'docs/a.txt': 'new', 'docs/b.txt': 'kept'}
+    assert index.list_children('docs/').etags == ['new', 'kept']
+
+    # Without an ETag in the listing, a changed object's old one is dropped
+    store = main.ListingStore()
+    store.extend([], [('a.txt', 2, 200, 'new'), ('b.txt', 3, 300)])
+    index.apply_listing('docs/', store)
+
+    assert index.conn.execute("SELECT etag FROM objects WHERE key = 'docs/b.txt'").fetchone() == (None,)
+
+
+@pytest.mark.parametrize("pattern", [
+    r'[^]abcd]', r'[\]abcd]', r'[^]a]\.txt', r'x[]a]b', r'^x/[^]]', r'(a[)]bcd)?z',
+    r'\d{2}\.log$', r'^logs/.*-\d+',
+])
+def test_regex_search_matches_re_search(index, pattern):
+    keys = ['x/b.txt', 'x/a.txt', 'zzz', ']zz', 'x]b', 'xab', 'a)bc', 'x/]', 'logs/app-12.log', 'logs/db.log']
+    for key in keys:
+        index.put_object(key, 1, 0)
+
+    found = [row[0] for batch in index.search(pattern, mode='regex') for row in batch]
+
+    assert sorted(found) == sorted(key for key in keys if re.search(pattern, key))
@@ -0,0 +1,90 @@
+import hashlib
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+MB = main.MB
+
+
+def md5_etag(data):
+    return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+@pytest.fixture
+def s3():
+    s3 = FakeS3()
+    for key, size in (('mirror/small.bin', 1000), ('mirror/large.bin', 12 * MB)):
+        s3.objects[key] = os.urandom(size)
+    return s3
+
+
+def mirror(s3, tmp_path):
+    engine = main.S3TransferEngine(s3, multipart_threshold=5 * MB, part_size=5 * MB)
+    pages = [s3.list_objects_v2(Bucket='bucket', Prefix='mirror/')]
+    _, results, _ = engine.mirror_prefix('bucket', 'mirror/', str(tmp_path / "out"), pages)
+    return {r.key: r for r in results}
+
+
+def test_listing_started_downloads_are_checked_against_a_plain_etag(s3, tmp_path):
+    for key in s3.objects:
+        s3.etags[key] = md5_etag(b'something else')
+
+    results = mirror(s3, tmp_path)
+
+    assert not results['mirror/small.bin'].ok and not results['mirror/large.bin'].ok
+    assert "does not match" in results['mirror/small.bin'].error
+    assert 'head_object' not in s3.calls
+
+
+@pytest.mark.parametrize("encryption", [
+    {'ServerSideEncryption': 'aws:kms'},
+    {'ServerSideEncryption': 'aws:kms:dsse'},
+    {'ServerSideEncryption': 'AES256', 'SSECustomerAlgorithm': 'AES256'},
+])
+def test_encrypted_objects_skip_the_md5_check(s3, tmp_path, encryption):
+    for key in s3.objects:
+        s3.etags[key] = md5_etag(b'not the content md5')
+        s3.encryption[key] = encryption
+
+    results = mirror(s3, tmp_path)
+
+    assert all(r.ok for r in results.values())
+    with open(tmp_path / "out" / "large.bin", 'rb') as f:
+        assert f.read() == s3.objects['mirror/large.bin']
+
+
+def test_head_path_applies_the_same_rules(s3, tmp_path):
+    engine = main.S3TransferEngine(s3, multipart_threshold=5 * MB, part_size=5 * MB)
+    s3.etags['mirror/small.bin'] = md5_etag(s3.objects['mirror/small.bin'])
+    s3.etags['mirror/large.bin'] = '"0123456789abcdef0123456789abcdef-3"'
+
+    results = engine.download_files([('bucket', 'mirror/small.bin', str(tmp_path / "small.bin")),
+                                     ('bucket', 'mirror/large.bin', str(tmp_path / "large.bin"))])
+
+    assert all(r.ok for r in results)
+    s3.etags['mirror/small.bin'] = md5_etag(b'changed')
+    assert not engine.download_files([('bucket', 'mirror/small.bin', str(tmp_path / "small.bin"))])[0].ok
+
+
+def test_keys_outside_the_target_are_rejected(s3, tmp_path, monkeypatch):
+    s3.objects.update({'mirror/../escape.txt': b'x', 'mirror/C:/other-drive.txt': b'y'})
+    commonpath = os.path.commonpath
+
+    def windows_commonpath(paths):
+        if any('C:' in path for path in paths):
+            raise ValueError("Paths don't have the same drive")
+        return commonpath(paths)
+    monkeypatch.setattr(main.os.path, 'commonpath', windows_commonpath)
+
+    results = mirror(s3, tmp_path)
+
+    assert results['mirror/small.bin'].ok and results['mirror/large.bin'].ok
+    for key in ('mirror/../escape.txt', 'mirror/C:/other-drive.txt'):
+        assert results[key].error == "Key escapes the destination folder"
+    assert not (tmp_path / "escape.txt").exists()
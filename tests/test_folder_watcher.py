@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+
+
+def fast_watcher(directory, on_batch, **kwargs):
+    watcher = main.FolderWatcher(str(directory), on_batch, **kwargs)
+    watcher.DEBOUNCE = 0.1
+    watcher.POLL_INTERVAL = 0.1
+    watcher.MIN_BATCH_INTERVAL = 0.2
+    watcher.RETRY_DELAY = 0.2
+    watcher.MAX_RETRIES = 2
+    return watcher
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_burst_of_writes_arrives_once_per_file(tmp_path, use_inotify):
+    batches = []
+    watcher = fast_watcher(tmp_path, batches.append, use_inotify=use_inotify)
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        (tmp_path / 'sub').mkdir()
+        for _ in range(3):
+            for name in ('a.txt', 'b.txt', os.path.join('sub', 'c.txt')):
+                with open(tmp_path / name, 'a') as f:
+                    f.write('x')
+        (tmp_path / ('skip' + main.PARTIAL_SUFFIX)).write_text('partial')
+        wait_for(lambda: watcher.files == 3)
+        time.sleep(0.5)
+    finally:
+        watcher.stop()
+
+    uploaded = [os.path.relpath(path, tmp_path) for batch in batches for path in batch]
+    assert sorted(uploaded) == ['a.txt', 'b.txt', os.path.join('sub', 'c.txt')]
+
+
+def test_failed_files_are_retried_then_given_up(tmp_path):
+    calls = []
+    errors = []
+    done = threading.Event()
+
+    def on_batch(paths):
+        calls.append(sorted(os.path.basename(path) for path in paths))
+        if len(calls) == 1:
+            raise ConnectionError("network down")
+        if len(calls) == 3:
+            done.set()
+        return [path for path in paths if path.endswith('bad.txt')]
+
+    watcher = fast_watcher(tmp_path, on_batch, use_inotify=False, on_error=errors.append)
+    watcher.start()
+    try:
+        time.sleep(0.2)
+        (tmp_path / 'good.txt').write_text('g')
+        (tmp_path / 'bad.txt').write_text('b')
+        assert done.wait(10)
+        time.sleep(0.5)
+    finally:
+        watcher.stop()
+
+    assert calls == [['bad.txt', 'good.txt'], ['bad.txt', 'good.txt'], ['bad.txt']]
+    assert watcher.files == 1 and watcher.given_up == 1
+    assert "network down" in errors[0]
+    assert "gave up on 1 files" in errors[1]
@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+
+def listed(pages):
+    """Keys and common prefixes in listing order; a page holds them as two sorted lists"""
+    items = []
+    for page in pages:
+        items += sorted([obj['Key'] for obj in page.get('Contents', [])] +
+                        [cp['Prefix'] for cp in page.get('CommonPrefixes', [])])
+    return items
+
+
+def nested_keys():
+    keys = [f"data/{folder}/{i:04d}.bin" for folder in 'abcdefghij' for i in range(150)]
+    keys += [f"data/top-{i:04d}" for i in range(120)]
+    return keys
+
+
+def test_recursive_merge_matches_sequential_listing():
+    s3 = FakeS3(nested_keys())
+    parallel = listed(main.ParallelLister(s3, max_workers=4).iter_pages('bucket', 'data/'))
+    sequential = listed(main.ParallelLister(s3, max_workers=1).iter_pages('bucket', 'data/'))
+
+    assert parallel == sequential == sorted(nested_keys())
+
+
+def test_flat_prefix_is_split_without_gaps_or_duplicates():
+    keys = [f"flat/{c}{i:03d}" for c in '0123456789ABCxyz' for i in range(40)]
+    s3 = FakeS3(keys)
+
+    assert listed(main.ParallelLister(s3, max_workers=8).iter_pages('bucket', 'flat/')) == sorted(keys)
+
+
+def test_delimiter_listing_matches_sequential_listing():
+    keys = [f"root/{folder:03d}/file" for folder in range(250)] + [f"root/loose-{i:03d}" for i in range(150)]
+    s3 = FakeS3(keys)
+    parallel = listed(main.ParallelLister(s3, max_workers=4).iter_pages('bucket', 'root/', delimiter='/'))
+    sequential = listed(main.ParallelLister(s3, max_workers=1).iter_pages('bucket', 'root/', delimiter='/'))
+
+    assert parallel == sequential
+    assert len(parallel) == len(set(parallel)) == 400
+
+
+def test_small_prefix_costs_one_request():
+    s3 = FakeS3([f"small/{i}" for i in range(10)])
+
+    assert len(listed(main.ParallelLister(s3, max_workers=8).iter_pages('bucket', 'small/'))) == 10
+    assert s3.calls == ['list_objects_v2']
+
+
+def list_calls(keys, max_workers, prefix, delimiter=None):
+    s3 = FakeS3(keys)
+    pages = list(main.ParallelLister(s3, max_workers=max_workers).iter_pages('bucket', prefix, delimiter))
+    return s3.calls.count('list_objects_v2'), listed(pages)
+
+
+def test_prefix_ending_within_a_few_pages_costs_no_extra_calls():
+    keys = [f"logs/{folder}/{i:03d}" for folder in 'abc' for i in range(100)]
+
+    parallel, _ = list_calls(keys, 8, 'logs/')
+    sequential, _ = list_calls(keys, 1, 'logs/')
+
+    assert parallel == sequential == 3
+
+
+def test_fan_out_adds_only_a_call_per_range():
+    keys = [f"data/{folder:02d}/{i:03d}" for folder in range(40) for i in range(100)]
+
+    parallel, parallel_items = list_calls(keys, 8, 'data/')
+    sequential, sequential_items = list_calls(keys, 1, 'data/')
+
+    assert parallel_items == sequential_items
+    assert sequential == 40
+    # One delimiter probe, plus one partly used page for each of the ~8 ranges
+    assert parallel <= sequential + 10
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+MB = main.MB
+
+
+def test_upload_bodies_are_counted_as_bytes_sent(tmp_path):
+    s3 = FakeS3()
+    metrics = main.S3Metrics()
+    metrics.attach(s3)
+    engine = main.S3TransferEngine(s3, multipart_threshold=5 * MB, part_size=5 * MB,
+                                   journal=main.MultipartJournal(str(tmp_path / "journal")))
+    small = tmp_path / "small.txt"
+    small.write_bytes(os.urandom(1000))
+    large = tmp_path / "large.bin"
+    large.write_bytes(os.urandom(12 * MB))
+
+    results = engine.upload_files([('bucket', str(small), 'small.txt'), ('bucket', str(large), 'large.bin')])
+
+    assert all(result.ok for result in results)
+    stats = metrics.snapshot()
+    assert stats['PutObject']['calls'] == 1 and stats['PutObject']['bytes_sent'] == 1000
+    assert stats['UploadPart']['calls'] == 3 and stats['UploadPart']['bytes_sent'] == 12 * MB
+
+
+def test_stream_without_len_is_sized_from_its_position(tmp_path):
+    path = tmp_path / "body"
+    path.write_bytes(b'x' * 500)
+    with open(path, 'rb') as f:
+        f.seek(100)
+        assert main.S3Metrics._body_size(f) == 400
+        assert f.tell() == 100
+    assert main.S3Metrics._body_size(None) == 0
@@ -0,0 +1,143 @@
+import os
+import random
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+
+import main
+from conftest import FakeS3
+
+MB = main.MB
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_results_are_reported_in_job_order():
+    queue = main.TransferQueue(max_active=4)
+    reported = []
+
+    def worker(bucket, local_path, key, control=None):
+        time.sleep(random.uniform(0, 0.02))
+        return main.TransferResult(local_path, key, error=None if key != 'k3' else "boom")
+
+    jobs = [('bucket', f"/tmp/f{i}", f"k{i}") for i in range(20)]
+    results = queue.run_batch('upload', worker, jobs, on_result=lambda i, r: reported.append(i))
+
+    assert [r.key for r in results] == [job[2] for job in jobs]
+    assert [r.ok for r in results] == [i != 3 for i in range(20)]
+    assert reported == list(range(20))
+
+
+@pytest.fixture
+def journaled(tmp_path):
+    """(s3, queue, engine, local file) for a four-part journaled upload"""
+    s3 = FakeS3()
+    s3.part_delay = 0.05
+    queue = main.TransferQueue(max_active=2)
+    journal = main.MultipartJournal(str(tmp_path / "journal"))
+    engine = main.S3TransferEngine(s3, part_concurrency=1, multipart_threshold=5 * MB, part_size=5 * MB,
+                                   journal=journal, scheduler=queue)
+    path = tmp_path / "large.bin"
+    path.write_bytes(os.urandom(20 * MB))
+    return s3, queue, engine, str(path)
+
+
+def start_upload(engine, path):
+    results = []
+    thread = threading.Thread(target=lambda: results.extend(engine.upload_files([('bucket', path, 'large.bin')])))
+    thread.start()
+    return thread, results
+
+
+def test_paused_upload_resumes_from_its_journal(journaled):
+    s3, queue, engine, path = journaled
+    s3.on_part = lambda number: number == 2 and queue.pause([item.id for item in queue.snapshot()[0]])
+    thread, results = start_upload(engine, path)
+
+    wait_for(lambda: [item.state for item in queue.snapshot()[0]] == [queue.PAUSED])
+    entry = engine.journal.load('bucket', 'large.bin', path)
+    assert sorted(entry['parts']) == ['1', '2']
+
+    s3.on_part = None
+    queue.resume([item.id for item in queue.snapshot()[0]])
+    thread.join(10)
+
+    assert results[0].ok
+    assert s3.calls.count('upload_part') == 4  # Parts 1 and 2 were not sent again
+    assert s3.calls.count('create_multipart_upload') == 1
+    with open(path, 'rb') as f:
+        assert s3.objects['large.bin'] == f.read()
+    assert engine.journal.load('bucket', 'large.bin', path) is None
+
+
+def test_cancelled_upload_aborts_and_clears_its_journal(journaled):
+    s3, queue, engine, path = journaled
+    s3.on_part = lambda number: number == 1 and queue.cancel([item.id for item in queue.snapshot()[0]])
+    thread, results = start_upload(engine, path)
+    thread.join(10)
+
+    assert not results[0].ok and results[0].error == "Cancelled"
+    assert s3.calls.count('upload_part') == 1
+    assert len(s3.aborted) == 1
+    assert 'large.bin' not in s3.objects
+    assert engine.journal.load('bucket', 'large.bin', path) is None
+    assert queue.history[-1].state == queue.CANCELLED
+
+
+def test_pause_all_holds_queued_items_until_resumed():
+    queue = main.TransferQueue(max_active=1)
+    queue.pause_all()
+    started = []
+
+    def worker(bucket, local_path, key, control=None):
+        started.append(key)
+        return main.TransferResult(local_path, key)
+
+    jobs = [('bucket', '/tmp/a', 'a'), ('bucket', '/tmp/b', 'b')]
+    thread = threading.Thread(target=queue.run_batch, args=('upload', worker, jobs))
+    thread.start()
+    time.sleep(0.1)
+    assert started == []
+
+    queue.resume_all()
+    thread.join(5)
+    assert started == ['a', 'b']
+
+
+def test_batches_sharing_a_path_keep_their_own_planned_sizes(tmp_path):
+    s3 = FakeS3()
+    progress = main.TransferProgress()
+    engine = main.S3TransferEngine(s3, max_concurrency=1, progress=progress)
+    blocker, shared = tmp_path / "blocker.bin", tmp_path / "shared.bin"
+    blocker.write_bytes(b'b' * 300)
+    shared.write_bytes(b's' * 1000)
+
+    release = threading.Event()
+    put_object = s3.put_object
+
+    def held_put_object(**kwargs):
+        if kwargs['Key'] == 'blocker':
+            release.wait(10)
+        return put_object(**kwargs)
+    s3.put_object = held_put_object
+
+    first = threading.Thread(target=engine.upload_files,
+                             args=([('bucket', str(blocker), 'blocker'), ('bucket', str(shared), 'shared')],))
+    first.start()
+    wait_for(lambda: progress.files)
+    # A second batch uploads the same file and finishes while the first still has it queued
+    assert engine.upload_files([('bucket', str(shared), 'shared')])[0].ok
+    release.set()
+    first.join(10)
+
+    assert progress.batches == 0
+    assert progress.total == progress.done == 300 + 2 * 1000